@@ -21,8 +21,8 @@
 from collections import (
     OrderedDict,
     defaultdict,
-    namedtuple,
 )
+from functools import partial
 import traceback
 
 from PyQt5 import (
@@ -61,7 +61,6 @@ from picard.script import (
 )
 from picard.track import Track
 from picard.util import (
-    find_best_match,
     format_time,
     mbid_validate,
 )
@@ -221,6 +220,7 @@ class Album(DataObject, Item):
         if self.load_task is None:
             return
         self.load_task = None
+        self.tagger.album_loader.done(self)
         parsed = False
         try:
             if error:
@@ -449,9 +449,11 @@ class Album(DataObject, Item):
         if config.setting['enable_ratings']:
             require_authentication = True
             inc += ['user-ratings']
-        self.load_task = self.tagger.mb_api.get_release_by_id(
-            self.id, self._release_request_finished, inc=inc,
-            mblogin=require_authentication, priority=priority, refresh=refresh)
+        request = partial(self.tagger.mb_api.get_release_by_id, self.id, inc=inc,
+                          mblogin=require_authentication, priority=priority, refresh=refresh)
+        self.load_task = self.tagger.entity_cache.request(
+            'release', self.id, inc, self._release_request_finished, request,
+            refresh=refresh)
 
     def run_when_loaded(self, func):
         if self.loaded:
@@ -461,12 +463,12 @@ class Album(DataObject, Item):
 
     def stop_loading(self):
         if self.load_task:
-            self.tagger.webservice.remove_task(self.load_task)
+            self.load_task.cancel()
             self.load_task = None
 
     def update(self, update_tracks=True):
         if self.item:
-            self.item.update(update_tracks)
+            self.item.schedule_update(update_tracks=update_tracks)
 
     def _add_file(self, track, file):
         self._files += 1
@@ -495,7 +497,7 @@ class Album(DataObject, Item):
                     (tm_recordingid, )):
                     tracks_cache[tup] = track
 
-        SimMatchAlbum = namedtuple('SimMatchAlbum', 'similarity track')
+        track_features = None
 
         for file in list(files):
             if file.state == File.REMOVED:
@@ -514,22 +516,26 @@ class Album(DataObject, Item):
                     yield (file, track)
                     continue
 
-            # try to match by similarity
-            def candidates():
-                for track in self.tracks:
-                    yield SimMatchAlbum(
-                        similarity=track.metadata.compare(file.orig_metadata),
-                        track=track
-                    )
-                    QtCore.QCoreApplication.processEvents()
-
-            no_match = SimMatchAlbum(similarity=-1, track=self.unmatched_files)
-            best_match = find_best_match(candidates, no_match)
-
-            if best_match.similarity < threshold:
-                yield (file, no_match.track)
+            # try to match by similarity, comparing the file to all tracks at once
+            if track_features is None:
+                track_features = self.get_track_features()
+            file_features = file.orig_metadata.comparison_features()
+            best_similarity = -1
+            best_track = self.unmatched_files
+            for track, features in zip(self.tracks, track_features):
+                similarity = features.compare(file_features)
+                if similarity > best_similarity:
+                    best_similarity = similarity
+                    best_track = track
+
+            if best_similarity < threshold:
+                yield (file, self.unmatched_files)
             else:
-                yield (file, best_match.result.track)
+                yield (file, best_track)
+
+    def get_track_features(self):
+        """Return the comparison features of all tracks, in the order of self.tracks."""
+        return [track.metadata.comparison_features() for track in self.tracks]
 
     def match_files(self, files, recordingid=None):
         """Match and move files to tracks on this album, based on metadata similarity or recordingid."""
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from collections import deque
+import time
+
+from PyQt5 import QtCore
+
+from picard import (
+    config,
+    log,
+)
+from picard.util import format_time
+from picard.webservice import ratecontrol
+
+
+class AlbumLoader(QtCore.QObject):
+
+    """Loads the albums of files carrying release MBIDs.
+
+    Loading a directory of tagged files can add thousands of albums, each
+    needing a rate-limited release request. Instead of sending all requests
+    at once, the albums are queued and only ``album_loader_window`` of them
+    are loaded at a time, enough to keep the web service busy. Each time a
+    load finishes, the queued album with the most files waiting for it is
+    started next, so the files of large albums are matched first whatever
+    order they were added in. Albums are deduplicated by the tagger, which
+    only creates one Album per release MBID.
+
+    If the MusicBrainz server has no delay between requests, e.g. a local
+    mirror, all albums are loaded right away.
+
+    Albums loaded on request of the user skip the queue, see
+    :meth:`load_now`.
+
+    The queue depth and an estimate of the remaining time, based on the
+    recent load rate, are shown in the status bar until all albums are
+    loaded.
+    """
+
+    # Number of recent loads used to estimate the remaining time
+    rate_samples = 20
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._queued = {}
+        self._loading = {}
+        self._finished_times = deque(maxlen=self.rate_samples)
+        self._fill_scheduled = False
+        # Set while the progress is shown in the status bar
+        self._reporting = False
+        self._loaded_count = 0
+
+    @property
+    def pending_count(self):
+        return len(self._queued) + len(self._loading)
+
+    def queue(self, album):
+        """Queue ``album`` to be loaded."""
+        if album.id in self._queued or album.id in self._loading:
+            return
+        album.status = _("[waiting to load album]")
+        album.update()
+        self._queued[album.id] = album
+        # Files of a batch are moved to their albums one after the other,
+        # the albums are only started after the whole batch is queued.
+        if not self._fill_scheduled:
+            self._fill_scheduled = True
+            QtCore.QTimer.singleShot(0, self._fill)
+
+    def load_now(self, album):
+        """Load ``album`` right away if it is still queued."""
+        if self._queued.pop(album.id, None) is None:
+            return
+        log.debug("Loading %r before the queued albums", album)
+        album.load()
+        self._report_progress()
+
+    def done(self, album):
+        """Called when the release of ``album`` was loaded or failed to load."""
+        self._queued.pop(album.id, None)
+        if self._loading.pop(album.id, None) is not None:
+            self._finished_times.append(time.monotonic())
+            self._loaded_count += 1
+            self._fill()
+
+    def remove(self, album):
+        """Forget ``album``, e.g. when it was removed from the tagger."""
+        self._queued.pop(album.id, None)
+        if self._loading.pop(album.id, None) is not None:
+            self._fill()
+
+    def clear(self):
+        self._queued.clear()
+        self._loading.clear()
+        self._reporting = False
+        self._loaded_count = 0
+
+    @staticmethod
+    def _hostkey():
+        return (config.setting['server_host'], config.setting['server_port'])
+
+    def _window(self):
+        if not ratecontrol.current_delay(self._hostkey()):
+            return len(self._queued) + len(self._loading)
+        return max(1, config.setting['album_loader_window'])
+
+    @staticmethod
+    def _waiting_files(album):
+        return album.get_num_unmatched_files()
+
+    def _fill(self):
+        self._fill_scheduled = False
+        window = self._window()
+        while self._queued and len(self._loading) < window:
+            # Ties are broken by the order the albums were queued in
+            album = max(self._queued.values(), key=self._waiting_files)
+            del self._queued[album.id]
+            self._loading[album.id] = album
+            log.debug("Loading %r, %d files waiting", album, self._waiting_files(album))
+            album.load()
+        self._report_progress()
+
+    def _seconds_per_album(self):
+        times = self._finished_times
+        if len(times) >= 2:
+            return (times[-1] - times[0]) / (len(times) - 1)
+        return ratecontrol.current_delay(self._hostkey()) / 1000
+
+    def _report_progress(self):
+        if not self._queued and not (self._reporting and self._loading):
+            if self._reporting:
+                self._reporting = False
+                self.tagger.window.set_statusbar_message(
+                    N_("Albums loaded: %(count)d"), {'count': self._loaded_count})
+                self._loaded_count = 0
+            return
+        self._reporting = True
+        eta = self.pending_count * self._seconds_per_album()
+        self.tagger.window.set_statusbar_message(
+            N_("Loading albums: %(queued)d queued, %(loading)d loading, about %(eta)s remaining"),
+            {
+                'queued': len(self._queued),
+                'loading': len(self._loading),
+                'eta': format_time(eta * 1000, display_zero=True),
+            }
+        )
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from collections import Counter
+import json
+import os.path
+import signal
+import sys
+import time
+
+from PyQt5 import QtCore
+
+from picard import (
+    PICARD_APP_NAME,
+    PICARD_ORG_NAME,
+    config,
+    log,
+)
+from picard.album import Album
+from picard.cluster import Cluster
+from picard.file import File
+import picard.options  # noqa: F401 # pylint: disable=unused-import
+from picard.renameplan import RenamePlan
+from picard.taggercore import TaggerCore
+from picard.track import Track
+from picard.util import decode_filename
+
+
+class HeadlessWindow:
+
+    """Stands in for the MainWindow when running without a user interface.
+
+    Status bar messages are only logged, the state of the actions is ignored.
+    """
+
+    def set_statusbar_message(self, message, *args, **kwargs):
+        echo = kwargs.get('echo', log.debug)
+        if not message or not echo:
+            return
+        if len(args) == 1 and hasattr(args[0], 'keys'):
+            echo(message % args[0])
+        else:
+            echo(message % args)
+
+    def enable_cluster(self, enabled):
+        pass
+
+    def enable_submit(self, enabled):
+        pass
+
+
+class BatchTagger(TaggerCore, QtCore.QCoreApplication):
+
+    """Runs the load, cluster, lookup and save steps on files without a GUI.
+
+    Each step is started once the previous one is done, i.e. no files are
+    loading or saving and no web requests or background tasks are pending.
+    At the end a JSON report on all files is written and the application
+    exits. On a dry run the save step only plans the file moves, which are
+    added to the report.
+    """
+
+    tagger_stats_changed = QtCore.pyqtSignal()
+    listen_port_changed = QtCore.pyqtSignal(int)
+    cluster_added = QtCore.pyqtSignal(Cluster)
+    cluster_removed = QtCore.pyqtSignal(Cluster)
+    album_added = QtCore.pyqtSignal(Album)
+    album_removed = QtCore.pyqtSignal(Album)
+
+    # Interval in milliseconds at which a running step is checked
+    poll_interval = 100
+
+    def __init__(self, picard_args, localedir):
+        super().__init__(sys.argv[:1])
+        config._setup(self, picard_args.config_file)
+        self.window = HeadlessWindow()
+        self._setup_core(picard_args, localedir)
+
+        self._paths = picard_args.FILE
+        self._report = picard_args.report
+        self._dry_run = picard_args.dry_run
+        self._plan = None
+        self._steps = [self._load]
+        if picard_args.cluster:
+            self._steps.append(self._cluster)
+        if picard_args.lookup:
+            self._steps.append(self._lookup)
+        if picard_args.save:
+            self._steps.append(self._save)
+        self._sources = {}
+        self._saved = set()
+        self._idle_polls = 0
+        self._start_time = None
+        self._poll_timer = QtCore.QTimer(self)
+        self._poll_timer.timeout.connect(self._poll)
+
+    def run(self):
+        self._start_time = time.monotonic()
+        QtCore.QTimer.singleShot(0, self._next_step)
+        self.exec_()
+        self.exit()
+        return self._write_report()
+
+    def is_busy(self):
+        """Return True while files, web requests or background tasks are pending."""
+        return bool(
+            self.file_scanner.pending_count
+            or self.file_loader.pending_count
+            or self.file_saver.pending_count
+            or self.album_loader.pending_count
+            or self.cluster_jobs
+            or self.webservice.count_pending_requests()
+            or self.thread_pool.activeThreadCount()
+            or self.priority_thread_pool.activeThreadCount()
+            or any(file.state == File.PENDING for file in self.files.values()))
+
+    def _poll(self):
+        # Results of background tasks are delivered through events, wait for
+        # a second idle poll to have them processed.
+        if self.is_busy():
+            self._idle_polls = 0
+            return
+        self._idle_polls += 1
+        if self._idle_polls >= 2:
+            self._poll_timer.stop()
+            self._next_step()
+
+    def _next_step(self):
+        if not self._steps:
+            self.quit()
+            return
+        step = self._steps.pop(0)
+        log.debug("Batch step %s", step.__name__.lstrip('_'))
+        step()
+        self._idle_polls = 0
+        self._poll_timer.start(self.poll_interval)
+
+    def _load(self):
+        files = []
+        for path in self._paths:
+            path = decode_filename(path)
+            if os.path.isdir(path):
+                self.add_directory(path)
+            else:
+                files.append(path)
+        if files:
+            self.add_files(files)
+
+    def _cluster(self):
+        self._remember_sources()
+        if self.unclustered_files.files:
+            self.cluster([self.unclustered_files])
+
+    def _lookup(self):
+        self._remember_sources()
+        self.autotag([self.clusters, self.unclustered_files])
+
+    def _save(self):
+        self._remember_sources()
+        files = self.get_files_from_objects(list(self.albums.values()), save=True)
+        if self._dry_run:
+            self._plan = RenamePlan(loaded_files=self.files)
+            for file in files:
+                self._plan.add_file(file)
+            return
+        self._saved.update(files)
+        for file in files:
+            file.save()
+
+    def _remember_sources(self):
+        for filename, file in self.files.items():
+            self._sources.setdefault(file, filename)
+
+    @staticmethod
+    def _file_status(file, saved):
+        if file.has_error():
+            return 'error'
+        if saved:
+            return 'saved'
+        if isinstance(file.parent, Track):
+            return 'matched'
+        return 'unmatched'
+
+    def _write_report(self):
+        """Write the report and return the exit code, 1 if any file failed."""
+        self._remember_sources()
+        entries = []
+        for file in sorted(self._sources, key=self._sources.get):
+            status = self._file_status(file, file in self._saved)
+            entries.append({
+                'source': self._sources[file],
+                'path': file.filename,
+                'status': status,
+                'release_id': file.metadata['musicbrainz_albumid'] or None,
+                'recording_id': file.metadata['musicbrainz_recordingid'] or None,
+                'error': file.error,
+            })
+        report = {
+            'files': entries,
+            'summary': dict(Counter(entry['status'] for entry in entries)),
+            'elapsed': round(time.monotonic() - self._start_time, 3),
+        }
+        if self._plan is not None:
+            report['plan'] = self._plan.export()
+        if self._report == '-':
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+        else:
+            with open(self._report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return 1 if report['summary'].get('error') else 0
+
+
+def main(picard_args, localedir=None):
+    """Runs batch mode, see :func:`picard.launcher.main`."""
+    QtCore.QCoreApplication.setApplicationName(PICARD_APP_NAME)
+    QtCore.QCoreApplication.setOrganizationName(PICARD_ORG_NAME)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    sys.exit(BatchTagger(picard_args, localedir).run())
@@ -35,11 +35,15 @@ from picard.metadata import (
     Metadata,
     SimMatchRelease,
 )
-from picard.similarity import similarity
+from picard.similarity import (
+    normalize,
+    similarity,
+)
 from picard.util import (
     album_artist_from_path,
     find_best_match,
     format_time,
+    thread,
 )
 from picard.util.imagelist import (
     add_metadata_images,
@@ -104,7 +108,8 @@ class Cluster(QtCore.QObject, Item):
                 file.metadata_images_changed.connect(self.update_metadata_images)
         self.files.extend(files)
         self.metadata['totaltracks'] = len(self.files)
-        self.item.add_files(files)
+        if self.item:
+            self.item.add_files(files)
         if self.can_show_coverart:
             add_metadata_images(self, files)
         self._update_related_album(added_files=files)
@@ -116,7 +121,8 @@ class Cluster(QtCore.QObject, Item):
         self.metadata.length -= file.metadata.length
         self.files.remove(file)
         self.metadata['totaltracks'] = len(self.files)
-        self.item.remove_file(file)
+        if self.item:
+            self.item.remove_file(file)
         if not self.special and self.get_num_files() == 0:
             self.tagger.remove_cluster(self)
         if self.can_show_coverart:
@@ -126,7 +132,7 @@ class Cluster(QtCore.QObject, Item):
 
     def update(self):
         if self.item:
-            self.item.update()
+            self.item.schedule_update()
 
     def get_num_files(self):
         return len(self.files)
@@ -216,8 +222,7 @@ class Cluster(QtCore.QObject, Item):
     def _match_to_album(self, releases, threshold=0):
         # multiple matches -- calculate similarities to each of them
         def candidates():
-            for release in releases:
-                yield self.metadata.compare_to_release(release, Cluster.comparison_weights)
+            yield from self.metadata.compare_to_releases(releases, Cluster.comparison_weights)
 
         no_match = SimMatchRelease(similarity=-1, release=None)
         best_match = find_best_match(candidates, no_match)
@@ -247,29 +252,50 @@ class Cluster(QtCore.QObject, Item):
             self.lookup_task = None
 
     @staticmethod
-    def cluster(files, threshold):
+    def snapshot(files):
+        """Return an immutable (filename, album, artist) snapshot of ``files`` for clustering.
+
+        This has to be called on the main thread, the snapshot can then be
+        clustered with :meth:`cluster_snapshot` from any thread.
+        """
         win_compat = config.setting["windows_compatibility"] or IS_WIN
-        artist_dict = ClusterDict()
-        album_dict = ClusterDict()
-        tracks = []
+        snapshot = []
         for file in files:
             artist = file.metadata["albumartist"] or file.metadata["artist"]
             album = file.metadata["album"]
-            # Improve clustering from directory structure if no existing tags
-            # Only used for grouping and to provide cluster title / artist - not added to file tags.
             if win_compat:
                 filename = ntpath.splitdrive(file.filename)[1]
             else:
                 filename = file.filename
+            snapshot.append((filename, album, artist))
+        return tuple(snapshot)
+
+    @staticmethod
+    def cluster_snapshot(snapshot, threshold, cancelled=None):
+        """Cluster a snapshot created by :meth:`snapshot`.
+
+        Yields (album name, artist name, file indexes) tuples, where the
+        indexes refer to positions in the snapshot. If given, ``cancelled``
+        is called while clustering and nothing more is yielded once it
+        returns True.
+        """
+        artist_dict = ClusterDict()
+        album_dict = ClusterDict()
+        tracks = []
+        for filename, album, artist in snapshot:
+            # Improve clustering from directory structure if no existing tags
+            # Only used for grouping and to provide cluster title / artist - not added to file tags.
             album, artist = album_artist_from_path(filename, album, artist)
             # For each track, record the index of the artist and album within the clusters
             tracks.append((artist_dict.add(artist), album_dict.add(album)))
 
         artist_cluster_engine = ClusterEngine(artist_dict)
-        artist_cluster_engine.cluster(threshold)
+        if not artist_cluster_engine.cluster(threshold, cancelled):
+            return
 
         album_cluster_engine = ClusterEngine(album_dict)
-        album_cluster_engine.cluster(threshold)
+        if not album_cluster_engine.cluster(threshold, cancelled):
+            return
 
         # Arrange tracks into albums
         albums = {}
@@ -300,6 +326,11 @@ class Cluster(QtCore.QObject, Item):
             else:
                 artist_name = artist_cluster_engine.get_cluster_title(artist_id)
 
+            yield album_name, artist_name, album
+
+    @staticmethod
+    def cluster(files, threshold):
+        for album_name, artist_name, album in Cluster.cluster_snapshot(Cluster.snapshot(files), threshold):
             yield album_name, artist_name, (files[i] for i in album)
 
     def enable_update_metadata_images(self, enabled):
@@ -381,6 +412,68 @@ class ClusterList(list, Item):
             cluster.lookup_metadata()
 
 
+class ClusterJob(object):
+
+    """Clusters files on a worker thread, delivering the clusters to the main thread in batches.
+
+    The clustering works on a snapshot of the files taken when the job is
+    created. Files removed while the job is running are skipped when the
+    clusters are delivered, and the job is cancelled once all of its files
+    have been removed.
+    """
+
+    batch_size = 50
+
+    def __init__(self, files, threshold, callback, finished=None):
+        self.files = list(files)
+        self.threshold = threshold
+        self.callback = callback
+        self.finished = finished
+        self.snapshot = Cluster.snapshot(self.files)
+        self.removed = set()
+        self.cancelled = False
+
+    def run(self):
+        thread.run_task(self._cluster, self._cluster_finished)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def discard_files(self, files):
+        """Exclude ``files`` from the clusters still to be delivered."""
+        self.removed.update(set(files).intersection(self.files))
+        if len(self.removed) == len(self.files):
+            self.cancel()
+
+    def _cluster(self):
+        batch = []
+        for cluster in Cluster.cluster_snapshot(self.snapshot, self.threshold,
+                                                lambda: self.cancelled):
+            if self.cancelled:
+                return None
+            batch.append(cluster)
+            if len(batch) >= self.batch_size:
+                thread.to_main(self._deliver, batch)
+                batch = []
+        if self.cancelled:
+            return None
+        return batch
+
+    def _cluster_finished(self, result=None, error=None):
+        if result:
+            self._deliver(result)
+        if self.finished:
+            self.finished(self)
+
+    def _deliver(self, batch):
+        for album_name, artist_name, album in batch:
+            if self.cancelled:
+                return
+            files = [self.files[i] for i in album if self.files[i] not in self.removed]
+            if files:
+                self.callback(album_name, artist_name, files)
+
+
 class ClusterDict(object):
 
     def __init__(self):
@@ -437,6 +530,18 @@ class ClusterDict(object):
         return word, count
 
 
+# Tolerance for float rounding in the similarity calculation, so that the
+# length bound never rejects a pair which astrcmp would accept.
+_SIMILARITY_BOUND_SLACK = 1e-6
+
+
+def _similarity_upper_bound(n, m, distance):
+    """Highest similarity of strings of length n <= m with at least ``distance`` edits."""
+    if not m:
+        return 0.0
+    return 1.0 - distance / m
+
+
 class ClusterEngine(object):
 
     def __init__(self, cluster_dict):
@@ -467,20 +572,54 @@ class ClusterEngine(object):
 
         return maxWord
 
-    def cluster(self, threshold):
+    def _candidate_rows(self, threshold):
+        """Yield (id, partner ids) rows of token pairs that may reach ``threshold``.
+
+        Tokens are blocked by the length of their normalized form. The edit
+        distance of two strings is at least the difference of their lengths,
+        so a string of length n can never be more than n / m similar to a
+        string of length m >= n. If not even a single edit fits within the
+        threshold only identical strings are paired. Every pair similar
+        enough to match is still produced exactly once.
+        """
+        limit = threshold - _SIMILARITY_BOUND_SLACK
+        buckets = defaultdict(lambda: defaultdict(list))
+        for i in range(self.cluster_dict.get_size()):
+            token = normalize(self.cluster_dict.get_token(i))
+            buckets[len(token)][token].append(i)
+
+        lengths = sorted(buckets)
+        for pos, n in enumerate(lengths):
+            longer_ids = []
+            for m in lengths[pos + 1:]:
+                if _similarity_upper_bound(n, m, m - n) < limit:
+                    break
+                for ids in buckets[m].values():
+                    longer_ids.extend(ids)
+            if _similarity_upper_bound(n, n, 1) >= limit:
+                groups = [[i for ids in buckets[n].values() for i in ids]]
+            else:
+                groups = list(buckets[n].values())
+            for group in groups:
+                for index, x in enumerate(group):
+                    partners = group[index + 1:] + longer_ids
+                    yield x, partners
+
+    def cluster(self, threshold, cancelled=None):
+        """Cluster the tokens, returns False if ``cancelled()`` returned True."""
 
         # Keep the matches sorted in a heap
         heap = []
 
-        for y in range(self.cluster_dict.get_size()):
-            token_y = self.cluster_dict.get_token(y).lower()
-            for x in range(y):
-                if x != y:
-                    token_x = self.cluster_dict.get_token(x).lower()
-                    c = similarity(token_x, token_y)
-                    if c >= threshold:
-                        heappush(heap, ((1.0 - c), [x, y]))
-            QtCore.QCoreApplication.processEvents()
+        tokens = [self.cluster_dict.get_token(i).lower()
+                  for i in range(self.cluster_dict.get_size())]
+        for x, partners in self._candidate_rows(threshold):
+            if cancelled is not None and cancelled():
+                return False
+            for y in partners:
+                c = similarity(tokens[x], tokens[y])
+                if c >= threshold:
+                    heappush(heap, ((1.0 - c), [min(x, y), max(x, y)]))
 
         for i in range(self.cluster_dict.get_size()):
             word, count = self.cluster_dict.get_word_and_count(i)
@@ -529,6 +668,7 @@ class ClusterEngine(object):
                 for match in self.cluster_bins[match1]:
                     self.index_id_cluster[match] = match0
                 del self.cluster_bins[match1]
+        return True
 
     def can_refresh(self):
         return False
@@ -17,9 +17,12 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+from collections.abc import Mapping
+from contextlib import contextmanager
 from operator import itemgetter
 import os
 import shutil
+import threading
 
 from PyQt5 import QtCore
 
@@ -37,9 +40,45 @@ class ConfigUpgradeError(Exception):
     pass
 
 
+class SettingsSnapshot(Mapping):
+
+    """Read-only option values of a configuration section at one point in time.
+
+    Snapshots are never modified, they can be read from any thread without
+    locking. ``version`` changes whenever a value of the section changes.
+    """
+
+    __slots__ = ('version', '_values')
+
+    def __init__(self, version, values):
+        self.version = version
+        self._values = values
+
+    def __getitem__(self, name):
+        return _copy_value(self._values[name])
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+def _copy_value(value):
+    # Callers may modify the value they get, never hand out the cached object
+    if isinstance(value, (list, dict, set)):
+        return type(value)(value)
+    return value
+
+
 class ConfigSection(LockableObject):
 
-    """Configuration section."""
+    """Configuration section.
+
+    Converted option values are cached in memory. Writes go through to
+    QSettings and replace the cache, so reads never see partial updates
+    and do not need any locking.
+    """
 
     def __init__(self, config, name):
         super().__init__()
@@ -47,6 +86,16 @@ class ConfigSection(LockableObject):
         self.__name = name
         self.__prefix = self.__name + '/'
         self.__prefix_len = len(self.__prefix)
+        self._values = {}
+        self._version = 0
+        self._snapshot = None
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        config._add_section(self)
+
+    @property
+    def prefix(self):
+        return self.__prefix
 
     def key(self, name):
         return self.__prefix + name
@@ -57,10 +106,71 @@ class ConfigSection(LockableObject):
                 yield key[self.__prefix_len:]
 
     def __getitem__(self, name):
+        snapshot = getattr(self._local, 'snapshot', None)
+        values = snapshot._values if snapshot is not None else self._values
+        try:
+            return _copy_value(values[name])
+        except KeyError:
+            pass
         opt = Option.get(self.__name, name)
         if opt is None:
             return None
-        return self.value(name, opt, opt.default)
+        return _copy_value(self._load_value(name, opt))
+
+    def _load_value(self, name, opt):
+        with self._cache_lock:
+            values = self._values
+            version = self._version
+        value = self.value(name, opt, opt.default)
+        with self._cache_lock:
+            # Only keep the value if nothing was written in the meantime
+            if self._version == version:
+                values[name] = value
+        return value
+
+    def invalidate(self, name=None):
+        """Drops the cached value of option ``name``, or all cached values."""
+        with self._cache_lock:
+            if name is None:
+                self._values = {}
+            else:
+                values = dict(self._values)
+                values.pop(name, None)
+                self._values = values
+            self._version += 1
+            self._snapshot = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def snapshot(self):
+        """Returns a :class:`SettingsSnapshot` of all registered options."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._cache_lock:
+            version = self._version
+        values = {}
+        for (section, name), opt in list(Option.registry.items()):
+            if section == self.__name:
+                values[name] = self.value(name, opt, opt.default)
+        snapshot = SettingsSnapshot(version, values)
+        with self._cache_lock:
+            if self._version == version:
+                self._snapshot = snapshot
+                self._values.update(values)
+        return snapshot
+
+    @contextmanager
+    def use_snapshot(self, snapshot):
+        """Reads values from ``snapshot`` in the current thread while active."""
+        previous = getattr(self._local, 'snapshot', None)
+        self._local.snapshot = snapshot
+        try:
+            yield snapshot
+        finally:
+            self._local.snapshot = previous
 
     def __setitem__(self, name, value):
         self.lock_for_write()
@@ -109,6 +219,7 @@ class Config(QtCore.QSettings):
 
     def __init__(self):
         self.__known_keys = set()
+        self.__sections = []
 
     def __initialize(self):
         """Common initializer method for :meth:`from_app` and
@@ -166,13 +277,25 @@ class Config(QtCore.QSettings):
         this.__initialize()
         return this
 
+    def _add_section(self, section):
+        self.__sections.append(section)
+
+    def _invalidate(self, key):
+        for section in self.__sections:
+            if key.startswith(section.prefix):
+                section.invalidate(key[len(section.prefix):])
+            elif section.prefix.startswith(key + '/') or not key:
+                section.invalidate()
+
     def setValue(self, key, value):
         super().setValue(key, value)
         self.__known_keys.add(key)
+        self._invalidate(key)
 
     def remove(self, key):
         super().remove(key)
         self.__known_keys.discard(key)
+        self._invalidate(key)
 
     def contains(self, key):
         # Overwritten due to https://tickets.metabrainz.org/browse/PICARD-1590
@@ -316,6 +439,24 @@ setting = None
 persist = None
 
 
+def settings_snapshot():
+    """Returns a snapshot of the current settings, or None if there is no
+    configuration loaded."""
+    if isinstance(setting, ConfigSection):
+        return setting.snapshot()
+    return None
+
+
+@contextmanager
+def use_settings_snapshot(snapshot):
+    """Makes ``config.setting`` read from ``snapshot`` in the current thread."""
+    if snapshot is None or not isinstance(setting, ConfigSection):
+        yield snapshot
+    else:
+        with setting.use_snapshot(snapshot):
+            yield snapshot
+
+
 def _setup(app, filename=None):
     global config, setting, persist
     if filename is None:
@@ -23,6 +23,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 
+from collections import deque
 from functools import partial
 import traceback
 
@@ -41,16 +42,46 @@ from picard.coverart.providers import (
     cover_art_providers,
 )
 from picard.metadata import register_album_metadata_processor
+from picard.webservice import ratecontrol
+
+
+class _WindowEntry:
+
+    """An image of the download window with the result of its download."""
+
+    __slots__ = ('coverartimage', 'done', 'data', 'error')
+
+    def __init__(self, coverartimage):
+        self.coverartimage = coverartimage
+        self.done = False
+        self.data = None
+        self.error = None
 
 
 class CoverArt:
 
+    """Retrieves the cover art images of an album.
+
+    The images queued by the providers are downloaded through a window:
+    up to ``cover_art_download_window`` downloads are in flight at once,
+    as long as the host has ratecontrol slots left. The results are added
+    to the metadata in queue order, so the images and the "front image
+    found" checks are the same as when downloading one image after the
+    other. Images without types are only downloaded once all images before
+    them are processed, as they are skipped if a front image was found.
+    """
+
     def __init__(self, album, metadata, release):
         self._queue_new()
         self.album = album
         self.metadata = metadata
         self.release = release
         self.front_image_found = False
+        self._window = deque()
+        # Set once the album was finalized or loading it failed, downloads
+        # still in flight are ignored then
+        self._finished = False
+        self._aborted = False
 
     def __repr__(self):
         return "CoverArt for %r" % (self.album)
@@ -89,104 +120,175 @@ class CoverArt:
         except CoverArtImageIOError as e:
             self.album.error_append(e)
             self.album._finalize_loading(error=True)
+            self._aborted = True
             raise e
         except CoverArtImageIdentificationError as e:
             self.album.error_append(e)
 
-    def _coverart_downloaded(self, coverartimage, data, http, error):
-        """Handle finished download, save it to metadata"""
+    def _coverart_downloaded(self, entry, data, http, error):
+        """Handle finished download, the image is added to the metadata
+           once all images queued before it are processed"""
         self.album._requests -= 1
-
+        entry.done = True
         if error:
-            self.album.error_append('Coverart error: %s' % (http.errorString()))
-        elif len(data) < 1000:
+            entry.error = http.errorString()
+        else:
+            entry.data = data
+        if self._aborted:
+            return
+        if self._finished:
+            # Finalizing waited for this download
+            if self.album.id in self.album.tagger.albums:
+                self.album._finalize_loading(None)
+            return
+        self.next_in_queue()
+
+    def _process(self, entry):
+        """Add a finished download to the metadata.
+           Returns False if retrieving cover art has to be aborted."""
+        coverartimage = entry.coverartimage
+        if entry.error is not None:
+            self.album.error_append('Coverart error: %s' % (entry.error))
+        elif entry.data is None:
+            # local file which could not be read
+            pass
+        elif len(entry.data) < 1000 and not self._is_local(coverartimage):
             log.warning("Not enough data, skipping %s" % coverartimage)
         else:
-            self._message(
-                N_("Cover art of type '%(type)s' downloaded for %(albumid)s from %(host)s"),
-                {
-                    'type': coverartimage.types_as_string(),
-                    'albumid': self.album.id,
-                    'host': coverartimage.host
-                },
-                echo=None
-            )
+            if not self._is_local(coverartimage):
+                self._message(
+                    N_("Cover art of type '%(type)s' downloaded for %(albumid)s from %(host)s"),
+                    {
+                        'type': coverartimage.types_as_string(),
+                        'albumid': self.album.id,
+                        'host': coverartimage.host
+                    },
+                    echo=None
+                )
             try:
-                self._set_metadata(coverartimage, data)
+                self._set_metadata(coverartimage, entry.data)
             except CoverArtImageIOError:
                 # It doesn't make sense to store/download more images if we can't
                 # save them in the temporary folder, abort.
-                return
+                return False
+        return True
 
-        self.next_in_queue()
+    def _only_one_front_image(self):
+        return (config.setting["save_images_to_tags"]
+                and not config.setting["save_images_to_files"]
+                and config.setting["embed_only_one_front_image"])
+
+    def _finish(self):
+        self._finished = True
+        self._queue_new()
+        self._window.clear()
+        self.album._finalize_loading(None)
 
     def next_in_queue(self):
-        """Downloads next item in queue.
-           If there are none left, loading of album will be finalized.
+        """Processes the finished downloads in queue order and starts the
+           next ones. If there are none left, loading of album will be
+           finalized.
         """
         if self.album.id not in self.album.tagger.albums:
             # album removed
             return
-
-        if (self.front_image_found
-            and config.setting["save_images_to_tags"]
-            and not config.setting["save_images_to_files"]
-            and config.setting["embed_only_one_front_image"]):
-            # no need to continue
-            self.album._finalize_loading(None)
+        if self._finished or self._aborted:
             return
 
-        if self._queue_empty():
+        while True:
+            if self.front_image_found and self._only_one_front_image():
+                # no need to continue
+                self._finish()
+                return
+
+            if self._window:
+                if not self._window[0].done:
+                    # wait for the download of the first image
+                    self._fill_window()
+                    return
+                if not self._process(self._window.popleft()):
+                    return
+                continue
+
+            if not self._queue_empty():
+                self._fill_window()
+                continue
+
+            # requeue from next provider
             try:
-                # requeue from next provider
                 provider = next(self.providers)
-                ret = CoverArtProvider._STARTED
-                try:
-                    instance = provider.cls(self)
-                    if provider.enabled and instance.enabled():
-                        log.debug("Trying cover art provider %s ..." %
-                                  provider.name)
-                        ret = instance.queue_images()
-                    else:
-                        log.debug("Skipping cover art provider %s ..." %
-                                  provider.name)
-                except BaseException:
-                    log.error(traceback.format_exc())
-                    raise
-                finally:
-                    if ret != CoverArtProvider.WAIT:
-                        self.next_in_queue()
-                    return
             except StopIteration:
                 # nothing more to do
-                self.album._finalize_loading(None)
+                self._finish()
+                return
+            ret = CoverArtProvider._STARTED
+            try:
+                instance = provider.cls(self)
+                if provider.enabled and instance.enabled():
+                    log.debug("Trying cover art provider %s ..." %
+                              provider.name)
+                    ret = instance.queue_images()
+                else:
+                    log.debug("Skipping cover art provider %s ..." %
+                              provider.name)
+            except BaseException:
+                log.error(traceback.format_exc())
+            if ret == CoverArtProvider.WAIT:
                 return
 
-        # We still have some items to try!
-        coverartimage = self._queue_get()
-        if not coverartimage.support_types and self.front_image_found:
-            # we already have one front image, no need to try other type-less
-            # sources
-            log.debug("Skipping %r, one front image is already available",
-                      coverartimage)
-            self.next_in_queue()
-            return
+    def _fill_window(self):
+        """Start downloading queued images while the window has room."""
+        window_size = max(1, config.setting["cover_art_download_window"])
+        only_one_front = self._only_one_front_image()
+        while not self._queue_empty() and len(self._window) < window_size:
+            coverartimage = self.__queue[0]
+            if not coverartimage.support_types:
+                if self._window:
+                    # wait until it is known whether a front image was found
+                    return
+                if self.front_image_found:
+                    # we already have one front image, no need to try other
+                    # type-less sources
+                    log.debug("Skipping %r, one front image is already available",
+                              coverartimage)
+                    self._queue_get()
+                    continue
+            if only_one_front and any(entry.coverartimage.is_front_image()
+                                      for entry in self._window):
+                # the images after a front image are likely not needed
+                return
+            if self._window and not self._is_local(coverartimage):
+                # Queued downloads are only counted by ratecontrol once
+                # they are sent, so the ones of this album are counted here
+                hostkey = (coverartimage.host, coverartimage.port)
+                if self._in_flight(hostkey) >= ratecontrol.available_slots(hostkey):
+                    return
+            entry = _WindowEntry(self._queue_get())
+            self._window.append(entry)
+            self._start(entry)
+
+    def _in_flight(self, hostkey):
+        return sum(1 for entry in self._window
+                   if not entry.done and not self._is_local(entry.coverartimage)
+                   and (entry.coverartimage.host, entry.coverartimage.port) == hostkey)
 
+    @staticmethod
+    def _is_local(coverartimage):
+        return coverartimage.url and coverartimage.url.scheme() == 'file'
+
+    def _start(self, entry):
+        coverartimage = entry.coverartimage
         # local files
-        if coverartimage.url and coverartimage.url.scheme() == 'file':
+        if self._is_local(coverartimage):
+            entry.done = True
             try:
                 path = coverartimage.url.toLocalFile()
                 with open(path, 'rb') as file:
-                    self._set_metadata(coverartimage, file.read())
+                    entry.data = file.read()
             except IOError as ioexcept:
                 (errnum, errmsg) = ioexcept.args
                 log.error("Failed to read %r: %s (%d)" %
                           (path, errmsg, errnum))
-            except CoverArtImageIOError:
-                # It doesn't make sense to store/download more images if we can't
-                # save them in the temporary folder, abort.
-                return
-            self.next_in_queue()
             return
 
         # on the web
@@ -204,7 +306,7 @@ class CoverArt:
             coverartimage.host,
             coverartimage.port,
             coverartimage.path,
-            partial(self._coverart_downloaded, coverartimage),
+            partial(self._coverart_downloaded, entry),
             priority=True,
             important=False
         )
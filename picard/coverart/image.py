@@ -21,21 +21,19 @@
 # You should have received a copy of the GNU General Public License
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
-from hashlib import md5
 import os
-import shutil
-import tempfile
+import weakref
 
-from PyQt5.QtCore import (
-    QMutex,
-    QObject,
-    QUrl,
-)
+from PyQt5.QtCore import QUrl
 
 from picard import (
     config,
     log,
 )
+from picard.coverart.imagestore import (
+    content_hash,
+    image_store,
+)
 from picard.coverart.utils import translate_caa_type
 from picard.metadata import Metadata
 from picard.util import (
@@ -46,30 +44,21 @@ from picard.util import (
 from picard.util.scripttofilename import script_to_filename
 
 
-_datafiles = dict()
-_datafile_mutex = QMutex(QMutex.Recursive)
+class DataHash:
 
+    """Reference to image data held by the image store.
 
-class DataHash:
+    The reference is released when the object is garbage collected or
+    :meth:`delete_file` is called. Identical data is shared between all
+    instances.
+    """
 
-    def __init__(self, data, prefix='picard', suffix=''):
-        self._filename = None
-        _datafile_mutex.lock()
-        try:
-            m = md5()
-            m.update(data)
-            self._hash = m.hexdigest()
-            if self._hash not in _datafiles:
-                (fd, self._filename) = tempfile.mkstemp(prefix=prefix, suffix=suffix)
-                QObject.tagger.register_cleanup(self.delete_file)
-                with os.fdopen(fd, "wb") as imagefile:
-                    imagefile.write(data)
-                _datafiles[self._hash] = self._filename
-                log.debug("Saving image data %s to %r" % (self._hash, self._filename))
-            else:
-                self._filename = _datafiles[self._hash]
-        finally:
-            _datafile_mutex.unlock()
+    def __init__(self, data, suffix='', store=None):
+        self._store = store or image_store
+        self._suffix = suffix
+        self._hash = self._store.acquire(data)
+        self._finalizer = weakref.finalize(self, self._store.release, self._hash)
+        self._finalizer.atexit = False
 
     def __eq__(self, other):
         return self._hash == other._hash
@@ -78,30 +67,86 @@ class DataHash:
         return self._hash
 
     def delete_file(self):
-        if self._filename:
-            try:
-                os.unlink(self._filename)
-            except BaseException:
-                pass
-            else:
-                _datafile_mutex.lock()
-                try:
-                    self._filename = None
-                    del _datafiles[self._hash]
-                    self._hash = None
-                finally:
-                    _datafile_mutex.unlock()
+        if self._finalizer.alive:
+            self._finalizer()
+            self._hash = None
 
     @property
     def data(self):
-        if self._filename:
-            with open(self._filename, "rb") as imagefile:
-                return imagefile.read()
+        if self._finalizer.alive:
+            return self._store.data(self._hash)
+        return None
+
+    def view(self):
+        """Returns a read-only memoryview of the data, without copying it."""
+        if self._finalizer.alive:
+            return self._store.view(self._hash)
         return None
 
     @property
     def filename(self):
-        return self._filename
+        if self._finalizer.alive:
+            return self._store.filename(self._hash, self._suffix)
+        return None
+
+
+class LazyDataHash:
+
+    """Stands in for a DataHash until the image data is needed.
+
+    Only the content hash is known up front. The data is requested from
+    ``reader`` on first access, which must call :meth:`set_data` on the
+    waiting LazyDataHash objects.
+    """
+
+    def __init__(self, key, reader, suffix=''):
+        self._hash = key
+        self._reader = reader
+        self._suffix = suffix
+        self._datahash = None
+        reader.register(self)
+
+    def __eq__(self, other):
+        return self._hash == other._hash
+
+    def __hash__(self):
+        return hash(self._hash)
+
+    def hash(self):
+        return self._hash
+
+    @property
+    def loaded(self):
+        return self._datahash is not None
+
+    def set_data(self, data):
+        self._datahash = DataHash(data, suffix=self._suffix)
+        self._reader = None
+
+    def _load(self):
+        reader = self._reader
+        if self._datahash is None and reader is not None:
+            reader.load(self)
+            # The file is only read once, even if the image was not found
+            self._reader = None
+        if self._datahash is None:
+            raise CoverArtImageIOError("Image data %s is no longer in the file" % self._hash)
+        return self._datahash
+
+    def delete_file(self):
+        if self._datahash is not None:
+            self._datahash.delete_file()
+
+    @property
+    def data(self):
+        return self._load().data
+
+    def view(self):
+        return self._load().view()
+
+    @property
+    def filename(self):
+        return self._load().filename
 
 
 class CoverArtImageError(Exception):
@@ -187,12 +232,12 @@ class CoverArtImage:
     def imageinfo_as_string(self):
         if self.datahash is None:
             return ""
-        return "w=%d h=%d mime=%s ext=%s datalen=%d file=%s" % (self.width,
+        return "w=%d h=%d mime=%s ext=%s datalen=%d hash=%s" % (self.width,
                                                                 self.height,
                                                                 self.mimetype,
                                                                 self.extension,
                                                                 self.datalength,
-                                                                self.tempfile_filename)
+                                                                self.datahash.hash())
 
     def __repr__(self):
         p = []
@@ -238,12 +283,12 @@ class CoverArtImage:
         return hash(self.datahash.hash())
 
     def set_data(self, data):
-        """Store image data in a file, if data already exists in such file
-           it will be re-used and no file write occurs
+        """Store image data in the image store, if the same data is already
+           stored it will be shared
         """
-        if self.datahash:
-            self.datahash.delete_file()
-            self.datahash = None
+        # Other images may share this DataHash, the data is released once
+        # the last of them is gone.
+        self.datahash = None
 
         try:
             (self.width, self.height, self.mimetype, self.extension,
@@ -322,7 +367,8 @@ class CoverArtImage:
                 new_dirname = os.path.dirname(new_filename)
                 if not os.path.isdir(new_dirname):
                     os.makedirs(new_dirname)
-                shutil.copyfile(self.tempfile_filename, new_filename)
+                with open(new_filename, 'wb') as imagefile:
+                    imagefile.write(self.datahash.view())
             except (OSError, IOError) as e:
                 raise CoverArtImageIOError(e)
 
@@ -343,7 +389,7 @@ class CoverArtImage:
 
     @property
     def data(self):
-        """Reads the data from the temporary file created for this image.
+        """Returns the image data from the image store.
         May raise CoverArtImageIOError
         """
         try:
@@ -444,3 +490,33 @@ class LocalFileCoverArtImage(CoverArtImage):
         super().__init__(url=url, types=types, comment=comment)
         self.support_types = support_types
         self.support_multi_types = support_multi_types
+
+
+class LazyTagCoverArtImage(TagCoverArtImage):
+
+    """Image from file tags, whose data is read from the file again when it
+    is first used.
+
+    Only the image header is parsed on creation, the data itself is not
+    kept. Instead of ``data``, the ``image_info`` of an earlier image of
+    the same data can be given, see :meth:`image_info`.
+    """
+
+    def __init__(self, file, reader, data=None, image_info=None, **kwargs):
+        super().__init__(file, **kwargs)
+        if image_info is None:
+            try:
+                (self.width, self.height, self.mimetype, self.extension,
+                 self.datalength) = imageinfo.identify(data)
+            except imageinfo.IdentificationError as e:
+                raise CoverArtImageIdentificationError(e)
+            key = content_hash(data)
+        else:
+            (key, self.width, self.height, self.mimetype, self.extension,
+             self.datalength) = image_info
+        self.datahash = LazyDataHash(key, reader, suffix=self.extension)
+
+    def image_info(self):
+        """Returns what is known about the image without reading its data."""
+        return (self.datahash.hash(), self.width, self.height, self.mimetype,
+                self.extension, self.datalength)
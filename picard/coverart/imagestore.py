@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import mmap
+import os
+import tempfile
+import threading
+import zlib
+
+from PyQt5.QtCore import QObject
+
+from picard import log
+
+
+def content_hash(data):
+    """Returns a non-cryptographic hash of data as a hex string.
+
+    The hash combines CRC-32, Adler-32 and the data length. It is only used
+    to find identical images, collisions are resolved by :class:`ImageStore`.
+    """
+    return '%08x%08x%x' % (zlib.crc32(data), zlib.adler32(data), len(data))
+
+
+class _Blob:
+
+    __slots__ = ('data', 'offset', 'size', 'refcount', 'filename')
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = None
+        self.size = len(data)
+        self.refcount = 0
+        self.filename = None
+
+
+class ImageStore:
+
+    """Reference counted store of image data.
+
+    Identical data is stored only once. Blobs are kept in memory until
+    ``memory_limit`` bytes are used, further blobs are appended to a single
+    temporary pack file which is read through ``mmap``. A blob is dropped as
+    soon as the last reference to it is released. Once the released blobs
+    take more than ``compact_limit`` bytes and half of the pack file, the
+    remaining blobs are copied to a new pack file.
+    """
+
+    def __init__(self, memory_limit=128 * 1024 * 1024, directory=None,
+                 compact_limit=32 * 1024 * 1024):
+        self.memory_limit = memory_limit
+        self.compact_limit = compact_limit
+        self.directory = directory
+        self.memory_used = 0
+        self._blobs = {}
+        self._lock = threading.RLock()
+        self._pack = None
+        self._pack_filename = None
+        self._pack_size = 0
+        self._pack_unused = 0
+        self._map = None
+        self._cleanup_registered = False
+
+    def __len__(self):
+        return len(self._blobs)
+
+    @property
+    def pack_size(self):
+        return self._pack_size
+
+    def acquire(self, data, key=None):
+        """Adds a reference to data and returns its key."""
+        data = bytes(data)
+        base_key = key or content_hash(data)
+        key = base_key
+        with self._lock:
+            collisions = 0
+            while key in self._blobs:
+                blob = self._blobs[key]
+                if blob.size == len(data) and self._view(blob) == data:
+                    break
+                collisions += 1
+                key = '%s-%d' % (base_key, collisions)
+            else:
+                blob = self._blobs[key] = self._add(data)
+            blob.refcount += 1
+        return key
+
+    def release(self, key):
+        """Removes a reference to the blob stored as key."""
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                return
+            blob.refcount -= 1
+            if blob.refcount > 0:
+                return
+            del self._blobs[key]
+            if blob.data is not None:
+                self.memory_used -= blob.size
+            else:
+                self._pack_unused += blob.size
+            if blob.filename:
+                self._unlink(blob.filename)
+            if not self._blobs:
+                self._reset_pack()
+            elif (self._pack_unused > self.compact_limit
+                  and self._pack_unused * 2 > self._pack_size):
+                self._compact()
+
+    def data(self, key):
+        """Returns the data stored as key as bytes."""
+        with self._lock:
+            blob = self._blobs[key]
+            if blob.data is not None:
+                return blob.data
+            return bytes(self._view(blob))
+
+    def view(self, key):
+        """Returns a read-only memoryview of the data stored as key.
+
+        No data is copied, neither for in-memory nor for spilled blobs.
+        """
+        with self._lock:
+            return self._view(self._blobs[key])
+
+    def filename(self, key, suffix=''):
+        """Returns the name of a temporary file containing the data stored as key.
+
+        The file is only written on the first call and removed together with
+        the blob.
+        """
+        with self._lock:
+            blob = self._blobs[key]
+            if blob.filename is None:
+                self._register_cleanup()
+                fd, blob.filename = tempfile.mkstemp(prefix='picard', suffix=suffix,
+                                                     dir=self.directory)
+                with os.fdopen(fd, 'wb') as imagefile:
+                    imagefile.write(self._view(blob))
+                log.debug("Saving image data %s to %r", key, blob.filename)
+            return blob.filename
+
+    def clear(self):
+        """Drops all blobs and removes all temporary files."""
+        with self._lock:
+            for blob in self._blobs.values():
+                if blob.filename:
+                    self._unlink(blob.filename)
+            self._blobs.clear()
+            self.memory_used = 0
+            self._reset_pack()
+            self._cleanup_registered = False
+
+    def _add(self, data):
+        blob = _Blob(data)
+        if self.memory_used + blob.size <= self.memory_limit:
+            self.memory_used += blob.size
+        else:
+            self._spill(blob)
+        return blob
+
+    def _spill(self, blob):
+        if self._pack is None:
+            self._register_cleanup()
+            fd, self._pack_filename = tempfile.mkstemp(prefix='picard', suffix='.pack',
+                                                       dir=self.directory)
+            self._pack = os.fdopen(fd, 'w+b')
+            log.debug("Spilling image data to %r", self._pack_filename)
+        self._pack.seek(self._pack_size)
+        self._pack.write(blob.data)
+        self._pack.flush()
+        blob.offset = self._pack_size
+        blob.data = None
+        self._pack_size += blob.size
+
+    def _view(self, blob):
+        if blob.data is not None:
+            return memoryview(blob.data)
+        if blob.size == 0:
+            return memoryview(b'')
+        if self._map is None or len(self._map) < blob.offset + blob.size:
+            # The previous map is not closed, memoryviews handed out before
+            # may still reference it. It is freed once they are released.
+            self._map = mmap.mmap(self._pack.fileno(), self._pack_size, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[blob.offset:blob.offset + blob.size]
+
+    def _compact(self):
+        spilled = sorted((blob for blob in self._blobs.values() if blob.data is None),
+                         key=lambda blob: blob.offset)
+        if not spilled:
+            self._reset_pack()
+            return
+        fd, filename = tempfile.mkstemp(prefix='picard', suffix='.pack', dir=self.directory)
+        pack = os.fdopen(fd, 'w+b')
+        size = 0
+        for blob in spilled:
+            pack.write(self._view(blob))
+            blob.offset = size
+            size += blob.size
+        pack.flush()
+        log.debug("Compacted image data from %d to %d bytes in %r",
+                  self._pack_size, size, filename)
+        self._reset_pack()
+        self._pack = pack
+        self._pack_filename = filename
+        self._pack_size = size
+
+    def _reset_pack(self):
+        self._map = None
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
+            self._unlink(self._pack_filename)
+            self._pack_filename = None
+        self._pack_size = 0
+        self._pack_unused = 0
+
+    def _register_cleanup(self):
+        if not self._cleanup_registered:
+            QObject.tagger.register_cleanup(self.clear)
+            self._cleanup_registered = True
+
+    @staticmethod
+    def _unlink(filename):
+        try:
+            os.unlink(filename)
+        except OSError as why:
+            log.debug("Could not remove %r: %s", filename, why)
+
+
+image_store = ImageStore()
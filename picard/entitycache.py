@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from collections import namedtuple
+from functools import partial
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from PyQt5 import QtCore
+from PyQt5.QtNetwork import QNetworkRequest
+
+from picard import (
+    config,
+    log,
+)
+from picard.util import thread
+
+
+SCHEMA_VERSION = '2'
+
+# Relationship includes and the target types of the relationships they add
+RELATION_INCLUDES = {
+    'area-rels': 'area',
+    'artist-rels': 'artist',
+    'event-rels': 'event',
+    'instrument-rels': 'instrument',
+    'label-rels': 'label',
+    'place-rels': 'place',
+    'recording-rels': 'recording',
+    'release-group-rels': 'release_group',
+    'release-rels': 'release',
+    'series-rels': 'series',
+    'url-rels': 'url',
+    'work-rels': 'work',
+}
+
+# Includes and the keys they add to the entities of a document
+KEY_INCLUDES = {
+    'aliases': ('aliases',),
+    'annotation': ('annotation',),
+    'genres': ('genres',),
+    'isrcs': ('isrcs',),
+    'ratings': ('rating',),
+    'tags': ('tags',),
+    'user-genres': ('user-genres',),
+    'user-ratings': ('user-rating',),
+    'user-tags': ('user-tags',),
+}
+
+# Includes returning data of the logged in user, their documents are not cached
+USER_INCLUDES = {'user-genres', 'user-ratings', 'user-tags'}
+
+CachedDocument = namedtuple('CachedDocument', 'document fresh inc etag last_modified')
+
+
+def _remove_keys(node, keys):
+    if isinstance(node, dict):
+        for key in keys:
+            node.pop(key, None)
+        for value in node.values():
+            _remove_keys(value, keys)
+    elif isinstance(node, list):
+        for value in node:
+            _remove_keys(value, keys)
+
+
+def _filter_relations(node, target_types):
+    if isinstance(node, dict):
+        relations = node.get('relations')
+        if relations:
+            node['relations'] = [r for r in relations if r.get('target-type') not in target_types]
+        for value in node.values():
+            _filter_relations(value, target_types)
+    elif isinstance(node, list):
+        for value in node:
+            _filter_relations(value, target_types)
+
+
+def _tracks(document):
+    for medium in document.get('media', ()):
+        if 'pregap' in medium:
+            yield medium['pregap']
+        yield from medium.get('tracks', ())
+        yield from medium.get('data-tracks', ())
+
+
+def strip_includes(document, inc):
+    """Removes the data added by the includes ``inc`` from ``document``.
+
+    Used to answer a request from a document fetched with more includes, so
+    the result is the same as if it had been fetched with the requested
+    includes. Only includes which add relationships or plain keys are
+    removed, others like ``recordings`` are kept.
+    """
+    inc = set(inc)
+    if 'recording-level-rels' in inc:
+        for track in _tracks(document):
+            track.get('recording', {}).pop('relations', None)
+    if 'work-level-rels' in inc:
+        recordings = [document] + [track.get('recording', {}) for track in _tracks(document)]
+        for recording in recordings:
+            for relation in recording.get('relations', ()):
+                if 'work' in relation:
+                    relation['work'].pop('relations', None)
+    target_types = {RELATION_INCLUDES[name] for name in inc if name in RELATION_INCLUDES}
+    if target_types:
+        _filter_relations(document, target_types)
+    keys = [key for name in inc for key in KEY_INCLUDES.get(name, ())]
+    if keys:
+        _remove_keys(document, keys)
+    return document
+
+
+class EntityCache(object):
+
+    """Persistent cache of the parsed documents of MusicBrainz entities.
+
+    Documents are stored in an SQLite database and keyed on the server, the
+    entity type, the MBID and the set of includes they were fetched with.
+    Documents fetched with includes of :data:`USER_INCLUDES` depend on the
+    logged in user and are not cached. A request is
+    answered by any document of the entity fetched with a superset of its
+    includes, the additional data is stripped with :func:`strip_includes`.
+
+    Documents older than ``entity_cache_ttl_hours`` are stale, they are
+    revalidated with a conditional request if the server sent validators,
+    and used if the server can not be reached. If the documents exceed
+    ``entity_cache_size_mb`` the least recently used ones are removed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        # Sum of the sizes of the stored documents, kept up to date on
+        # writes so the table is only summed up when connecting
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            row = connection.execute("SELECT value FROM info WHERE key = 'schema'").fetchone()
+            if row is None or row[0] != SCHEMA_VERSION:
+                log.debug("Clearing entity cache %r", self.path)
+                with connection:
+                    connection.execute("DROP TABLE IF EXISTS entities")
+                    connection.execute("INSERT OR REPLACE INTO info VALUES ('schema', ?)",
+                                       (SCHEMA_VERSION,))
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS entities (
+                    server TEXT, entity TEXT, mbid TEXT, inc TEXT, document TEXT,
+                    size INTEGER, fetched REAL, used REAL, etag TEXT, last_modified TEXT,
+                    PRIMARY KEY (server, entity, mbid, inc));
+                CREATE INDEX IF NOT EXISTS entities_used ON entities (used);
+            """)
+            self._total_size = connection.execute("SELECT SUM(size) FROM entities").fetchone()[0] or 0
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def inc_key(inc):
+        return '+'.join(sorted(set(inc)))
+
+    @staticmethod
+    def server():
+        return '%s:%s' % (config.setting["server_host"], config.setting["server_port"])
+
+    @staticmethod
+    def cacheable(inc):
+        return not USER_INCLUDES.intersection(inc)
+
+    def get(self, entity, mbid, inc):
+        """Return a CachedDocument for the entity, or None if there is no entry."""
+        requested = set(inc)
+        server = self.server()
+        try:
+            with self._lock:
+                connection = self._connect()
+                rows = connection.execute(
+                    "SELECT inc, document, fetched, etag, last_modified FROM entities "
+                    "WHERE server = ? AND entity = ? AND mbid = ? ORDER BY fetched DESC",
+                    (server, entity, mbid)).fetchall()
+                for row in rows:
+                    cached_inc = set(row[0].split('+')) if row[0] else set()
+                    if requested <= cached_inc:
+                        break
+                else:
+                    return None
+                with connection:
+                    connection.execute(
+                        "UPDATE entities SET used = ? "
+                        "WHERE server = ? AND entity = ? AND mbid = ? AND inc = ?",
+                        (time.time(), server, entity, mbid, row[0]))
+            document = json.loads(row[1])
+        except (sqlite3.Error, ValueError) as why:
+            log.warning("Could not read %s %s from entity cache: %s", entity, mbid, why)
+            return None
+        extra = cached_inc - requested
+        if extra:
+            strip_includes(document, extra)
+        ttl = config.setting["entity_cache_ttl_hours"] * 3600
+        fresh = time.time() - row[2] < ttl
+        return CachedDocument(document, fresh, row[0], row[3], row[4])
+
+    def put(self, entity, mbid, inc, document, etag=None, last_modified=None):
+        """Store the document of the entity fetched with the includes ``inc``.
+
+        ``document`` is the parsed document or its JSON encoding.
+        """
+        inc = set(inc)
+        if not self.cacheable(inc):
+            return
+        if isinstance(document, str):
+            data = document
+        else:
+            data = json.dumps(document)
+        now = time.time()
+        server = self.server()
+        try:
+            with self._lock:
+                connection = self._connect()
+                total_size = self._total_size
+                with connection:
+                    # Documents with fewer includes are no longer needed
+                    for cached_inc, size in connection.execute(
+                            "SELECT inc, size FROM entities WHERE server = ? AND entity = ? AND mbid = ?",
+                            (server, entity, mbid)).fetchall():
+                        if set(cached_inc.split('+') if cached_inc else ()) <= inc:
+                            connection.execute(
+                                "DELETE FROM entities "
+                                "WHERE server = ? AND entity = ? AND mbid = ? AND inc = ?",
+                                (server, entity, mbid, cached_inc))
+                            total_size -= size
+                    connection.execute(
+                        "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (server, entity, mbid, self.inc_key(inc), data, len(data), now, now,
+                         etag, last_modified))
+                    total_size = self._evict(connection, total_size + len(data))
+                self._total_size = total_size
+        except sqlite3.Error as why:
+            log.warning("Could not write %s %s to entity cache: %s", entity, mbid, why)
+
+    def revalidated(self, entity, mbid, inc_key):
+        """Mark a stale entry as fresh after the server confirmed it."""
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.execute(
+                        "UPDATE entities SET fetched = ? "
+                        "WHERE server = ? AND entity = ? AND mbid = ? AND inc = ?",
+                        (time.time(), self.server(), entity, mbid, inc_key))
+        except sqlite3.Error as why:
+            log.warning("Could not update %s %s in entity cache: %s", entity, mbid, why)
+
+    def _evict(self, connection, total):
+        """Remove the least recently used documents while they exceed the size limit.
+
+        ``total`` is the size of the stored documents, the size after
+        removing documents is returned.
+        """
+        max_size = config.setting["entity_cache_size_mb"] * 1024 * 1024
+        if total <= max_size:
+            return total
+        for server, entity, mbid, inc, size in connection.execute(
+                "SELECT server, entity, mbid, inc, size FROM entities ORDER BY used").fetchall():
+            connection.execute(
+                "DELETE FROM entities WHERE server = ? AND entity = ? AND mbid = ? AND inc = ?",
+                (server, entity, mbid, inc))
+            total -= size
+            if total <= max_size:
+                break
+        return total
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM entities")
+            self._total_size = 0
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def request(self, entity, mbid, inc, handler, request, refresh=False):
+        """Load the document of an entity from the cache or the network.
+
+        ``request`` is called with a handler and the keyword argument
+        ``headers`` to fetch the document, e.g. a partial of
+        ``MBAPIHelper.get_release_by_id``. ``handler`` is called like a web
+        service handler, with None as reply for documents from the cache.
+        Returns an :class:`EntityRequest`.
+        """
+        return EntityRequest(self, entity, mbid, inc, handler, request, refresh).start()
+
+
+class EntityRequest(object):
+
+    """A document being loaded by :meth:`EntityCache.request`."""
+
+    def __init__(self, cache, entity, mbid, inc, handler, request, refresh=False):
+        self.cache = cache
+        self.entity = entity
+        self.mbid = mbid
+        self.inc = list(inc)
+        self.handler = handler
+        self.request = request
+        self.refresh = refresh
+        self.task = None
+        self.cancelled = False
+        self._stale = None
+
+    def start(self):
+        if (self.refresh or not config.setting["use_entity_cache"]
+                or not self.cache.cacheable(self.inc)):
+            self._fetch()
+        else:
+            thread.run_task(partial(self.cache.get, self.entity, self.mbid, self.inc),
+                            self._cache_checked)
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+        if self.task is not None:
+            QtCore.QObject.tagger.webservice.remove_task(self.task)
+            self.task = None
+
+    def _cache_checked(self, result=None, error=None):
+        if self.cancelled:
+            return
+        if result is not None and result.fresh:
+            log.debug("Using cached %s %s", self.entity, self.mbid)
+            self.handler(result.document, None, 0)
+            return
+        headers = None
+        if result is not None:
+            self._stale = result
+            headers = {}
+            if result.etag:
+                headers['If-None-Match'] = result.etag
+            if result.last_modified:
+                headers['If-Modified-Since'] = result.last_modified
+        self._fetch(headers or None)
+
+    def _fetch(self, headers=None):
+        self.task = self.request(self._received, headers=headers)
+
+    def _received(self, document, http, error):
+        self.task = None
+        if self.cancelled:
+            return
+        stale = self._stale
+        if stale is not None:
+            status = http.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+            # Checked first, the empty body of a 304 reply is not a document
+            if status == 304:
+                log.debug("Cached %s %s not modified", self.entity, self.mbid)
+                thread.run_task(partial(self.cache.revalidated, self.entity, self.mbid, stale.inc),
+                                self._cache_updated)
+                self.handler(stale.document, http, 0)
+                return
+            if error and status != 404:
+                log.warning("Using stale cached %s %s", self.entity, self.mbid)
+                self.handler(stale.document, http, 0)
+                return
+        if not error and isinstance(document, dict) and self.cache.cacheable(self.inc):
+            etag = bytes(http.rawHeader(b'ETag')).decode('latin-1') or None
+            last_modified = bytes(http.rawHeader(b'Last-Modified')).decode('latin-1') or None
+            # The handler may change the document, the cache stores a
+            # copy encoded before it runs
+            data = json.dumps(document)
+            thread.run_task(partial(self.cache.put, self.entity, self.mbid, self.inc,
+                                    data, etag, last_modified),
+                            self._cache_updated)
+        self.handler(document, http, error)
+
+    def _cache_updated(self, result=None, error=None):
+        pass
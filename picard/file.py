@@ -21,11 +21,16 @@
 from collections import defaultdict
 import fnmatch
 from functools import partial
+import inspect
 import os
 import os.path
 import re
 import shutil
+import threading
 import unicodedata
+import weakref
+
+from mutagen import MutagenError
 
 from PyQt5 import QtCore
 
@@ -39,6 +44,11 @@ from picard.const.sys import (
     IS_MACOS,
     IS_WIN,
 )
+from picard.coverart.image import (
+    LazyTagCoverArtImage,
+    TagCoverArtImage,
+)
+from picard.coverart.imagestore import content_hash
 from picard.metadata import (
     Metadata,
     SimMatchTrack,
@@ -64,11 +74,61 @@ from picard.util.tags import PRESERVED_TAGS
 from picard.ui.item import Item
 
 
+class EmbeddedImageReader:
+
+    """Reads the images embedded in a file for its LazyTagCoverArtImage objects.
+
+    Only the image tags of the file are parsed again, with the
+    ``_embedded_image_data`` class method of the format, on the first access
+    to any of the images. All images still waiting for their data get it at
+    once.
+    """
+
+    def __init__(self, file_class, filename):
+        self.file_class = file_class
+        self.filename = filename
+        # LazyDataHash objects compare by content hash, so they are
+        # tracked by identity with weak references
+        self._waiting = []
+        self._lock = threading.Lock()
+
+    def register(self, datahash):
+        with self._lock:
+            self._waiting.append(weakref.ref(datahash))
+
+    def moved(self, filename):
+        """Reads the images from ``filename`` after the file was moved."""
+        with self._lock:
+            self.filename = filename
+
+    def load(self, datahash):
+        with self._lock:
+            if datahash.loaded:
+                return
+            log.debug("Reading embedded images from %r", self.filename)
+            try:
+                images = self.file_class._embedded_image_data(self.filename)
+            except (OSError, MutagenError) as why:
+                log.error("Could not read embedded images from %r: %s", self.filename, why)
+                return
+            data = {content_hash(image): image for image in images}
+            waiting, self._waiting = self._waiting, []
+            # Images no longer in the file, e.g. after it was changed, stay
+            # without data, see LazyDataHash._load()
+            for ref in waiting:
+                lazy_datahash = ref()
+                if lazy_datahash is not None and lazy_datahash.hash() in data:
+                    lazy_datahash.set_data(data[lazy_datahash.hash()])
+
+
 class File(QtCore.QObject, Item):
 
     metadata_images_changed = QtCore.pyqtSignal()
 
     NAME = None
+    # (offset, bytes) pairs identifying the format in the file header, used
+    # by picard.formats.guess_format()
+    MAGIC = []
 
     UNDEFINED = -1
     PENDING = 0
@@ -118,6 +178,7 @@ class File(QtCore.QObject, Item):
 
         self.lookup_task = None
         self.item = None
+        self._image_reader = None
 
     def __repr__(self):
         return '<%s %r>' % (type(self).__name__, self.base_filename)
@@ -132,7 +193,7 @@ class File(QtCore.QObject, Item):
             partial(self._loading_finished, callback),
             priority=1)
 
-    def _load_check(self, filename):
+    def _load_check(self, filename, fileobj=None):
         # Check that file has not been removed since thread was queued
         # Don't load if we are stopping.
         if self.state != File.PENDING:
@@ -141,15 +202,116 @@ class File(QtCore.QObject, Item):
         if self.tagger.stopping:
             log.debug("File not loaded because %s is stopping: %r", PICARD_APP_NAME, self.filename)
             return None
+        if config.setting["use_metadata_cache"]:
+            return self._load_cached(filename, fileobj)
+        return self._load_from(filename, fileobj)
+
+    def _load_cached(self, filename, fileobj=None):
+        """Load metadata from the persistent metadata cache, falling back to the file."""
+        cache = self.tagger.metadata_cache
+        file_format = type(self).__name__
+        metadata = cache.get(filename, file_format, lazy_image=self._lazy_tag_image)
+        if metadata is not None:
+            log.debug("Metadata of %r loaded from cache", filename)
+            return metadata
+        metadata = self._load_from(filename, fileobj)
+        cache.put(filename, file_format, metadata)
+        return metadata
+
+    def _load_from(self, filename, fileobj=None):
+        # Formats of plugins may only load from the file name
+        if fileobj is not None and self._supports_fileobj():
+            return self._load(filename, fileobj)
         return self._load(filename)
 
-    def _load(self, filename):
-        """Load metadata from the file."""
+    def _load(self, filename, fileobj=None):
+        """Load metadata from the file.
+
+        ``fileobj`` is the file opened for reading at its start, if the
+        caller already opened it.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def _supports_fileobj(cls):
+        return 'fileobj' in inspect.signature(cls._load).parameters
+
+    @classmethod
+    def _embedded_image_data(cls, filename):
+        """Returns the data of the images embedded in the file.
+
+        Only the image tags are parsed and no File is created, this is used
+        to read the data of lazily loaded images. Formats which do not
+        implement it keep the data of their images, see :meth:`_tag_image`.
+        """
         raise NotImplementedError
 
+    @classmethod
+    def _supports_lazy_images(cls):
+        return cls._embedded_image_data.__func__ is not File._embedded_image_data.__func__
+
+    def _tag_image(self, filename, data, **kwargs):
+        """Returns a TagCoverArtImage for image data embedded in the file.
+
+        If lazy_embedded_images is enabled, the image data is not kept but
+        read from the file again when it is needed.
+        """
+        if config.setting["lazy_embedded_images"] and self._supports_lazy_images():
+            return self._lazy_tag_image(filename, data=data, **kwargs)
+        return TagCoverArtImage(file=filename, data=data, **kwargs)
+
+    def _lazy_tag_image(self, filename, **kwargs):
+        """Returns a LazyTagCoverArtImage for an image embedded in the file.
+
+        The image is made from its ``data`` or, e.g. for images from the
+        metadata cache, from its ``image_info``.
+        """
+        reader = self._image_reader
+        if reader is None or reader.filename != filename:
+            reader = self._image_reader = EmbeddedImageReader(type(self), filename)
+        return LazyTagCoverArtImage(filename, reader, **kwargs)
+
+    def _lazy_images_moved(self, old_filename, new_filename, metadata):
+        """Points the lazily loaded images to the file after it was moved."""
+        reader = self._image_reader
+        if reader is None or reader.filename != old_filename:
+            return
+        reader.moved(new_filename)
+        for images in (self.orig_metadata.images, self.metadata.images, metadata.images):
+            for image in images:
+                if isinstance(image, LazyTagCoverArtImage) and image.sourcefile == old_filename:
+                    image.sourcefile = new_filename
+
+    def _images_to_save(self, metadata):
+        """Returns the images of ``metadata`` to write to the tags.
+
+        If these are exactly the lazily loaded images of the file, an empty
+        list is returned and the formats keep the existing image tags. The
+        original bytes are written back as they are and never read into
+        memory.
+        """
+        images = list(metadata.images.to_be_saved_to_tags())
+        original = list(self.orig_metadata.images)
+        if (images and not config.setting["clear_existing_tags"]
+                and len(images) == len(original)
+                and all(image is orig and isinstance(image, LazyTagCoverArtImage)
+                        for image, orig in zip(images, original))):
+            log.debug("Keeping embedded images of %r", self.filename)
+            return []
+        return images
+
     def _loading_finished(self, callback, result=None, error=None):
+        if self._set_loaded(result, error):
+            self.update()
+            callback(self)
+
+    def _set_loaded(self, result=None, error=None):
+        """Apply the result of loading the file.
+
+        Returns True if the file is still in use and can be passed on.
+        """
         if self.state != File.PENDING or self.tagger.stopping:
-            return
+            return False
         if error is not None:
             self.error = str(error)
             self.state = self.ERROR
@@ -158,14 +320,13 @@ class File(QtCore.QObject, Item):
             if file_extension not in supported_extensions():
                 self.remove()
                 log.error('Unsupported media file %r wrongly loaded. Removing ...', self)
-                return
+                return False
         else:
             self.error = None
             self.state = self.NORMAL
             self._copy_loaded_metadata(result)
         run_file_post_load_processors(self)
-        self.update()
-        callback(self)
+        return True
 
     def _copy_loaded_metadata(self, metadata):
         filename, _ = os.path.splitext(self.base_filename)
@@ -217,11 +378,7 @@ class File(QtCore.QObject, Item):
         self.set_pending()
         metadata = Metadata()
         metadata.copy(self.metadata)
-        thread.run_task(
-            partial(self._save_and_rename, self.filename, metadata),
-            self._saving_finished,
-            priority=2,
-            thread_pool=self.tagger.save_thread_pool)
+        self.tagger.file_saver.save(self, metadata)
 
     def _preserve_times(self, filename, func):
         """Save filename times before calling func, and set them again"""
@@ -245,6 +402,20 @@ class File(QtCore.QObject, Item):
 
     def _save_and_rename(self, old_filename, metadata):
         """Save the metadata."""
+        new_filename = self._save_metadata(old_filename, metadata)
+        if new_filename is None:
+            return None
+        new_filename = self._finish_save(old_filename, new_filename, metadata)
+        if config.setting["delete_empty_dirs"]:
+            self._delete_empty_dirs(os.path.dirname(old_filename))
+        return new_filename
+
+    def _save_metadata(self, old_filename, metadata):
+        """Write the tags and return the file name the file should be moved to.
+
+        Returns None if the file was not saved. Only the file itself is
+        written, see :meth:`_finish_save` for the changes to its directory.
+        """
         # Check that file has not been removed since thread was queued
         # Also don't save if we are stopping.
         if self.state == File.REMOVED:
@@ -263,32 +434,49 @@ class File(QtCore.QObject, Item):
                     log.warning(why)
             else:
                 save()
+        if config.setting["rename_files"] or config.setting["move_files"]:
+            new_filename = self.make_filename(old_filename, metadata)
+        return new_filename
+
+    def _finish_save(self, old_filename, new_filename, metadata, additional_files=None):
+        """Move the file to ``new_filename`` and update the directories.
+
+        Moves additional files and saves the cover art images, the empty
+        directories left behind are deleted by the caller with
+        :meth:`_delete_empty_dirs`. ``additional_files`` are the moves of
+        additional files planned by a :class:`~picard.renameplan.RenamePlan`,
+        if None the source directory is scanned for them. Returns the file
+        name the file was moved to.
+        """
         # Rename files
         if config.setting["rename_files"] or config.setting["move_files"]:
-            new_filename = self._rename(old_filename, metadata)
+            new_filename = self._rename_to(old_filename, new_filename)
+            if new_filename != old_filename:
+                self._lazy_images_moved(old_filename, new_filename, metadata)
         # Move extra files (images, playlists, etc.)
         if config.setting["move_files"] and config.setting["move_additional_files"]:
-            self._move_additional_files(old_filename, new_filename)
-        # Delete empty directories
-        if config.setting["delete_empty_dirs"]:
-            dirname = os.path.dirname(old_filename)
-            try:
-                emptydir.rm_empty_dir(dirname)
-                head, tail = os.path.split(dirname)
-                if not tail:
-                    head, tail = os.path.split(head)
-                while head and tail:
-                    emptydir.rm_empty_dir(head)
-                    head, tail = os.path.split(head)
-            except OSError as why:
-                log.warning("Error removing directory: %s", why)
-            except emptydir.SkipRemoveDir as why:
-                log.debug("Not removing empty directory: %s", why)
+            self._move_additional_files(old_filename, new_filename, additional_files)
         # Save cover art images
         if config.setting["save_images_to_files"]:
             self._save_images(os.path.dirname(new_filename), metadata)
         return new_filename
 
+    @staticmethod
+    def _delete_empty_dirs(dirname):
+        """Delete ``dirname`` and its parent directories while they are empty."""
+        try:
+            emptydir.rm_empty_dir(dirname)
+            head, tail = os.path.split(dirname)
+            if not tail:
+                head, tail = os.path.split(head)
+            while head and tail:
+                emptydir.rm_empty_dir(head)
+                head, tail = os.path.split(head)
+        except OSError as why:
+            log.warning("Error removing directory: %s", why)
+        except emptydir.SkipRemoveDir as why:
+            log.debug("Not removing empty directory: %s", why)
+
     def _saving_finished(self, result=None, error=None):
         # Handle file removed before save
         # Result is None if save was skipped
@@ -420,8 +608,10 @@ class File(QtCore.QObject, Item):
             return new_path
 
     def _rename(self, old_filename, metadata):
-        new_filename, ext = os.path.splitext(
-            self.make_filename(old_filename, metadata))
+        return self._rename_to(old_filename, self.make_filename(old_filename, metadata))
+
+    def _rename_to(self, old_filename, new_filename):
+        new_filename, ext = os.path.splitext(new_filename)
 
         if old_filename == new_filename + ext:
             return old_filename
@@ -453,14 +643,13 @@ class File(QtCore.QObject, Item):
         for image in images:
             image.save(dirname, metadata, counters)
 
-    def _move_additional_files(self, old_filename, new_filename):
-        """Move extra files, like images, playlists..."""
-        new_path = os.path.dirname(new_filename)
-        old_path = os.path.dirname(old_filename)
-        if new_path == old_path:
-            # skip, same directory, nothing to move
-            return
-        patterns = config.setting["move_additional_files_pattern"]
+    @staticmethod
+    def additional_files_regexes(patterns):
+        """Returns the regular expressions matching the additional files.
+
+        ``patterns`` is a whitespace separated list of shell patterns.
+        Returns a set of (regex, match_hidden) tuples.
+        """
         pattern_regexes = set()
         for pattern in patterns.split():
             pattern = pattern.strip()
@@ -469,35 +658,60 @@ class File(QtCore.QObject, Item):
             pattern_regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
             match_hidden = pattern.startswith('.')
             pattern_regexes.add((pattern_regex, match_hidden))
+        return pattern_regexes
+
+    @staticmethod
+    def find_additional_files(path, pattern_regexes):
+        """Returns the paths of the files in ``path`` matching ``pattern_regexes``."""
+        paths = []
+        for entry in os.scandir(path):
+            is_hidden = entry.name.startswith('.')
+            for pattern_regex, match_hidden in pattern_regexes:
+                if is_hidden and not match_hidden:
+                    continue
+                if pattern_regex.match(entry.name):
+                    paths.append(entry.path)
+                    break  # we are done with this file
+        return paths
+
+    def _move_additional_files(self, old_filename, new_filename, moves=None):
+        """Move extra files, like images, playlists...
+
+        ``moves`` is a list of (old path, new path) tuples, if it is None
+        the source directory is scanned for the files to move.
+        """
+        if moves is None:
+            moves = self._additional_files_moves(old_filename, new_filename)
+        for old_file_path, new_file_path in moves:
+            log.debug("Moving %r to %r", old_file_path, new_file_path)
+            try:
+                shutil.move(old_file_path, new_file_path)
+            except OSError as why:
+                log.error("Failed to move %r to %r: %s", old_file_path,
+                          new_file_path, why)
+
+    def _additional_files_moves(self, old_filename, new_filename):
+        new_path = os.path.dirname(new_filename)
+        old_path = os.path.dirname(old_filename)
+        if new_path == old_path:
+            # skip, same directory, nothing to move
+            return []
+        pattern_regexes = self.additional_files_regexes(config.setting["move_additional_files_pattern"])
         if not pattern_regexes:
-            return
-        moves = set()
+            return []
         try:
-            # TODO: use with statement with python 3.6+
-            for entry in os.scandir(old_path):
-                is_hidden = entry.name.startswith('.')
-                for pattern_regex, match_hidden in pattern_regexes:
-                    if is_hidden and not match_hidden:
-                        continue
-                    if pattern_regex.match(entry.name):
-                        new_file_path = os.path.join(new_path, entry.name)
-                        moves.add((entry.path, new_file_path))
-                        break  # we are done with this file
+            paths = self.find_additional_files(old_path, pattern_regexes)
         except OSError as why:
             log.error("Failed to scan %r: %s", old_path, why)
-            return
-
-        for old_file_path, new_file_path in moves:
+            return []
+        moves = []
+        for old_file_path in paths:
             # FIXME we shouldn't do this from a thread!
             if self.tagger.files.get(decode_filename(old_file_path)):
                 log.debug("File loaded in the tagger, not moving %r", old_file_path)
                 continue
-            log.debug("Moving %r to %r", old_file_path, new_file_path)
-            try:
-                shutil.move(old_file_path, new_file_path)
-            except OSError as why:
-                log.error("Failed to move %r to %r: %s", old_file_path,
-                          new_file_path, why)
+            moves.append((old_file_path, os.path.join(new_path, os.path.basename(old_file_path))))
+        return moves
 
     def remove(self, from_parent=True):
         if from_parent and self.parent:
@@ -694,8 +908,7 @@ class File(QtCore.QObject, Item):
     def _match_to_track(self, tracks, threshold=0):
         # multiple matches -- calculate similarities to each of them
         def candidates():
-            for track in tracks:
-                yield self.metadata.compare_to_track(track, self.comparison_weights)
+            yield from self.metadata.compare_to_tracks(tracks, self.comparison_weights)
 
         no_match = SimMatchTrack(similarity=-1, releasegroup=None, release=None, track=None)
         best_match = find_best_match(candidates, no_match)
@@ -753,7 +966,7 @@ class File(QtCore.QObject, Item):
 
     def update_item(self):
         if self.item:
-            self.item.update()
+            self.item.schedule_update()
 
     def iterfiles(self, save=False):
         yield self
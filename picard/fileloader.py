@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from collections import (
+    OrderedDict,
+    deque,
+)
+import threading
+import traceback
+
+from PyQt5 import QtCore
+
+from picard import (
+    config,
+    log,
+)
+from picard.formats import get_format
+from picard.util import thread
+
+
+class _OtherFormat:
+
+    """Result of a file whose header belongs to another format."""
+
+    __slots__ = ('file_format', 'settings')
+
+    def __init__(self, file_format, settings):
+        self.file_format = file_format
+        self.settings = settings
+
+
+class _LoadRunnable(QtCore.QRunnable):
+
+    def __init__(self, loader, file, callback, settings):
+        super().__init__()
+        self.loader = loader
+        self.file = file
+        self.callback = callback
+        self.settings = settings
+
+    def run(self):
+        result = error = None
+        try:
+            with config.use_settings_snapshot(self.settings):
+                result = self._load()
+        except BaseException as e:
+            log.error(traceback.format_exc())
+            error = e
+        self.loader._add_result(self.file, self.callback, result, error)
+
+    def _load(self):
+        file = self.file
+        filename = file.filename
+        if file.state != file.PENDING:
+            # Removed meanwhile, the file may not exist anymore
+            return file._load_check(filename)
+        # The format is sniffed from the file opened for loading it, so the
+        # file is opened once and no handle is kept while it is queued
+        with open(filename, 'rb') as fileobj:
+            file_format = get_format(filename, fileobj)
+            if isinstance(file_format, type) and not isinstance(file, file_format):
+                return _OtherFormat(file_format, self.settings)
+            return file._load_check(filename, fileobj)
+
+
+class FileLoader(QtCore.QObject):
+
+    """Loads files on a dedicated thread pool.
+
+    Files are parsed by up to ``thread_count`` workers. At most
+    ``max_pending`` files are handed to the workers at once, further files
+    wait in a queue until earlier ones are done. Loaded files are passed to
+    the main thread in batches, so the callback given to :meth:`load` is
+    called with a list of files instead of once per file.
+
+    The File objects are usually created with the format registered for
+    their extension. The workers check the format against the file header
+    before loading the file from the same open file. If the header belongs
+    to another format, the class of the File is changed on the main thread
+    and the file is loaded again.
+    """
+
+    pending_per_thread = 16
+
+    def __init__(self, thread_count=0, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QtCore.QThreadPool(self)
+        self._queue = deque()
+        self._in_flight = 0
+        self._results = []
+        self._results_lock = threading.Lock()
+        self._flush_scheduled = False
+        self.set_thread_count(thread_count)
+
+    def set_thread_count(self, thread_count):
+        """Set the number of worker threads, 0 uses the number of CPU cores."""
+        if thread_count <= 0:
+            thread_count = QtCore.QThread.idealThreadCount()
+        self.thread_pool.setMaxThreadCount(max(1, thread_count))
+        self._fill()
+
+    @property
+    def max_pending(self):
+        return self.thread_pool.maxThreadCount() * self.pending_per_thread
+
+    @property
+    def pending_count(self):
+        """Number of files queued or being loaded."""
+        return len(self._queue) + self._in_flight
+
+    def load(self, files, callback):
+        """Load ``files``, calling ``callback`` with lists of loaded files."""
+        settings = config.settings_snapshot()
+        for file in files:
+            self._queue.append((file, callback, settings))
+        self._fill()
+
+    def wait_for_done(self):
+        self._queue.clear()
+        self.thread_pool.waitForDone()
+
+    def _fill(self):
+        while self._queue and self._in_flight < self.max_pending:
+            file, callback, settings = self._queue.popleft()
+            self._in_flight += 1
+            self.thread_pool.start(_LoadRunnable(self, file, callback, settings))
+
+    def _reload(self, file, callback, other_format):
+        file_format = other_format.file_format
+        log.debug("Loading %r as %s file", file.filename, file_format.NAME)
+        file.__class__ = file_format
+        self._queue.appendleft((file, callback, other_format.settings))
+        self._fill()
+
+    def _add_result(self, file, callback, result, error):
+        # Called from the worker threads. Only one flush event is posted
+        # until the main thread picks up the results collected so far.
+        with self._results_lock:
+            self._results.append((file, callback, result, error))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        thread.to_main(self._flush)
+
+    def _flush(self):
+        with self._results_lock:
+            results = self._results
+            self._results = []
+            self._flush_scheduled = False
+        self._in_flight -= len(results)
+        self._fill()
+
+        batches = OrderedDict()
+        for file, callback, result, error in results:
+            if isinstance(result, _OtherFormat):
+                self._reload(file, callback, result)
+            elif file._set_loaded(result, error):
+                batches.setdefault(callback, []).append(file)
+        for callback, files in batches.items():
+            callback(files)
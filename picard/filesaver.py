@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from collections import deque
+from functools import partial
+import os.path
+import threading
+import traceback
+
+from PyQt5 import QtCore
+
+from picard import (
+    config,
+    log,
+)
+from picard.file import File
+from picard.renameplan import RenamePlan
+from picard.util import thread
+
+
+class _SaveTask:
+
+    __slots__ = ('file', 'metadata', 'old_filename', 'new_filename', 'settings',
+                 'additional_files', 'keys', 'planned', 'started')
+
+    def __init__(self, file, metadata, settings):
+        self.file = file
+        self.metadata = metadata
+        self.old_filename = file.filename
+        self.new_filename = None
+        self.settings = settings
+        self.additional_files = None
+        self.keys = ()
+        self.planned = False
+        self.started = False
+
+
+class _CleanupTask:
+
+    __slots__ = ('dirnames', 'settings')
+
+    file = None
+
+    def __init__(self, dirnames, settings):
+        self.dirnames = dirnames
+        self.settings = settings
+
+
+class _SaveRunnable(QtCore.QRunnable):
+
+    def __init__(self, saver, task, func):
+        super().__init__()
+        self.saver = saver
+        self.task = task
+        self.func = func
+
+    def run(self):
+        result = error = None
+        try:
+            with config.use_settings_snapshot(self.task.settings):
+                result = self.func()
+        except BaseException as e:
+            log.error(traceback.format_exc())
+            error = e
+        self.saver._add_result(self.task, result, error)
+
+
+class FileSaver(QtCore.QObject):
+
+    """Saves files on a dedicated thread pool.
+
+    Saving a file has two steps. First the tags are written and the target
+    file name is determined, this runs in parallel for all files. Then the
+    file is moved, additional files are moved and the cover art images are
+    saved. This second step changes the source and target directories, so it
+    is ordered by conflict keys: a file starts it only after all files saved
+    before it with a common source or target directory are done. Files moved
+    to the same directory thus get the same names as when saving them one
+    after the other, while files in different directories are handled in
+    parallel.
+
+    Deleting the empty source directories walks up the parent directories,
+    which may be the source or target directories of any other file. It is
+    done as a separate step once no second step is running or waiting,
+    for all directories left by the files moved until then. Files whose
+    tags are written meanwhile wait for it before their second step.
+
+    Before the second step the target names are resolved by a
+    :class:`~picard.renameplan.RenamePlan` shared by all files saved until
+    the saver is idle again, so collisions are avoided in memory and each
+    source directory is scanned once for additional files.
+
+    A file saved again while it is still being saved is only saved once the
+    first save finished, with its new file name. If it is saved several
+    times meanwhile, only the last metadata is saved.
+
+    Results are passed to the main thread in batches, which also update the
+    progress shown in the status bar.
+    """
+
+    def __init__(self, thread_count=0, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.pending_count = 0
+        self._planning = deque()
+        self._key_queues = {}
+        self._plan = None
+        # Source directories to delete if empty, in the order the files
+        # were moved out of them
+        self._empty_dirs = {}
+        self._cleanup = None
+        # Files being saved and the metadata and settings of the next save
+        # of these files
+        self._saving = set()
+        self._deferred = {}
+        self._results = []
+        self._results_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._saved_count = 0
+        self._error_count = 0
+        self.set_thread_count(thread_count)
+
+    def set_thread_count(self, thread_count):
+        """Set the number of worker threads, 0 uses the number of CPU cores."""
+        if thread_count <= 0:
+            thread_count = QtCore.QThread.idealThreadCount()
+        self.thread_pool.setMaxThreadCount(max(1, thread_count))
+
+    def save(self, file, metadata):
+        """Save ``metadata`` to ``file``, File._saving_finished is called when done."""
+        settings = config.settings_snapshot()
+        if file in self._saving:
+            if file not in self._deferred:
+                self.pending_count += 1
+            self._deferred[file] = (metadata, settings)
+            return
+        self.pending_count += 1
+        self._submit(file, metadata, settings)
+
+    def _submit(self, file, metadata, settings):
+        task = _SaveTask(file, metadata, settings)
+        self._saving.add(file)
+        self._planning.append(task)
+        self._start(task, partial(file._save_metadata, task.old_filename, metadata))
+
+    def wait_for_done(self):
+        # Files waiting for their conflict keys are not started anymore
+        self._planning.clear()
+        self._key_queues.clear()
+        self._deferred.clear()
+        self._plan = None
+        self.thread_pool.waitForDone()
+        # The files already moved leave no empty directories behind
+        for dirname in self._empty_dirs:
+            File._delete_empty_dirs(dirname)
+        self._empty_dirs.clear()
+
+    @staticmethod
+    def conflict_keys(old_filename, new_filename):
+        """Return the keys of the files whose directory updates may conflict."""
+        keys = {os.path.dirname(old_filename), os.path.dirname(new_filename)}
+        return tuple(keys)
+
+    def _start(self, task, func):
+        self.thread_pool.start(_SaveRunnable(self, task, func))
+
+    def _add_result(self, task, result, error):
+        # Called from the worker threads. Only one flush event is posted
+        # until the main thread picks up the results collected so far.
+        with self._results_lock:
+            self._results.append((task, result, error))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        thread.to_main(self._flush)
+
+    def _flush(self):
+        with self._results_lock:
+            results = self._results
+            self._results = []
+            self._flush_scheduled = False
+
+        finished = []
+        for task, result, error in results:
+            if task is self._cleanup:
+                self._cleanup = None
+                for queue in list(self._key_queues.values()):
+                    self._start_if_ready(queue[0])
+            elif task.started:
+                self._release(task)
+                with config.use_settings_snapshot(task.settings):
+                    delete_empty_dirs = config.setting["delete_empty_dirs"]
+                dirname = os.path.dirname(task.old_filename)
+                if (result is not None and delete_empty_dirs
+                        and dirname != os.path.dirname(result)):
+                    self._empty_dirs[dirname] = task.settings
+                finished.append((task, result, error))
+            else:
+                task.planned = True
+                task.new_filename = result
+                if error is not None or result is None:
+                    finished.append((task, result, error))
+        # The tags are written in any order, but the files are queued for
+        # their conflict keys in the order they were saved
+        while self._planning and self._planning[0].planned:
+            task = self._planning.popleft()
+            if task.new_filename is not None:
+                self._enqueue(task)
+        if self._empty_dirs and not self._key_queues and self._cleanup is None:
+            self._start_cleanup()
+
+        for task, result, error in finished:
+            self.pending_count -= 1
+            if error is not None:
+                self._error_count += 1
+            elif result is not None:
+                self._saved_count += 1
+            task.file._saving_finished(result, error)
+            self._saving.discard(task.file)
+            deferred = self._deferred.pop(task.file, None)
+            if deferred is not None:
+                self._submit(task.file, *deferred)
+        if finished:
+            self._report_progress()
+        if not self.pending_count:
+            self._plan = None
+
+    def _enqueue(self, task):
+        if task.new_filename != task.old_filename:
+            if self._plan is None:
+                self._plan = RenamePlan(task.settings, self.tagger.files)
+            task.new_filename, task.additional_files = self._plan.add(
+                task.old_filename, task.new_filename)
+        task.keys = self.conflict_keys(task.old_filename, task.new_filename)
+        for key in task.keys:
+            self._key_queues.setdefault(key, deque()).append(task)
+        self._start_if_ready(task)
+
+    def _start_if_ready(self, task):
+        if task.started or self._cleanup is not None:
+            return
+        for key in task.keys:
+            if self._key_queues[key][0] is not task:
+                return
+        task.started = True
+        self._start(task, partial(task.file._finish_save, task.old_filename,
+                                  task.new_filename, task.metadata,
+                                  task.additional_files))
+
+    def _start_cleanup(self):
+        dirnames = list(self._empty_dirs)
+        settings = self._empty_dirs[dirnames[-1]]
+        self._empty_dirs = {}
+        self._cleanup = _CleanupTask(dirnames, settings)
+        self._start(self._cleanup, partial(self._delete_empty_dirs, dirnames))
+
+    @staticmethod
+    def _delete_empty_dirs(dirnames):
+        for dirname in dirnames:
+            File._delete_empty_dirs(dirname)
+
+    def _release(self, task):
+        waiting = []
+        for key in task.keys:
+            queue = self._key_queues.get(key)
+            if not queue:
+                # Cleared by wait_for_done
+                continue
+            queue.popleft()
+            if queue:
+                waiting.append(queue[0])
+            else:
+                del self._key_queues[key]
+        for next_task in waiting:
+            self._start_if_ready(next_task)
+
+    def _report_progress(self):
+        if self.pending_count:
+            message = N_("Saving files: %(saved)d saved, %(errors)d failed, %(pending)d remaining")
+        else:
+            message = N_("Saved %(saved)d files, %(errors)d failed")
+        args = {
+            'saved': self._saved_count,
+            'errors': self._error_count,
+            'pending': self.pending_count,
+        }
+        self.tagger.window.set_statusbar_message(message, args)
+        if not self.pending_count:
+            self._saved_count = self._error_count = 0
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from functools import partial
+import os
+import re
+import time
+
+from PyQt5 import QtCore
+
+from picard import (
+    config,
+    log,
+)
+from picard.formats import (
+    extension_format,
+    get_format,
+    supported_extensions,
+)
+from picard.util import (
+    is_hidden,
+    thread,
+)
+
+
+class FileScanner(QtCore.QObject):
+
+    """Finds files and chooses their formats on worker threads.
+
+    Directories are walked with ``os.scandir``, only entries with a supported
+    extension are considered, and files reachable through several hard
+    links are added once. The file names and formats are passed to the main
+    thread in batches while the scan is still running, where the File
+    objects are created. So the callback of :meth:`scan_files` and
+    :meth:`scan_directory` is called several times with lists of files.
+    """
+
+    # A batch is delivered once it has batch_size files or is older than
+    # batch_interval seconds
+    batch_size = 500
+    batch_interval = 0.1
+
+    def __init__(self, thread_count=2, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(thread_count)
+        self.pending_count = 0
+        self._stopped = False
+
+    def scan_files(self, filenames, callback, known=()):
+        """Open ``filenames``, skipping the file names contained in ``known``."""
+        filenames = list(filenames)
+        self._start(partial(self._open_files, ((filename, None) for filename in filenames),
+                            callback, known))
+
+    def scan_directory(self, path, callback, recursive=True, known=()):
+        """Open the files with a supported extension in ``path``.
+
+        Sub-directories are only scanned if ``recursive`` is set. File names
+        contained in ``known`` are skipped.
+        """
+        ignore_hidden = config.setting["ignore_hidden_files"]
+        self._start(partial(self._open_files, self._walk(path, recursive, ignore_hidden),
+                            callback, known))
+
+    def stop(self):
+        """Stop all scans and wait for the workers to finish."""
+        self._stopped = True
+        self.thread_pool.waitForDone()
+
+    def _start(self, func):
+        self.pending_count += 1
+        thread.run_task(func, self._finished, thread_pool=self.thread_pool)
+
+    def _finished(self, result=None, error=None):
+        self.pending_count -= 1
+
+    def _walk(self, path, recursive, ignore_hidden):
+        """Yields (path, stat) for the files below ``path`` with a supported extension."""
+        extensions = tuple(ext.lower() for ext in supported_extensions())
+        directories = [path]
+        while directories and not self._stopped:
+            directory = directories.pop()
+            try:
+                # Read the directory at once, the scandir iterator is only
+                # a context manager since Python 3.6
+                entries = list(os.scandir(directory))
+            except OSError as why:
+                log.warning("Could not read directory %r: %s", directory, why)
+                continue
+            subdirectories = []
+            for entry in entries:
+                if ignore_hidden and is_hidden(entry.path):
+                    continue
+                try:
+                    # Like os.walk, do not follow symbolic links to directories
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirectories.append(entry.path)
+                    elif entry.name.lower().endswith(extensions) and entry.is_file():
+                        yield entry.path, entry.stat()
+                except OSError as why:
+                    log.debug("Skipping %r: %s", entry.path, why)
+            directories.extend(reversed(subdirectories))
+
+    def _accept(self, filename, ignoreregex):
+        if config.setting["ignore_hidden_files"] and is_hidden(filename):
+            log.debug("File ignored (hidden): %r" % (filename))
+            return False
+        # Ignore .smbdelete* files which Applie iOS SMB creates by renaming a file when it cannot delete it
+        if os.path.basename(filename).startswith(".smbdelete"):
+            log.debug("File ignored (.smbdelete): %r", filename)
+            return False
+        if ignoreregex is not None and ignoreregex.search(filename):
+            log.info("File ignored (matching %r): %r" % (ignoreregex.pattern, filename))
+            return False
+        return True
+
+    def _open_files(self, entries, callback, known):
+        # Runs on a worker thread. ``known`` is only read, which is safe for
+        # the dicts and sets passed in here.
+        ignoreregex = None
+        pattern = config.setting['ignore_regex']
+        if pattern:
+            ignoreregex = re.compile(pattern)
+        inodes = set()
+        batch = []
+        batch_start = time.monotonic()
+        for filename, stat in entries:
+            if self._stopped:
+                return
+            if stat is not None and stat.st_ino:
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in inodes:
+                    log.debug("File ignored (hard link to a file already added): %r", filename)
+                    continue
+                inodes.add(inode)
+            filename = os.path.normpath(os.path.realpath(filename))
+            if filename in known or not self._accept(filename, ignoreregex):
+                continue
+            # The format is checked against the file header when it is
+            # loaded, the file is only read here if its extension does not
+            # tell the format
+            file_format = extension_format(filename) or get_format(filename)
+            if file_format is None:
+                continue
+            batch.append((file_format, filename))
+            if len(batch) >= self.batch_size or time.monotonic() - batch_start >= self.batch_interval:
+                thread.to_main(self._deliver, callback, batch)
+                batch = []
+                batch_start = time.monotonic()
+        if batch:
+            thread.to_main(self._deliver, callback, batch)
+
+    def _deliver(self, callback, batch):
+        # File objects are only created on the main thread, creating them
+        # changes the count of pending files and emits signals.
+        if self._stopped:
+            return
+        files = []
+        for file_format, filename in batch:
+            try:
+                file = file_format(filename)
+            except Exception as error:
+                log.error("Error occurred:\n{}".format(error))
+                continue
+            if file is not None:
+                files.append(file)
+        if files:
+            callback(files)
@@ -22,12 +22,19 @@ from picard.plugin import ExtensionPoint
 
 _formats = ExtensionPoint(label='formats')
 _extensions = {}
+# Maps (offset, magic bytes) to the formats with that magic, and
+# (offset, length) to the header slices to look up
+_magic = {}
+_magic_slices = set()
 
 
 def register_format(file_format):
     _formats.register(file_format.__module__, file_format)
     for ext in file_format.EXTENSIONS:
         _extensions[ext[1:]] = file_format
+    for offset, magic in getattr(file_format, 'MAGIC', ()):
+        _magic.setdefault((offset, magic), []).append(file_format)
+        _magic_slices.add((offset, len(magic)))
 
 
 def supported_formats():
@@ -44,42 +51,78 @@ def ext_to_format(ext):
     return _extensions.get(ext, None)
 
 
-def guess_format(filename, options=_formats):
-    """Select the best matching file type amongst supported formats."""
+def _candidate_formats(filename, header, options):
+    """Returns the formats matching the magic in header or the extension of filename."""
+    candidates = []
+    for offset, length in _magic_slices:
+        candidates.extend(_magic.get((offset, header[offset:offset + length]), ()))
+    i = filename.rfind(".")
+    if i >= 0:
+        file_format = _extensions.get(filename[i+1:].lower())
+        if file_format is not None:
+            candidates.append(file_format)
+    return [option for option in options if option in candidates]
+
+
+def _guess_format_class(filename, options=_formats, fileobj=None):
+    if fileobj is None:
+        # Since we are reading only 128 bytes and then immediately closing the file,
+        # use unbuffered mode.
+        with open(filename, "rb", 0) as fileobj:
+            return _guess_format_class(filename, options, fileobj)
+    options = [option for option in options if getattr(option, "_File", None)]
     results = []
-    # Since we are reading only 128 bytes and then immediately closing the file,
-    # use unbuffered mode.
-    with open(filename, "rb", 0) as fileobj:
+    try:
         header = fileobj.read(128)
+        # The magic numbers and the extension usually leave a single format,
+        # all formats are only scored if nothing matched.
+        candidates = _candidate_formats(filename, header, options)
+        if len(candidates) == 1:
+            return candidates[0]
         # Calls the score method of a particular format's associated filetype
         # and assigns a positive score depending on how closely the fileobj's header matches
         # the header for a particular file format.
         results = [(option._File.score(filename, fileobj, header), option.__name__, option)
-                   for option in options
-                   if getattr(option, "_File", None)]
+                   for option in candidates or options]
+    finally:
+        fileobj.seek(0)
     if results:
         results.sort()
         if results[-1][0] > 0:
             # return the format with the highest matching score
-            return results[-1][2](filename)
+            return results[-1][2]
 
     # No positive score i.e. the fileobj's header did not match any supported format
     return None
 
 
-def open_(filename):
-    """Open the specified file and return a File instance with the appropriate format handler, or None."""
+def guess_format(filename, options=_formats):
+    """Select the best matching file type amongst supported formats."""
+    file_format = _guess_format_class(filename, options)
+    if file_format is None:
+        return None
+    return file_format(filename)
+
+
+def get_format(filename, fileobj=None):
+    """Return the format handler for the specified file, or None.
+
+    Only the file header is read and no File is created, so this can run
+    on any thread. File objects must be created on the main thread. If the
+    file is already open, the header is read from ``fileobj`` and its
+    position is reset to the start afterwards.
+    """
     try:
         # First try to guess the format on the basis of file headers
-        audio_file = guess_format(filename)
-        if not audio_file:
+        file_format = _guess_format_class(filename, fileobj=fileobj)
+        if not file_format:
             i = filename.rfind(".")
             if i < 0:
                 return None
             ext = filename[i+1:].lower()
             # Switch to extension based opening if guess_format fails
-            audio_file = _extensions[ext](filename)
-        return audio_file
+            file_format = _extensions[ext]
+        return file_format
     except KeyError:
         # None is returned if both the methods fail
         return None
@@ -88,6 +131,34 @@ def open_(filename):
         return None
 
 
+def extension_format(filename):
+    """Return the format class registered for the extension of ``filename``.
+
+    The file is not read. None is returned if the extension is unknown or if
+    the format is only chosen from the file header, like the generic Ogg
+    formats.
+    """
+    i = filename.rfind(".")
+    if i < 0:
+        return None
+    file_format = _extensions.get(filename[i+1:].lower())
+    if isinstance(file_format, type):
+        return file_format
+    return None
+
+
+def open_(filename):
+    """Open the specified file and return a File instance with the appropriate format handler, or None."""
+    file_format = get_format(filename)
+    if file_format is None:
+        return None
+    try:
+        return file_format(filename)
+    except Exception as error:
+        log.error("Error occurred:\n{}".format(error))
+        return None
+
+
 from picard.formats.id3 import (
     AiffFile,
     DSFFile,
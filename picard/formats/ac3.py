@@ -31,6 +31,7 @@ from .mutagenext import ac3
 
 class AC3File(APEv2File):
     EXTENSIONS = [".ac3", ".eac3"]
+    MAGIC = [(0, b'\x0b\x77')]
     NAME = "AC-3"
     _File = ac3.AC3APEv2
 
@@ -32,10 +32,7 @@ from picard import (
     config,
     log,
 )
-from picard.coverart.image import (
-    CoverArtImageError,
-    TagCoverArtImage,
-)
+from picard.coverart.image import CoverArtImageError
 from picard.file import File
 from picard.metadata import Metadata
 from picard.util import (
@@ -116,10 +113,10 @@ class APEv2File(File):
         super().__init__(filename)
         self.__casemap = {}
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
         self.__casemap = {}
-        file = self._File(encode_filename(filename))
+        file = self._File(fileobj or encode_filename(filename))
         metadata = Metadata()
         if file.tags:
             for origname, values in file.tags.items():
@@ -129,8 +126,8 @@ class APEv2File(File):
                     if b'\0' in values.value:
                         descr, data = values.value.split(b'\0', 1)
                         try:
-                            coverartimage = TagCoverArtImage(
-                                file=filename,
+                            coverartimage = self._tag_image(
+                                filename,
                                 tag=name_lower,
                                 data=data,
                             )
@@ -173,6 +170,17 @@ class APEv2File(File):
         self._info(metadata, file)
         return metadata
 
+    @classmethod
+    def _embedded_image_data(cls, filename):
+        tags = cls._File(encode_filename(filename)).tags or {}
+        images = []
+        for name, values in tags.items():
+            if (values.kind == mutagen.apev2.BINARY
+                    and name.lower().startswith("cover art")
+                    and b'\0' in values.value):
+                images.append(values.value.split(b'\0', 1)[1])
+        return images
+
     def _save(self, filename, metadata):
         """Save metadata to the file."""
         log.debug("Saving file %r", filename)
@@ -180,7 +188,7 @@ class APEv2File(File):
             tags = mutagen.apev2.APEv2(encode_filename(filename))
         except mutagen.apev2.APENoHeaderError:
             tags = mutagen.apev2.APEv2()
-        images_to_save = list(metadata.images.to_be_saved_to_tags())
+        images_to_save = self._images_to_save(metadata)
         if config.setting["clear_existing_tags"]:
             tags.clear()
         elif images_to_save:
@@ -274,6 +282,7 @@ class MusepackFile(APEv2File):
 
     """Musepack file."""
     EXTENSIONS = [".mpc", ".mp+"]
+    MAGIC = [(0, b'MP+'), (0, b'MPCK')]
     NAME = "Musepack"
     _File = mutagen.musepack.Musepack
 
@@ -286,31 +295,30 @@ class WavPackFile(APEv2File):
 
     """WavPack file."""
     EXTENSIONS = [".wv"]
+    MAGIC = [(0, b'wvpk')]
     NAME = "WavPack"
     _File = mutagen.wavpack.WavPack
 
-    def _save_and_rename(self, old_filename, metadata):
+    def _finish_save(self, old_filename, new_filename, metadata, additional_files=None):
         """Includes an additional check for WavPack correction files"""
         wvc_filename = old_filename.replace(".wv", ".wvc")
         if isfile(wvc_filename):
             if config.setting["rename_files"] or config.setting["move_files"]:
                 self._rename(wvc_filename, metadata)
-        return File._save_and_rename(self, old_filename, metadata)
+        return File._finish_save(self, old_filename, new_filename, metadata, additional_files)
 
 
 class OptimFROGFile(APEv2File):
 
     """OptimFROG file."""
     EXTENSIONS = [".ofr", ".ofs"]
+    MAGIC = [(0, b'OFR ')]
     NAME = "OptimFROG"
     _File = mutagen.optimfrog.OptimFROG
 
     def _info(self, metadata, file):
         super()._info(metadata, file)
-        # mutagen.File.filename can be either a bytes or str object
-        filename = file.filename
-        if isinstance(filename, bytes):
-            filename = filename.decode()
+        filename = self.filename
         if filename.lower().endswith(".ofs"):
             metadata['~format'] = "OptimFROG DualStream Audio"
         else:
@@ -321,6 +329,7 @@ class MonkeysAudioFile(APEv2File):
 
     """Monkey's Audio file."""
     EXTENSIONS = [".ape"]
+    MAGIC = [(0, b'MAC ')]
     NAME = "Monkey's Audio"
     _File = mutagen.monkeysaudio.MonkeysAudio
 
@@ -329,6 +338,7 @@ class TAKFile(APEv2File):
 
     """TAK file."""
     EXTENSIONS = [".tak"]
+    MAGIC = [(0, b'tBaK')]
     NAME = "Tom's lossless Audio Kompressor"
     _File = tak.TAK
 
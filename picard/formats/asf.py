@@ -28,10 +28,7 @@ from picard import (
     config,
     log,
 )
-from picard.coverart.image import (
-    CoverArtImageError,
-    TagCoverArtImage,
-)
+from picard.coverart.image import CoverArtImageError
 from picard.file import File
 from picard.formats.id3 import (
     image_type_as_id3_num,
@@ -108,6 +105,8 @@ class ASFFile(File):
     WMA tag specifications.
     """
     EXTENSIONS = [".wma", ".wmv", ".asf"]
+    # GUID of the ASF header object
+    MAGIC = [(0, bytes.fromhex('3026b2758e66cf11a6d900aa0062ce6c'))]
     NAME = "Windows Media Audio"
     _File = ASF
 
@@ -197,10 +196,10 @@ class ASFFile(File):
         super().__init__(filename)
         self.__casemap = {}
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
         self.__casemap = {}
-        file = ASF(encode_filename(filename))
+        file = ASF(fileobj or encode_filename(filename))
         metadata = Metadata()
         for name, values in file.tags.items():
             if name == 'WM/Picture':
@@ -212,8 +211,8 @@ class ASFFile(File):
                                     filename, e)
                         continue
                     try:
-                        coverartimage = TagCoverArtImage(
-                            file=filename,
+                        coverartimage = self._tag_image(
+                            filename,
                             tag=name,
                             types=types_from_id3(type_),
                             comment=description,
@@ -250,6 +249,17 @@ class ASFFile(File):
         self._info(metadata, file)
         return metadata
 
+    @classmethod
+    def _embedded_image_data(cls, filename):
+        file = ASF(encode_filename(filename))
+        images = []
+        for image in file.tags.get('WM/Picture', ()):
+            try:
+                images.append(unpack_image(image.value)[1])
+            except ValueError:
+                continue
+        return images
+
     def _save(self, filename, metadata):
         log.debug("Saving file %r", filename)
         file = ASF(encode_filename(filename))
@@ -258,7 +268,7 @@ class ASFFile(File):
         if config.setting['clear_existing_tags']:
             tags.clear()
         cover = []
-        for image in metadata.images.to_be_saved_to_tags():
+        for image in self._images_to_save(metadata):
             tag_data = pack_image(image.mimetype, image.data,
                                   image_type_as_id3_num(image.maintype),
                                   image.comment)
@@ -314,8 +324,6 @@ class ASFFile(File):
 
     def _info(self, metadata, file):
         super()._info(metadata, file)
-        filename = file.filename
-        if isinstance(filename, bytes):
-            filename = filename.decode()
+        filename = self.filename
         if filename.lower().endswith(".wmv"):
             metadata['~video'] = '1'
@@ -32,10 +32,7 @@ from picard import (
     config,
     log,
 )
-from picard.coverart.image import (
-    CoverArtImageError,
-    TagCoverArtImage,
-)
+from picard.coverart.image import CoverArtImageError
 from picard.file import File
 from picard.formats.mutagenext import (
     compatid3,
@@ -233,10 +230,10 @@ class ID3File(File):
         # PR: https://github.com/metabrainz/picard-plugins/pull/83
         return id3.TXXX(encoding=encoding, desc=desc, text=values)
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
         self.__casemap = {}
-        file = self._get_file(encode_filename(filename))
+        file = self._get_file(fileobj or encode_filename(filename))
         tags = file.tags or {}
         # upgrade custom 2.3 frames to 2.4
         for old, new in self.__upgrade.items():
@@ -320,8 +317,8 @@ class ID3File(File):
                     log.error("Invalid %s value '%s' dropped in %r", frameid, frame.text[0], filename)
             elif frameid == 'APIC':
                 try:
-                    coverartimage = TagCoverArtImage(
-                        file=filename,
+                    coverartimage = self._tag_image(
+                        filename,
                         tag=frameid,
                         types=types_from_id3(frame.type),
                         comment=frame.desc,
@@ -346,6 +343,13 @@ class ID3File(File):
         self._info(metadata, file)
         return metadata
 
+    @classmethod
+    def _embedded_image_data(cls, filename):
+        tags = cls._get_file(encode_filename(filename)).tags
+        if not tags:
+            return []
+        return [frame.data for frame in tags.getall('APIC')]
+
     def _save(self, filename, metadata):
         """Save metadata to the file."""
         log.debug("Saving file %r", filename)
@@ -353,7 +357,7 @@ class ID3File(File):
 
         if config.setting['clear_existing_tags']:
             tags.clear()
-        images_to_save = list(metadata.images.to_be_saved_to_tags())
+        images_to_save = self._images_to_save(metadata)
         if images_to_save:
             tags.delall('APIC')
 
@@ -601,7 +605,8 @@ class ID3File(File):
         else:
             return None
 
-    def _get_file(self, filename):
+    @classmethod
+    def _get_file(cls, filename):
         raise NotImplementedError()
 
     def _get_tags(self, filename):
@@ -661,12 +666,14 @@ class MP3File(ID3File):
 
     """MP3 file."""
     EXTENSIONS = [".mp3", ".mp2", ".m2a"]
+    MAGIC = [(0, b'ID3'), (0, b'\xff\xf2'), (0, b'\xff\xf3'), (0, b'\xff\xfa'), (0, b'\xff\xfb')]
     NAME = "MPEG-1 Audio"
     _IsMP3 = True
     _File = mutagen.mp3.MP3
 
-    def _get_file(self, filename):
-        return self._File(filename, ID3=compatid3.CompatID3)
+    @classmethod
+    def _get_file(cls, filename):
+        return cls._File(filename, ID3=compatid3.CompatID3)
 
     def _info(self, metadata, file):
         super()._info(metadata, file)
@@ -680,22 +687,26 @@ class TrueAudioFile(ID3File):
 
     """TTA file."""
     EXTENSIONS = [".tta"]
+    MAGIC = [(0, b'TTA')]
     NAME = "The True Audio"
     _File = mutagen.trueaudio.TrueAudio
 
-    def _get_file(self, filename):
-        return self._File(filename, ID3=compatid3.CompatID3)
+    @classmethod
+    def _get_file(cls, filename):
+        return cls._File(filename, ID3=compatid3.CompatID3)
 
 
 class DSFFile(ID3File):
 
     """DSF file."""
     EXTENSIONS = [".dsf", '.dff']
+    MAGIC = [(0, b'DSD ')]
     NAME = "DSF"
     _File = mutagen.dsf.DSF
 
-    def _get_file(self, filename):
-        return self._File(filename, known_frames=compatid3.known_frames)
+    @classmethod
+    def _get_file(cls, filename):
+        return cls._File(filename, known_frames=compatid3.known_frames)
 
     def _get_tags(self, filename):
         file = self._get_file(filename)
@@ -725,5 +736,6 @@ class AiffFile(DSFFile):
 
     """AIFF file."""
     EXTENSIONS = [".aiff", ".aif", ".aifc"]
+    MAGIC = [(0, b'FORM')]
     NAME = "Audio Interchange File Format (AIFF)"
     _File = mutagen.aiff.AIFF
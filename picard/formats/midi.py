@@ -27,13 +27,14 @@ from picard.util import encode_filename
 
 class MIDIFile(File):
     EXTENSIONS = [".mid", ".kar"]
+    MAGIC = [(0, b'MThd')]
     NAME = "Standard MIDI File"
     _File = SMF
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
         metadata = Metadata()
-        file = self._File(encode_filename(filename))
+        file = self._File(fileobj or encode_filename(filename))
         self._info(metadata, file)
         return metadata
 
@@ -42,10 +43,7 @@ class MIDIFile(File):
 
     def _info(self, metadata, file):
         super()._info(metadata, file)
-        # mutagen.File.filename can be either a bytes or str object
-        filename = file.filename
-        if isinstance(filename, bytes):
-            filename = filename.decode()
+        filename = self.filename
         if filename.lower().endswith(".kar"):
             metadata['~format'] = "Standard MIDI File (Karaoke File)"
 
@@ -28,10 +28,7 @@ from picard import (
     config,
     log,
 )
-from picard.coverart.image import (
-    CoverArtImageError,
-    TagCoverArtImage,
-)
+from picard.coverart.image import CoverArtImageError
 from picard.file import File
 from picard.formats.mutagenext import delall_ci
 from picard.metadata import Metadata
@@ -55,6 +52,7 @@ def _is_valid_key(key):
 
 class MP4File(File):
     EXTENSIONS = [".m4a", ".m4b", ".m4p", ".m4v", ".mp4"]
+    MAGIC = [(4, b'ftyp')]
     NAME = "MPEG-4 Audio"
     _File = MP4
 
@@ -162,10 +160,10 @@ class MP4File(File):
         super().__init__(filename)
         self.__casemap = {}
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
         self.__casemap = {}
-        file = MP4(encode_filename(filename))
+        file = MP4(fileobj or encode_filename(filename))
         tags = file.tags or {}
         metadata = Metadata()
         for name, values in tags.items():
@@ -208,8 +206,8 @@ class MP4File(File):
                                                  value.FORMAT_PNG):
                         continue
                     try:
-                        coverartimage = TagCoverArtImage(
-                            file=filename,
+                        coverartimage = self._tag_image(
+                            filename,
                             tag=name,
                             data=value,
                         )
@@ -233,6 +231,12 @@ class MP4File(File):
         self._info(metadata, file)
         return metadata
 
+    @classmethod
+    def _embedded_image_data(cls, filename):
+        tags = MP4(encode_filename(filename)).tags or {}
+        return [bytes(value) for value in tags.get('covr', ())
+                if value.imageformat in (value.FORMAT_JPEG, value.FORMAT_PNG)]
+
     def _save(self, filename, metadata):
         log.debug("Saving file %r", filename)
         file = MP4(encode_filename(self.filename))
@@ -289,7 +293,7 @@ class MP4File(File):
                 tags["disk"] = [(int(metadata["discnumber"]), 0)]
 
         covr = []
-        for image in metadata.images.to_be_saved_to_tags():
+        for image in self._images_to_save(metadata):
             if image.mimetype == "image/jpeg":
                 covr.append(MP4Cover(image.data, MP4Cover.FORMAT_JPEG))
             elif image.mimetype == "image/png":
@@ -346,8 +350,6 @@ class MP4File(File):
         super()._info(metadata, file)
         if hasattr(file.info, 'codec_description') and file.info.codec_description:
             metadata['~format'] = "%s (%s)" % (metadata['~format'], file.info.codec_description)
-        filename = file.filename
-        if isinstance(filename, bytes):
-            filename = filename.decode()
+        filename = self.filename
         if filename.lower().endswith(".m4v") or (file.tags and 'hdvd' in file.tags):
             metadata['~video'] = '1'
@@ -32,10 +32,7 @@ from picard import (
     config,
     log,
 )
-from picard.coverart.image import (
-    CoverArtImageError,
-    TagCoverArtImage,
-)
+from picard.coverart.image import CoverArtImageError
 from picard.file import File
 from picard.formats import guess_format
 from picard.formats.id3 import (
@@ -110,9 +107,9 @@ class VCommentFile(File):
     }
     __rtranslate = dict([(v, k) for k, v in __translate.items()])
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
-        file = self._File(encode_filename(filename))
+        file = self._File(fileobj or encode_filename(filename))
         file.tags = file.tags or {}
         metadata = Metadata()
         for origname, values in file.tags.items():
@@ -162,8 +159,8 @@ class VCommentFile(File):
                 elif name == "metadata_block_picture":
                     try:
                         image = mutagen.flac.Picture(base64.standard_b64decode(value))
-                        coverartimage = TagCoverArtImage(
-                            file=filename,
+                        coverartimage = self._tag_image(
+                            filename,
                             tag=name,
                             types=types_from_id3(image.type),
                             comment=image.desc,
@@ -181,8 +178,8 @@ class VCommentFile(File):
         if self._File == mutagen.flac.FLAC:
             for image in file.pictures:
                 try:
-                    coverartimage = TagCoverArtImage(
-                        file=filename,
+                    coverartimage = self._tag_image(
+                        filename,
                         tag='FLAC/PICTURE',
                         types=types_from_id3(image.type),
                         comment=image.desc,
@@ -199,8 +196,8 @@ class VCommentFile(File):
             try:
                 for data in file["COVERART"]:
                     try:
-                        coverartimage = TagCoverArtImage(
-                            file=filename,
+                        coverartimage = self._tag_image(
+                            filename,
                             tag='COVERART',
                             data=base64.standard_b64decode(data)
                         )
@@ -213,6 +210,26 @@ class VCommentFile(File):
         self._info(metadata, file)
         return metadata
 
+    @classmethod
+    def _embedded_image_data(cls, filename):
+        file = cls._File(encode_filename(filename))
+        tags = file.tags or {}
+        images = []
+        for value in tags.get('metadata_block_picture', ()):
+            try:
+                images.append(mutagen.flac.Picture(base64.standard_b64decode(value)).data)
+            except (TypeError, ValueError, mutagen.flac.error):
+                continue
+        if cls._File == mutagen.flac.FLAC:
+            images.extend(image.data for image in file.pictures)
+        if 'metadata_block_picture' not in tags:
+            for value in tags.get('COVERART', ()):
+                try:
+                    images.append(base64.standard_b64decode(value))
+                except (TypeError, ValueError):
+                    continue
+        return images
+
     def _save(self, filename, metadata):
         """Save metadata to the file."""
         log.debug("Saving file %r", filename)
@@ -225,7 +242,7 @@ class VCommentFile(File):
             file.tags.clear()
             if channel_mask:
                 file.tags['waveformatextensible_channel_mask'] = channel_mask
-        images_to_save = list(metadata.images.to_be_saved_to_tags())
+        images_to_save = self._images_to_save(metadata)
         if is_flac and (config.setting["clear_existing_tags"] or images_to_save):
             file.clear_pictures()
         tags = {}
@@ -353,6 +370,7 @@ class FLACFile(VCommentFile):
 
     """FLAC file."""
     EXTENSIONS = [".flac"]
+    MAGIC = [(0, b'fLaC')]
     NAME = "FLAC"
     _File = mutagen.flac.FLAC
 
@@ -361,6 +379,9 @@ class OggFLACFile(VCommentFile):
 
     """FLAC file."""
     EXTENSIONS = [".oggflac"]
+    # The codec header follows the 27 byte Ogg page header and a one byte
+    # segment table
+    MAGIC = [(28, b'\x7fFLAC')]
     NAME = "Ogg FLAC"
     _File = mutagen.oggflac.OggFLAC
 
@@ -369,6 +390,7 @@ class OggSpeexFile(VCommentFile):
 
     """Ogg Speex file."""
     EXTENSIONS = [".spx"]
+    MAGIC = [(28, b'Speex   ')]
     NAME = "Speex"
     _File = mutagen.oggspeex.OggSpeex
 
@@ -377,6 +399,7 @@ class OggTheoraFile(VCommentFile):
 
     """Ogg Theora file."""
     EXTENSIONS = [".oggtheora"]
+    MAGIC = [(28, b'\x80theora')]
     NAME = "Ogg Theora"
     _File = mutagen.oggtheora.OggTheora
 
@@ -389,6 +412,7 @@ class OggVorbisFile(VCommentFile):
 
     """Ogg Vorbis file."""
     EXTENSIONS = [".ogg"]
+    MAGIC = [(28, b'\x01vorbis')]
     NAME = "Ogg Vorbis"
     _File = mutagen.oggvorbis.OggVorbis
 
@@ -397,6 +421,7 @@ class OggOpusFile(VCommentFile):
 
     """Ogg Opus file."""
     EXTENSIONS = [".opus"]
+    MAGIC = [(28, b'OpusHead')]
     NAME = "Ogg Opus"
     _File = mutagen.oggopus.OggOpus
 
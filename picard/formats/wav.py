@@ -29,9 +29,9 @@ class WAVFile(File):
     NAME = "Microsoft WAVE"
     _File = None
 
-    def _load(self, filename):
+    def _load(self, filename, fileobj=None):
         log.debug("Loading file %r", filename)
-        f = wave.open(filename, "rb")
+        f = wave.open(fileobj or filename, "rb")
         metadata = Metadata()
         metadata['~channels'] = f.getnchannels()
         metadata['~bits_per_sample'] = f.getsampwidth() * 8
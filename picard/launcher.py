@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+"""Command line entry point.
+
+Only the modules of the selected mode are imported, batch mode does not
+load the main window, the option pages or the resources.
+"""
+
+import argparse
+
+from picard import (
+    PICARD_APP_NAME,
+    PICARD_FANCY_VERSION_STR,
+    PICARD_ORG_NAME,
+)
+
+
+def version():
+    print("%s %s %s" % (PICARD_ORG_NAME, PICARD_APP_NAME, PICARD_FANCY_VERSION_STR))
+
+
+def longversion():
+    # The versions of the libraries are only imported when asked for
+    from picard.util import versions
+    print(versions.as_string())
+
+
+def process_picard_args():
+    parser = argparse.ArgumentParser(
+        epilog="If one of the filenames begins with a hyphen, use -- to separate the options from the filenames."
+    )
+    # Qt default arguments. Parse them so Picard does not interpret the
+    # arguments as file names to load.
+    parser.add_argument("-style", nargs=1, help=argparse.SUPPRESS)
+    parser.add_argument("-stylesheet", nargs=1, help=argparse.SUPPRESS)
+    # Same for default X arguments
+    parser.add_argument("-display", nargs=1, help=argparse.SUPPRESS)
+
+    # Picard specific arguments
+    parser.add_argument("-c", "--config-file", action='store',
+                        default=None,
+                        help="location of the configuration file")
+    parser.add_argument("-d", "--debug", action='store_true',
+                        help="enable debug-level logging")
+    parser.add_argument("-N", "--no-restore", action='store_true',
+                        help="do not restore positions and/or sizes")
+    parser.add_argument("-P", "--no-plugins", action='store_true',
+                        help="do not load any plugins")
+    parser.add_argument('-v', '--version', action='store_true',
+                        help="display version information and exit")
+    parser.add_argument("-V", "--long-version", action='store_true',
+                        help="display long version information and exit")
+    parser.add_argument('FILE', nargs='*')
+
+    batch = parser.add_argument_group(
+        "batch mode",
+        "Tag the given files and directories without a user interface and write a JSON report."
+    )
+    batch.add_argument("-b", "--batch", action='store_true',
+                       help="run in batch mode")
+    batch.add_argument("--cluster", action='store_true',
+                       help="cluster the loaded files")
+    batch.add_argument("--lookup", action='store_true',
+                       help="look up clusters and unclustered files on MusicBrainz")
+    batch.add_argument("--save", action='store_true',
+                       help="save the files matched to tracks")
+    batch.add_argument("--dry-run", action='store_true',
+                       help="with --save, only add the planned file moves to the report")
+    batch.add_argument("--report", metavar='REPORT', default='-',
+                       help="write the report to REPORT instead of stdout")
+    picard_args, unparsed_args = parser.parse_known_args()
+    return picard_args, unparsed_args
+
+
+def main(localedir=None, autoupdate=True):
+    picard_args, unparsed_args = process_picard_args()
+    if picard_args.version:
+        return version()
+    if picard_args.long_version:
+        return longversion()
+    if picard_args.batch:
+        from picard.batch import main as batch_main
+        batch_main(picard_args, localedir)
+    else:
+        from picard.tagger import main as tagger_main
+        tagger_main(picard_args, unparsed_args, localedir, autoupdate)
@@ -34,8 +34,12 @@ from picard.plugin import (
     PluginFunctions,
     PluginPriority,
 )
-from picard.similarity import similarity2
+from picard.similarity import (
+    similarity2_many,
+    tokenize_words,
+)
 from picard.util import linear_combination_of_weights
+from picard.util.astrcmp import similarity2_words
 from picard.util.imagelist import ImageList
 from picard.util.tags import PRESERVED_TAGS
 
@@ -113,6 +117,65 @@ def weights_from_preferred_formats(parts, release, preferred_formats, weight):
         parts.append((score, weight))
 
 
+class ComparisonFeatures(object):
+
+    """Precomputed values of a Metadata object used to compare it to others.
+
+    Tokenizing text values and parsing numbers is done once, so one object
+    can be compared to many others cheaply. See Metadata.compare.
+    """
+
+    __slots__ = ('weights', 'length', 'values', 'words', 'numbers', 'deleted_tags')
+
+    number_tags = ('tracknumber', 'totaltracks')
+
+    def __init__(self, metadata, weights):
+        self.weights = weights
+        self.length = metadata.length
+        self.deleted_tags = frozenset(metadata.deleted_tags)
+        self.values = {}
+        self.words = {}
+        self.numbers = {}
+        for name, weight in weights:
+            value = metadata[name]
+            self.values[name] = value
+            if not value:
+                continue
+            if name in self.number_tags:
+                try:
+                    self.numbers[name] = int(value)
+                except ValueError:
+                    pass
+            else:
+                self.words[name] = tokenize_words(value)
+
+    def compare(self, other, ignored=()):
+        parts = []
+
+        if self.length and other.length and '~length' not in ignored:
+            score = Metadata.length_score(self.length, other.length)
+            parts.append((score, 8))
+
+        for name, weight in self.weights:
+            if name in ignored:
+                continue
+            a = self.values[name]
+            b = other.values[name]
+            if a and b:
+                if name in self.number_tags:
+                    if name in self.numbers and name in other.numbers:
+                        score = 1.0 - (int(self.numbers[name] != other.numbers[name]))
+                    else:
+                        score = 1.0 - (int(a != b))
+                else:
+                    score = similarity2_words(self.words[name], other.words[name])
+                parts.append((score, weight))
+            elif (a and name in other.deleted_tags
+                  or b and name in self.deleted_tags):
+                parts.append((0, weight))
+        return linear_combination_of_weights(parts)
+
+
 class Metadata(MutableMapping):
 
     """List of metadata items with dict-like access."""
@@ -128,6 +191,10 @@ class Metadata(MutableMapping):
     multi_valued_joiner = MULTI_VALUED_JOINER
 
     def __init__(self, *args, deleted_tags=None, images=None, length=None, **kwargs):
+        # Incremented on each change of the tags or the length, the cached
+        # comparison features are only used for the version they were made for
+        self._version = 0
+        self._comparison_features = None
         self._store = dict()
         self.deleted_tags = set()
         self.length = 0
@@ -152,132 +219,191 @@ class Metadata(MutableMapping):
     def __len__(self):
         return len(self._store) + len(self.images)
 
+    @property
+    def length(self):
+        return self._length
+
+    @length.setter
+    def length(self, length):
+        self._length = length
+        self._changed()
+
+    def _changed(self):
+        self._version += 1
+
     @staticmethod
     def length_score(a, b):
         return (1.0 - min(abs(a - b),
                 LENGTH_SCORE_THRES_MS) / float(LENGTH_SCORE_THRES_MS))
 
+    def comparison_features(self):
+        """Returns the ComparisonFeatures of this object, for comparing it to many others.
+
+        The features are kept until the metadata is changed.
+        """
+        version = self._version
+        cached = self._comparison_features
+        if cached is None or cached[0] != version:
+            cached = self._comparison_features = (version, ComparisonFeatures(self, self.__weights))
+        return cached[1]
+
     def compare(self, other, ignored=None):
-        parts = []
         if ignored is None:
             ignored = []
-
-        if self.length and other.length and '~length' not in ignored:
-            score = self.length_score(self.length, other.length)
-            parts.append((score, 8))
-
-        for name, weight in self.__weights:
-            if name in ignored:
-                continue
-            a = self[name]
-            b = other[name]
-            if a and b:
-                if name in ('tracknumber', 'totaltracks'):
-                    try:
-                        ia = int(a)
-                        ib = int(b)
-                    except ValueError:
-                        ia = a
-                        ib = b
-                    score = 1.0 - (int(ia != ib))
-                else:
-                    score = similarity2(a, b)
-                parts.append((score, weight))
-            elif (a and name in other.deleted_tags
-                  or b and name in self.deleted_tags):
-                parts.append((0, weight))
-        return linear_combination_of_weights(parts)
+        return self.comparison_features().compare(other.comparison_features(), ignored)
 
     def compare_to_release(self, release, weights):
         """
         Compare metadata to a MusicBrainz release. Produces a probability as a
         linear combination of weights that the metadata matches a certain album.
         """
-        parts = self.compare_to_release_parts(release, weights)
-        sim = linear_combination_of_weights(parts) * get_score(release)
-        return SimMatchRelease(similarity=sim, release=release)
+        return self.compare_to_releases([release], weights)[0]
+
+    def compare_to_releases(self, releases, weights):
+        """
+        Compare metadata to a list of MusicBrainz releases. Returns a list
+        with a SimMatchRelease for each release, in the same order.
+        """
+        results = []
+        for release, parts in zip(releases, self.compare_to_releases_parts(releases, weights)):
+            sim = linear_combination_of_weights(parts) * get_score(release)
+            results.append(SimMatchRelease(similarity=sim, release=release))
+        return results
 
     def compare_to_release_parts(self, release, weights):
-        parts = []
+        return self.compare_to_releases_parts([release], weights)[0]
+
+    def compare_to_releases_parts(self, releases, weights):
+        """
+        Returns the list of weighted score parts for each of ``releases``.
+        The text similarities are calculated in one batch for all releases.
+        """
         if "album" in self:
-            b = release['title']
-            parts.append((similarity2(self["album"], b), weights["album"]))
+            album_scores = similarity2_many(
+                self["album"], [release['title'] for release in releases])
+        else:
+            album_scores = [None] * len(releases)
 
         if "albumartist" in self and "albumartist" in weights:
-            a = self["albumartist"]
-            b = artist_credit_from_node(release['artist-credit'])[0]
-            parts.append((similarity2(a, b), weights["albumartist"]))
+            albumartist_scores = similarity2_many(
+                self["albumartist"],
+                [artist_credit_from_node(release['artist-credit'])[0] for release in releases])
+        else:
+            albumartist_scores = [None] * len(releases)
 
         try:
-            a = int(self["totaltracks"])
-            b = release['track-count']
-            score = 0.0 if a > b else 0.3 if a < b else 1.0
-            parts.append((score, weights["totaltracks"]))
-        except (ValueError, KeyError):
-            pass
+            totaltracks = int(self["totaltracks"])
+        except ValueError:
+            totaltracks = None
 
-        weights_from_preferred_countries(parts, release,
-                                         config.setting["preferred_release_countries"],
-                                         weights["releasecountry"])
+        preferred_countries = config.setting["preferred_release_countries"]
+        preferred_formats = config.setting["preferred_release_formats"]
+        if "releasetype" in weights:
+            release_type_scores = config.setting["release_type_scores"]
 
-        weights_from_preferred_formats(parts, release,
-                                       config.setting["preferred_release_formats"],
-                                       weights["format"])
+        releases_parts = []
+        for release, album_score, albumartist_score in zip(releases, album_scores, albumartist_scores):
+            parts = []
+            if album_score is not None:
+                parts.append((album_score, weights["album"]))
 
-        if "releasetype" in weights:
-            weights_from_release_type_scores(parts, release,
-                                             config.setting["release_type_scores"],
-                                             weights["releasetype"])
+            if albumartist_score is not None:
+                parts.append((albumartist_score, weights["albumartist"]))
+
+            if totaltracks is not None:
+                try:
+                    b = release['track-count']
+                    score = 0.0 if totaltracks > b else 0.3 if totaltracks < b else 1.0
+                    parts.append((score, weights["totaltracks"]))
+                except KeyError:
+                    pass
+
+            weights_from_preferred_countries(parts, release,
+                                             preferred_countries,
+                                             weights["releasecountry"])
+
+            weights_from_preferred_formats(parts, release,
+                                           preferred_formats,
+                                           weights["format"])
+
+            if "releasetype" in weights:
+                weights_from_release_type_scores(parts, release,
+                                                 release_type_scores,
+                                                 weights["releasetype"])
 
-        rg = QObject.tagger.get_release_group_by_id(release['release-group']['id'])
-        if release['id'] in rg.loaded_albums:
-            parts.append((1.0, 6))
+            rg = QObject.tagger.get_release_group_by_id(release['release-group']['id'])
+            if release['id'] in rg.loaded_albums:
+                parts.append((1.0, 6))
 
-        return parts
+            releases_parts.append(parts)
+
+        return releases_parts
 
     def compare_to_track(self, track, weights):
-        parts = []
+        return self.compare_to_tracks([track], weights)[0]
 
+    def compare_to_tracks(self, tracks, weights):
+        """
+        Compare metadata to a list of MusicBrainz recordings. Returns a list
+        with a SimMatchTrack for each track, in the same order.
+        """
         if 'title' in self:
-            a = self['title']
-            b = track.get('title', '')
-            parts.append((similarity2(a, b), weights["title"]))
+            title_scores = similarity2_many(
+                self['title'], [track.get('title', '') for track in tracks])
+        else:
+            title_scores = [None] * len(tracks)
 
         if 'artist' in self:
-            a = self['artist']
-            artist_credits = track.get('artist-credit', [])
-            b = artist_credit_from_node(artist_credits)[0]
-            parts.append((similarity2(a, b), weights["artist"]))
-
-        a = self.length
-        if a > 0 and 'length' in track:
-            b = track['length']
-            score = self.length_score(a, b)
-            parts.append((score, weights["length"]))
-
-        releases = []
-        if "releases" in track:
-            releases = track['releases']
-
-        search_score = get_score(track)
-        if not releases:
-            sim = linear_combination_of_weights(parts) * search_score
-            return SimMatchTrack(similarity=sim, releasegroup=None, release=None, track=track)
-
-        if 'isvideo' in weights:
-            metadata_is_video = self['~video'] == '1'
-            track_is_video = track.get('video', False)
-            score = 1 if metadata_is_video == track_is_video else 0
-            parts.append((score, weights['isvideo']))
-
-        result = SimMatchTrack(similarity=-1, releasegroup=None, release=None, track=None)
-        for release in releases:
-            release_parts = self.compare_to_release_parts(release, weights)
-            sim = linear_combination_of_weights(parts + release_parts) * search_score
-            if sim > result.similarity:
-                rg = release['release-group'] if "release-group" in release else None
-                result = SimMatchTrack(similarity=sim, releasegroup=rg, release=release, track=track)
-        return result
+            artist_scores = similarity2_many(
+                self['artist'],
+                [artist_credit_from_node(track.get('artist-credit', []))[0] for track in tracks])
+        else:
+            artist_scores = [None] * len(tracks)
+
+        all_releases = [release for track in tracks for release in track.get('releases', [])]
+        all_releases_parts = iter(self.compare_to_releases_parts(all_releases, weights))
+
+        results = []
+        for track, title_score, artist_score in zip(tracks, title_scores, artist_scores):
+            parts = []
+
+            if title_score is not None:
+                parts.append((title_score, weights["title"]))
+
+            if artist_score is not None:
+                parts.append((artist_score, weights["artist"]))
+
+            a = self.length
+            if a > 0 and 'length' in track:
+                b = track['length']
+                score = self.length_score(a, b)
+                parts.append((score, weights["length"]))
+
+            releases = []
+            if "releases" in track:
+                releases = track['releases']
+
+            search_score = get_score(track)
+            if not releases:
+                sim = linear_combination_of_weights(parts) * search_score
+                results.append(SimMatchTrack(similarity=sim, releasegroup=None, release=None, track=track))
+                continue
+
+            if 'isvideo' in weights:
+                metadata_is_video = self['~video'] == '1'
+                track_is_video = track.get('video', False)
+                score = 1 if metadata_is_video == track_is_video else 0
+                parts.append((score, weights['isvideo']))
+
+            result = SimMatchTrack(similarity=-1, releasegroup=None, release=None, track=None)
+            for release in releases:
+                release_parts = next(all_releases_parts)
+                sim = linear_combination_of_weights(parts + release_parts) * search_score
+                if sim > result.similarity:
+                    rg = release['release-group'] if "release-group" in release else None
+                    result = SimMatchTrack(similarity=sim, releasegroup=rg, release=release, track=track)
+            results.append(result)
+        return results
 
     def copy(self, other, copy_images=True):
         self.clear()
@@ -319,6 +445,7 @@ class Metadata(MutableMapping):
 
     def clear_deleted(self):
         self.deleted_tags = set()
+        self._changed()
 
     @staticmethod
     def normalize_tag(name):
@@ -348,6 +475,7 @@ class Metadata(MutableMapping):
         if values:
             self._store[name] = values
             self.deleted_tags.discard(name)
+            self._changed()
         elif name in self._store:
             del self[name]
 
@@ -365,12 +493,14 @@ class Metadata(MutableMapping):
             pass
         finally:
             self.deleted_tags.add(name)
+            self._changed()
 
     def add(self, name, value):
         if value or value == 0:
             name = self.normalize_tag(name)
             self._store.setdefault(name, []).append(str(value))
             self.deleted_tags.discard(name)
+            self._changed()
 
     def add_unique(self, name, value):
         name = self.normalize_tag(name)
@@ -392,6 +522,7 @@ class Metadata(MutableMapping):
         """
         name = self.normalize_tag(name)
         del self._store[name]
+        self._changed()
 
     def __iter__(self):
         return iter(self._store)
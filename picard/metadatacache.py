@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from picard import (
+    PICARD_VERSION_STR,
+    config,
+    log,
+)
+from picard.coverart.image import (
+    CoverArtImageError,
+    LazyTagCoverArtImage,
+    TagCoverArtImage,
+)
+from picard.metadata import Metadata
+
+
+SCHEMA_VERSION = '2'
+
+# Settings changing how the formats load the metadata of files
+LOAD_SETTINGS = ('itunes_compatible_grouping', 'rating_user_email', 'rating_steps',
+                 'lazy_embedded_images')
+
+
+class MetadataCache(object):
+
+    """Persistent cache of the metadata loaded from files.
+
+    Entries are stored in an SQLite database and keyed on the file path.
+    An entry is only used if the size and modification time of the file and
+    the file format still match. The cache is cleared whenever it was
+    written by a different Picard version or with different values of the
+    settings in LOAD_SETTINGS. Entries not used for ``max_age`` seconds are
+    removed when the cache is opened.
+
+    Only the image info of lazily loaded images is stored, their data stays
+    in the file.
+    """
+
+    max_age = 90 * 24 * 3600
+
+    # Interval in seconds at which the last use of an entry is updated
+    used_resolution = 24 * 3600
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version():
+        settings = {name: config.setting[name] for name in LOAD_SETTINGS}
+        return json.dumps([PICARD_VERSION_STR, settings], sort_keys=True)
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            row = connection.execute("SELECT value FROM info WHERE key = 'schema'").fetchone()
+            if row is None or row[0] != SCHEMA_VERSION:
+                with connection:
+                    connection.execute("DROP TABLE IF EXISTS files")
+                    connection.execute("DROP TABLE IF EXISTS images")
+                    connection.execute("DELETE FROM info")
+                    connection.execute("INSERT INTO info VALUES ('schema', ?)", (SCHEMA_VERSION,))
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,
+                    format TEXT, metadata TEXT, used REAL);
+                CREATE TABLE IF NOT EXISTS images (
+                    path TEXT, position INTEGER, data BLOB,
+                    PRIMARY KEY (path, position));
+            """)
+            with connection:
+                expired = time.time() - self.max_age
+                connection.execute(
+                    "DELETE FROM images WHERE path IN (SELECT path FROM files WHERE used < ?)",
+                    (expired,))
+                connection.execute("DELETE FROM files WHERE used < ?", (expired,))
+            self._connection = connection
+        self._check_version(self._connection)
+        return self._connection
+
+    def _check_version(self, connection):
+        version = self._version()
+        row = connection.execute("SELECT value FROM info WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            log.debug("Clearing metadata cache %r", self.path)
+            with connection:
+                connection.execute("DELETE FROM files")
+                connection.execute("DELETE FROM images")
+                connection.execute("INSERT OR REPLACE INTO info VALUES ('version', ?)",
+                                   (version,))
+
+    @staticmethod
+    def _stat(filename):
+        st = os.stat(filename)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, filename, file_format, lazy_image=None):
+        """Return the cached Metadata for filename, or None if there is no valid entry.
+
+        Lazily loaded images are made with ``lazy_image(filename, image_info=...,
+        **kwargs)``, see File._lazy_tag_image().
+        """
+        try:
+            size, mtime_ns = self._stat(filename)
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT metadata FROM files WHERE path = ? AND size = ? AND mtime_ns = ? AND format = ?",
+                    (filename, size, mtime_ns, file_format)).fetchone()
+                if row is None:
+                    return None
+                images = connection.execute(
+                    "SELECT position, data FROM images WHERE path = ?",
+                    (filename,)).fetchall()
+                now = time.time()
+                with connection:
+                    connection.execute(
+                        "UPDATE files SET used = ? WHERE path = ? AND used < ?",
+                        (now, filename, now - self.used_resolution))
+            return self._decode(filename, json.loads(row[0]), dict(images), lazy_image)
+        except (OSError, sqlite3.Error, ValueError, KeyError, CoverArtImageError) as why:
+            log.warning("Could not read %r from metadata cache: %s", filename, why)
+            return None
+
+    def put(self, filename, file_format, metadata):
+        """Store the metadata loaded from filename."""
+        if not all(isinstance(image, TagCoverArtImage) for image in metadata.images):
+            return
+        try:
+            size, mtime_ns = self._stat(filename)
+            document, images = self._encode(metadata)
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.execute("DELETE FROM images WHERE path = ?", (filename,))
+                    connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                                       (filename, size, mtime_ns, file_format, json.dumps(document),
+                                        time.time()))
+                    connection.executemany("INSERT INTO images VALUES (?, ?, ?)",
+                                           [(filename, i, data) for i, data in images.items()])
+        except (OSError, sqlite3.Error, CoverArtImageError) as why:
+            log.warning("Could not write %r to metadata cache: %s", filename, why)
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM files")
+                connection.execute("DELETE FROM images")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    @staticmethod
+    def _encode(metadata):
+        # Data of the images which are not lazily loaded, by position
+        images = {}
+        image_infos = []
+        for i, image in enumerate(metadata.images):
+            info = {
+                'tag': image.tag,
+                'types': image.types,
+                'is_front': image.is_front,
+                'support_types': image.support_types,
+                'support_multi_types': image.support_multi_types,
+                'comment': image.comment,
+            }
+            if isinstance(image, LazyTagCoverArtImage):
+                info['image_info'] = image.image_info()
+            else:
+                images[i] = image.data
+            image_infos.append(info)
+        document = {
+            'tags': dict(metadata.rawitems()),
+            'deleted_tags': list(metadata.deleted_tags),
+            'length': metadata.length,
+            'images': image_infos,
+        }
+        return document, images
+
+    @staticmethod
+    def _decode(filename, document, images, lazy_image):
+        metadata = Metadata()
+        for name, values in document['tags'].items():
+            metadata[name] = values
+        for name in document['deleted_tags']:
+            metadata.delete(name)
+        metadata.length = document['length']
+        for i, info in enumerate(document['images']):
+            kwargs = {
+                'tag': info['tag'],
+                'types': info['types'],
+                'is_front': info['is_front'],
+                'support_types': info['support_types'],
+                'support_multi_types': info['support_multi_types'],
+                'comment': info['comment'],
+            }
+            if 'image_info' in info:
+                image = lazy_image(filename, image_info=tuple(info['image_info']), **kwargs)
+            else:
+                image = TagCoverArtImage(file=filename, data=bytes(images[i]), **kwargs)
+            metadata.images.append(image)
+        return metadata
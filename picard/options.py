@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+"""Options of the options pages.
+
+The options are declared here and not in the pages, so they are available
+without importing the user interface, e.g. in batch mode. Only the state of
+widgets and options whose defaults need a GUI are declared in picard.ui.
+"""
+
+from PyQt5.QtCore import QStandardPaths
+
+from picard import (
+    config,
+    log,
+)
+from picard.const import (
+    DEFAULT_FILE_NAMING_FORMAT,
+    MUSICBRAINZ_SERVERS,
+    RELEASE_PRIMARY_GROUPS,
+    RELEASE_SECONDARY_GROUPS,
+)
+from picard.util.cdrom import DEFAULT_DRIVES
+
+
+DEFAULT_RELEASE_TYPE_SCORE = 0.5
+
+_default_starting_dir = QStandardPaths.writableLocation(QStandardPaths.HomeLocation)
+_default_music_dir = QStandardPaths.writableLocation(QStandardPaths.MusicLocation)
+_release_type_scores = [(g, DEFAULT_RELEASE_TYPE_SCORE) for g in list(RELEASE_PRIMARY_GROUPS.keys()) + list(RELEASE_SECONDARY_GROUPS.keys())]
+
+
+ADVANCED_OPTIONS = [
+    config.TextOption("setting", "ignore_regex", ""),
+    config.BoolOption("setting", "ignore_hidden_files", False),
+    config.BoolOption("setting", "recursively_add_files", True),
+    config.IntOption("setting", "ignore_track_duration_difference_under", 2),
+    config.BoolOption("setting", "completeness_ignore_videos", False),
+    config.BoolOption("setting", "completeness_ignore_pregap", False),
+    config.BoolOption("setting", "completeness_ignore_data", False),
+    config.BoolOption("setting", "completeness_ignore_silence", False),
+    config.ListOption("setting", "compare_ignore_tags", []),
+    config.IntOption("setting", "file_loader_threads", 0),
+    config.IntOption("setting", "file_saver_threads", 0),
+    config.BoolOption("setting", "use_metadata_cache", False),
+    config.IntOption("setting", "image_memory_limit_mb", 128),
+    config.BoolOption("setting", "lazy_embedded_images", False),
+    config.IntOption("setting", "cover_art_download_window", 4),
+    config.BoolOption("setting", "use_entity_cache", True),
+    config.IntOption("setting", "entity_cache_ttl_hours", 24),
+    config.IntOption("setting", "entity_cache_size_mb", 256),
+    config.IntOption("setting", "album_loader_window", 2),
+    config.BoolOption("setting", "server_rate_limited", True),
+]
+
+CDLOOKUP_OPTIONS = [
+    config.TextOption("setting", "cd_lookup_device", ",".join(DEFAULT_DRIVES)),
+]
+
+COVER_OPTIONS = [
+    config.BoolOption("setting", "save_images_to_tags", True),
+    config.BoolOption("setting", "embed_only_one_front_image", True),
+    config.BoolOption("setting", "save_images_to_files", False),
+    config.TextOption("setting", "cover_image_filename", "cover"),
+    config.BoolOption("setting", "save_images_overwrite", False),
+    config.ListOption("setting", "ca_providers", [
+        ('Cover Art Archive', True),
+        ('Amazon', True),
+        ('Whitelist', True),
+        ('CaaReleaseGroup', False),
+        ('Local', False),
+    ]),
+]
+
+FINGERPRINTING_OPTIONS = [
+    config.BoolOption("setting", "ignore_existing_acoustid_fingerprints", False),
+    config.TextOption("setting", "fingerprinting_system", "acoustid"),
+    config.TextOption("setting", "acoustid_fpcalc", ""),
+    config.TextOption("setting", "acoustid_apikey", ""),
+]
+
+GENERAL_OPTIONS = [
+    config.TextOption("setting", "server_host", MUSICBRAINZ_SERVERS[0]),
+    config.IntOption("setting", "server_port", 443),
+    config.BoolOption("setting", "analyze_new_files", False),
+    config.BoolOption("setting", "ignore_file_mbids", False),
+    config.TextOption("persist", "oauth_refresh_token", ""),
+    config.TextOption("persist", "oauth_refresh_token_scopes", ""),
+    config.TextOption("persist", "oauth_access_token", ""),
+    config.IntOption("persist", "oauth_access_token_expires", 0),
+    config.TextOption("persist", "oauth_username", ""),
+    config.BoolOption("setting", "check_for_updates", True),
+    config.IntOption("setting", "update_check_days", 7),
+    config.IntOption("setting", "update_level", 0),
+    config.IntOption("persist", "last_update_check", 0),
+]
+
+GENRES_OPTIONS = [
+    config.BoolOption("setting", "use_genres", False),
+    config.IntOption("setting", "max_genres", 5),
+    config.IntOption("setting", "min_genre_usage", 90),
+    config.TextOption("setting", "genres_filter", "-seen live\n-favorites\n-fixme\n-owned"),
+    config.TextOption("setting", "join_genres", ""),
+    config.BoolOption("setting", "only_my_genres", False),
+    config.BoolOption("setting", "artists_genres", False),
+    config.BoolOption("setting", "folksonomy_tags", False),
+]
+
+INTERFACE_OPTIONS = [
+    config.BoolOption("setting", "toolbar_show_labels", True),
+    config.BoolOption("setting", "toolbar_multiselect", False),
+    config.BoolOption("setting", "builtin_search", False),
+    config.BoolOption("setting", "use_adv_search_syntax", False),
+    config.BoolOption("setting", "quit_confirmation", True),
+    config.TextOption("setting", "ui_language", ""),
+    config.BoolOption("setting", "starting_directory", False),
+    config.TextOption("setting", "starting_directory_path", _default_starting_dir),
+    config.TextOption("setting", "load_image_behavior", "append"),
+    config.ListOption("setting", "toolbar_layout", [
+        'add_directory_action',
+        'add_files_action',
+        'separator',
+        'cluster_action',
+        'separator',
+        'autotag_action',
+        'analyze_action',
+        'browser_lookup_action',
+        'separator',
+        'save_action',
+        'view_info_action',
+        'remove_action',
+        'separator',
+        'cd_lookup_action',
+        'separator',
+        'submit_acoustid_action',
+    ]),
+]
+
+INTERFACE_TOP_TAGS_OPTIONS = [
+    config.ListOption("setting", "metadatabox_top_tags", [
+        "title",
+        "artist",
+        "album",
+        "tracknumber",
+        "~length",
+        "date",
+    ]),
+]
+
+LOG_OPTIONS = [
+    config.IntOption("setting", "log_verbosity", log.VERBOSITY_DEFAULT),
+]
+
+MATCHING_OPTIONS = [
+    config.FloatOption("setting", "file_lookup_threshold", 0.7),
+    config.FloatOption("setting", "cluster_lookup_threshold", 0.7),
+    config.FloatOption("setting", "track_matching_threshold", 0.4),
+]
+
+METADATA_OPTIONS = [
+    config.TextOption("setting", "va_name", "Various Artists"),
+    config.TextOption("setting", "nat_name", "[non-album tracks]"),
+    config.TextOption("setting", "artist_locale", "en"),
+    config.BoolOption("setting", "translate_artist_names", False),
+    config.BoolOption("setting", "release_ars", True),
+    config.BoolOption("setting", "track_ars", False),
+    config.BoolOption("setting", "convert_punctuation", True),
+    config.BoolOption("setting", "standardize_artists", False),
+    config.BoolOption("setting", "standardize_instruments", True),
+]
+
+NETWORK_OPTIONS = [
+    config.BoolOption("setting", "use_proxy", False),
+    config.TextOption("setting", "proxy_server_host", ""),
+    config.IntOption("setting", "proxy_server_port", 80),
+    config.TextOption("setting", "proxy_username", ""),
+    config.TextOption("setting", "proxy_password", ""),
+    config.BoolOption("setting", "browser_integration", True),
+    config.IntOption("setting", "browser_integration_port", 8000),
+    config.BoolOption("setting", "browser_integration_localhost_only", True),
+    config.BoolOption("setting", "network_concurrent_requests", False),
+    config.ListOption("setting", "rate_policies", []),
+]
+
+PLUGINS_OPTIONS = [
+    config.ListOption("setting", "enabled_plugins", []),
+]
+
+RATINGS_OPTIONS = [
+    config.BoolOption("setting", "enable_ratings", False),
+    config.TextOption("setting", "rating_user_email", "users@musicbrainz.org"),
+    config.BoolOption("setting", "submit_ratings", True),
+    config.IntOption("setting", "rating_steps", 6),
+]
+
+RELEASES_OPTIONS = [
+    config.ListOption("setting", "release_type_scores", _release_type_scores),
+    config.ListOption("setting", "preferred_release_countries", []),
+    config.ListOption("setting", "preferred_release_formats", []),
+]
+
+RENAMING_OPTIONS = [
+    config.BoolOption("setting", "windows_compatibility", True),
+    config.BoolOption("setting", "ascii_filenames", False),
+    config.BoolOption("setting", "rename_files", False),
+    config.TextOption(
+        "setting",
+        "file_naming_format",
+        DEFAULT_FILE_NAMING_FORMAT,
+    ),
+    config.BoolOption("setting", "move_files", False),
+    config.TextOption("setting", "move_files_to", _default_music_dir),
+    config.BoolOption("setting", "move_additional_files", False),
+    config.TextOption("setting", "move_additional_files_pattern", "*.jpg *.png"),
+    config.BoolOption("setting", "delete_empty_dirs", True),
+]
+
+SCRIPTING_OPTIONS = [
+    config.BoolOption("setting", "enable_tagger_scripts", False),
+    config.ListOption("setting", "list_of_scripts", []),
+]
+
+TAGS_OPTIONS = [
+    config.BoolOption("setting", "dont_write_tags", False),
+    config.BoolOption("setting", "preserve_timestamps", False),
+    config.BoolOption("setting", "clear_existing_tags", False),
+    config.BoolOption("setting", "remove_id3_from_flac", False),
+    config.BoolOption("setting", "remove_ape_from_mp3", False),
+    config.TextOption("setting", "preserved_tags", ""),
+]
+
+TAGS_COMPATIBILITY_OPTIONS = [
+    config.BoolOption("setting", "write_id3v1", True),
+    config.BoolOption("setting", "write_id3v23", True),
+    config.TextOption("setting", "id3v2_encoding", "utf-16"),
+    config.TextOption("setting", "id3v23_join_with", "/"),
+    config.BoolOption("setting", "itunes_compatible_grouping", False),
+    config.BoolOption("setting", "aac_save_ape", True),
+    config.BoolOption("setting", "remove_ape_from_aac", False),
+    config.BoolOption("setting", "ac3_save_ape", True),
+    config.BoolOption("setting", "remove_ape_from_ac3", False),
+]
@@ -48,6 +48,7 @@ class ExtensionPoint(object):
             label = uuid.uuid4()
         self.label = label
         self.__dict = defaultdict(list)
+        self.__version = 0
         _extension_points.append(self)
 
     def register(self, module, item):
@@ -59,8 +60,10 @@ class ExtensionPoint(object):
             # uncomment to debug internal extensions loaded at startup
             # print("ExtensionPoint: %s register <- item=%r" % (self.label, item))
         self.__dict[name].append(item)
+        self.__version += 1
 
     def unregister_module(self, name):
+        self.__version += 1
         try:
             del self.__dict[name]
         except KeyError:
@@ -74,6 +77,12 @@ class ExtensionPoint(object):
             # >>> #^^ no exception, after first read
             pass
 
+    @property
+    def version(self):
+        """A value which changes whenever iterating may yield different items."""
+        enabled_plugins = config.setting["enabled_plugins"] if config.setting else []
+        return (self.__version, tuple(enabled_plugins))
+
     def __iter__(self):
         enabled_plugins = config.setting["enabled_plugins"] if config.setting else []
         for name in self.__dict:
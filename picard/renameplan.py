@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import json
+import os.path
+
+from picard import (
+    config,
+    log,
+)
+from picard.file import File
+from picard.util import (
+    decode_filename,
+    pathcmp,
+)
+
+
+class RenameMove:
+
+    """A file move planned by a :class:`RenamePlan`."""
+
+    __slots__ = ('source', 'target', 'additional')
+
+    def __init__(self, source, target, additional=False):
+        self.source = source
+        self.target = target
+        self.additional = additional
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'target': self.target,
+            'type': 'additional' if self.additional else 'file',
+        }
+
+    def __repr__(self):
+        return '<RenameMove %r => %r>' % (self.source, self.target)
+
+
+class RenamePlan:
+
+    """Plans the moves of a batch of saved files before running any of them.
+
+    Files are added in the order they are saved. Name collisions are
+    resolved in memory with the same " (n)" suffixes as File._rename, using
+    one listing per target directory and the names already taken or freed
+    by earlier moves of the plan. Each source directory is scanned for
+    additional files once, they move with the first file leaving it.
+
+    The moves are listed in :attr:`moves` and can be exported to JSON
+    without touching any file, e.g. for a dry run.
+    """
+
+    def __init__(self, settings=None, loaded_files=None):
+        if settings is None:
+            settings = config.setting
+        self.settings = settings
+        # File names which are loaded in the tagger and never moved as
+        # additional files
+        self.loaded_files = loaded_files if loaded_files is not None else {}
+        self.moves = []
+        self._names = {}
+        self._scanned = set()
+        self._additional_regexes = None
+
+    def add_file(self, file, metadata=None):
+        """Plans the move of ``file`` saved with ``metadata``.
+
+        Returns the same as :meth:`add`.
+        """
+        if metadata is None:
+            metadata = file.metadata
+        new_filename = file.filename
+        if self.settings["rename_files"] or self.settings["move_files"]:
+            new_filename = file.make_filename(file.filename, metadata, self.settings)
+        return self.add(file.filename, new_filename)
+
+    def add(self, old_filename, new_filename):
+        """Plans the move of ``old_filename`` to ``new_filename``.
+
+        Returns a tuple of the file name the file will have, with collisions
+        resolved, and a list of (old path, new path) tuples of the additional
+        files moving with it.
+        """
+        if pathcmp(old_filename, new_filename):
+            return old_filename, []
+        target = self._resolve(old_filename, new_filename)
+        if not pathcmp(old_filename, target):
+            self._taken(os.path.dirname(old_filename)).discard(self._key(old_filename))
+            self._taken(os.path.dirname(target)).add(self._key(target))
+            self.moves.append(RenameMove(old_filename, target))
+        additional_files = self._additional_files(old_filename, target)
+        for source, additional_target in additional_files:
+            self._taken(os.path.dirname(source)).discard(self._key(source))
+            self._taken(os.path.dirname(additional_target)).add(self._key(additional_target))
+            self.moves.append(RenameMove(source, additional_target, additional=True))
+        return target, additional_files
+
+    def export(self):
+        """Returns the planned moves as a list of dicts."""
+        return [move.to_dict() for move in self.moves]
+
+    def write(self, fp):
+        """Writes the planned moves as JSON to the file object ``fp``."""
+        json.dump(self.export(), fp, indent=2)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.basename(path))
+
+    def _taken(self, dirname):
+        """Returns the set of names in ``dirname`` after the planned moves."""
+        try:
+            return self._names[dirname]
+        except KeyError:
+            pass
+        names = set()
+        try:
+            for entry in os.scandir(dirname):
+                names.add(os.path.normcase(entry.name))
+        except FileNotFoundError:
+            pass
+        except OSError as why:
+            log.warning("Could not read directory %r: %s", dirname, why)
+        self._names[dirname] = names
+        return names
+
+    def _resolve(self, old_filename, new_filename):
+        base, ext = os.path.splitext(new_filename)
+        taken = self._taken(os.path.dirname(new_filename))
+        candidate = new_filename
+        i = 1
+        while not pathcmp(old_filename, candidate) and self._key(candidate) in taken:
+            candidate = "%s (%d)%s" % (base, i, ext)
+            i += 1
+        return candidate
+
+    def _additional_files(self, old_filename, new_filename):
+        if not (self.settings["move_files"] and self.settings["move_additional_files"]):
+            return []
+        old_path = os.path.dirname(old_filename)
+        new_path = os.path.dirname(new_filename)
+        if old_path == new_path or old_path in self._scanned:
+            return []
+        self._scanned.add(old_path)
+        if self._additional_regexes is None:
+            self._additional_regexes = File.additional_files_regexes(
+                self.settings["move_additional_files_pattern"])
+        if not self._additional_regexes:
+            return []
+        try:
+            paths = File.find_additional_files(old_path, self._additional_regexes)
+        except OSError as why:
+            log.error("Failed to scan %r: %s", old_path, why)
+            return []
+        moves = []
+        for path in sorted(paths):
+            if decode_filename(path) in self.loaded_files:
+                log.debug("File loaded in the tagger, not moving %r", path)
+                continue
+            moves.append((path, os.path.join(new_path, os.path.basename(path))))
+        return moves
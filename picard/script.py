@@ -25,6 +25,7 @@ from functools import reduce
 from inspect import getfullargspec
 import operator
 import re
+import threading
 import unicodedata
 
 from picard import config
@@ -34,6 +35,7 @@ from picard.metadata import (
 )
 from picard.plugin import ExtensionPoint
 from picard.util import uniqify
+from picard.util.lrucache import LRUCache
 
 
 class ScriptError(Exception):
@@ -137,6 +139,136 @@ class ScriptExpression(list):
         return "".join([item.eval(state) for item in self])
 
 
+class CompiledExpression(ScriptExpression):
+
+    """A ScriptExpression evaluated by its compiled function.
+
+    Used for the arguments of functions which evaluate their arguments
+    themselves, so those still receive the parsed expression.
+    """
+
+    def __init__(self, expression, compiled):
+        super().__init__(expression)
+        self.compiled = compiled
+
+    def eval(self, state):
+        return self.compiled(state)
+
+
+def compile_script(node, functions):
+    """Compile a parsed script into a function taking the parser and returning a string.
+
+    Functions are looked up in ``functions`` once, and runs of plain text
+    are folded into constants.
+    """
+    if isinstance(node, ScriptText):
+        text = str(node)
+        return lambda parser: text
+    elif isinstance(node, ScriptVariable):
+        name = normalize_tagname(node.name)
+        return lambda parser: parser.context.get(name, "")
+    elif isinstance(node, ScriptFunction):
+        return _compile_function(node, functions)
+    elif isinstance(node, ScriptExpression):
+        return _compile_expression(node, functions)
+    return node.eval
+
+
+def _compile_function(node, functions):
+    try:
+        function, eval_args, num_args = functions[node.name]
+    except KeyError:
+        raise ScriptUnknownFunction("Unknown function '%s'" % node.name)
+
+    if eval_args:
+        args = [compile_script(arg, functions) for arg in node.args]
+        if not args:
+            return lambda parser: function(parser)
+        elif len(args) == 1:
+            arg0 = args[0]
+            return lambda parser: function(parser, arg0(parser))
+        return lambda parser: function(parser, *[arg(parser) for arg in args])
+
+    args = [CompiledExpression(arg, compile_script(arg, functions))
+            if isinstance(arg, ScriptExpression) else arg
+            for arg in node.args]
+    return lambda parser: function(parser, *args)
+
+
+def _compile_expression(expression, functions):
+    parts = []
+    text = []
+    for item in expression:
+        if isinstance(item, ScriptText):
+            text.append(item)
+            continue
+        if text:
+            parts.append("".join(text))
+            text = []
+        parts.append(compile_script(item, functions))
+    if text:
+        parts.append("".join(text))
+
+    if not parts:
+        return lambda parser: ""
+    elif len(parts) == 1:
+        part = parts[0]
+        if isinstance(part, str):
+            return lambda parser: part
+        return lambda parser: "".join([part(parser)])
+
+    parts = [(lambda parser, text=part: text) if isinstance(part, str) else part
+             for part in parts]
+    return lambda parser: "".join([part(parser) for part in parts])
+
+
+class CompiledScriptCache(object):
+
+    """Least recently used cache of compiled scripts.
+
+    Scripts are keyed on their full text. All entries are dropped as soon
+    as the script function registry changes, since compiled scripts refer
+    to the functions registered at compile time.
+    """
+
+    def __init__(self, max_size=256):
+        self._cache = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, script, version, compile_func):
+        """Return the compiled ``script``, calling ``compile_func(script)`` if not cached."""
+        with self._lock:
+            if version != self._version:
+                self._cache.clear()
+                self._version = version
+            try:
+                compiled = self._cache[script]
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return compiled
+        compiled = compile_func(script)
+        with self._lock:
+            self.misses += 1
+            if version == self._version:
+                self._cache[script] = compiled
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._version = None
+
+    def stats(self):
+        """Return the number of cached scripts, cache hits and cache misses."""
+        with self._lock:
+            return {'size': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
 def isidentif(ch):
     return ch.isalnum() or ch == '_'
 
@@ -156,7 +288,9 @@ Grammar:
 """
 
     _function_registry = ExtensionPoint(label='function_registry')
-    _cache = {}
+    _functions = {}
+    _functions_version = None
+    _cache = CompiledScriptCache()
 
     def __raise_eof(self):
         raise ScriptEndOfFile("Unexpected end of script at position %d, line %d" % (self._x, self._y))
@@ -271,10 +405,17 @@ Grammar:
                 tokens.append(self.parse_text(top))
         return (tokens, ch)
 
+    @classmethod
+    def _get_functions(cls):
+        version = cls._function_registry.version
+        if cls._functions_version != version:
+            cls._functions = dict(cls._function_registry)
+            cls._functions_version = version
+        return version, cls._functions
+
     def load_functions(self):
-        self.functions = {}
-        for name, item in ScriptParser._function_registry:
-            self.functions[name] = item
+        version, self.functions = self._get_functions()
+        return version
 
     def parse(self, script, functions=False):
         """Parse the script."""
@@ -287,15 +428,19 @@ Grammar:
             self.load_functions()
         return self.parse_expression(True)[0]
 
+    def compile(self, script):
+        """Parse and compile the script, see compile_script."""
+        version = self.load_functions()
+        functions = self.functions
+        return ScriptParser._cache.get(
+            script, version,
+            lambda script: compile_script(self.parse(script, True), functions))
+
     def eval(self, script, context=None, file=None):
         """Parse and evaluate the script."""
         self.context = context if context is not None else Metadata()
         self.file = file
-        self.load_functions()
-        key = hash(script)
-        if key not in ScriptParser._cache:
-            ScriptParser._cache[key] = self.parse(script, True)
-        return ScriptParser._cache[key].eval(self)
+        return self.compile(script)(self)
 
 
 def enabled_tagger_scripts_texts():
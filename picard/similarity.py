@@ -17,10 +17,14 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+from functools import lru_cache
 import re
 
 from picard.util import strip_non_alnum
-from picard.util.astrcmp import astrcmp
+from picard.util.astrcmp import (
+    astrcmp,
+    similarity2_words,
+)
 
 
 def normalize(orig_string):
@@ -44,29 +48,23 @@ def similarity(a1, b1):
 _split_words_re = re.compile(r'\W+', re.UNICODE)
 
 
+@lru_cache(maxsize=4096)
+def tokenize_words(string):
+    """Splits a string into a tuple of lower case words, caching the result."""
+    return tuple(filter(bool, _split_words_re.split(string.lower())))
+
+
 def similarity2(a, b):
     """Calculates similarity of a multi-word strings."""
-    alist = list(filter(bool, _split_words_re.split(a.lower())))
-    blist = list(filter(bool, _split_words_re.split(b.lower())))
-    total = 0
-    score = 0.0
-    if len(alist) > len(blist):
-        alist, blist = blist, alist
-    for av in alist:
-        ms = 0.0
-        mp = None
-        for position, bv in enumerate(blist):
-            s = astrcmp(av, bv)
-            if s > ms:
-                ms = s
-                mp = position
-        if mp is not None:
-            score += ms
-            if ms > 0.6:
-                del blist[mp]
-        total += 1
-    total += len(blist) * 0.4
-    if total:
-        return score / total
-    else:
-        return 0
+    return similarity2_words(tokenize_words(a), tokenize_words(b))
+
+
+def similarity2_many(query, candidates):
+    """Calculates the similarity of ``query`` to each of ``candidates``.
+
+    Returns a list of scores in the order of ``candidates``, each identical to
+    what :func:`similarity2` returns for the pair.
+    """
+    words = tokenize_words(query)
+    return [similarity2_words(words, tokenize_words(candidate))
+            for candidate in candidates]
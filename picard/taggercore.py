@@ -0,0 +1,585 @@
+# -*- coding: utf-8 -*-
+#
+# Picard, the next-generation MusicBrainz tagger
+# Copyright (C) 2004 Robert Kaye
+# Copyright (C) 2006 Lukáš Lalinský
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+from functools import partial
+from itertools import chain
+import logging
+from operator import attrgetter
+import os.path
+import platform
+import shutil
+import sys
+
+from PyQt5 import QtCore
+
+from picard import (
+    acoustid,
+    config,
+    log,
+)
+from picard.acoustid.manager import AcoustIDManager
+from picard.album import (
+    Album,
+    NatAlbum,
+    run_album_post_removal_processors,
+)
+from picard.albumloader import AlbumLoader
+from picard.cluster import (
+    Cluster,
+    ClusterJob,
+    ClusterList,
+    UnclusteredFiles,
+)
+from picard.config_upgrade import upgrade_config
+from picard.const import (
+    CACHE_DIR,
+    USER_DIR,
+    USER_PLUGIN_DIR,
+)
+from picard.const.sys import IS_FROZEN
+from picard.coverart.imagestore import image_store
+from picard.entitycache import EntityCache
+from picard.file import File
+from picard.fileloader import FileLoader
+from picard.filesaver import FileSaver
+from picard.filescanner import FileScanner
+from picard.i18n import setup_gettext
+from picard.metadatacache import MetadataCache
+from picard.pluginmanager import PluginManager
+from picard.releasegroup import ReleaseGroup
+from picard.track import (
+    NonAlbumTrack,
+    Track,
+)
+from picard.util import (
+    check_io_encoding,
+    mbid_validate,
+    thread,
+    uniqify,
+    versions,
+)
+from picard.webservice import WebService
+from picard.webservice.api_helpers import (
+    AcoustIdAPIHelper,
+    MBAPIHelper,
+)
+
+
+# A "fix" for https://bugs.python.org/issue1438480
+def _patched_shutil_copystat(src, dst, *, follow_symlinks=True):
+    try:
+        _orig_shutil_copystat(src, dst, follow_symlinks=follow_symlinks)
+    except OSError:
+        pass
+
+
+_orig_shutil_copystat = shutil.copystat
+shutil.copystat = _patched_shutil_copystat
+
+
+class TaggerCore:
+
+    """The parts of the tagger application which do not need a GUI.
+
+    This is mixed into the Qt application classes, :class:`picard.tagger.Tagger`
+    for the GUI and :class:`picard.batch.BatchTagger` for headless batch runs.
+    Both have to define the ``tagger_stats_changed``, ``cluster_added``,
+    ``cluster_removed``, ``album_added`` and ``album_removed`` signals and a
+    ``window`` providing ``set_statusbar_message()``.
+    """
+
+    _debug = False
+
+    def _setup_core(self, picard_args, localedir):
+        self._no_plugins = picard_args.no_plugins
+
+        self.set_log_level(config.setting['log_verbosity'])
+
+        if picard_args.debug or "PICARD_DEBUG" in os.environ:
+            self.set_log_level(logging.DEBUG)
+
+        # FIXME: Figure out what's wrong with QThreadPool.globalInstance().
+        # It's a valid reference, but its start() method doesn't work.
+        self.thread_pool = QtCore.QThreadPool(self)
+
+        # Provide a separate thread pool for operations that should not be
+        # delayed by longer background processing tasks, e.g. because the user
+        # expects instant feedback instead of waiting for a long list of
+        # operations to finish.
+        self.priority_thread_pool = QtCore.QThreadPool(self)
+
+        # Files are parsed on their own thread pool and handed back to the
+        # main thread in batches.
+        self.file_loader = FileLoader(config.setting["file_loader_threads"], self)
+        # Directories are walked and files opened on a separate thread pool.
+        self.file_scanner = FileScanner(parent=self)
+        # Files are saved in parallel, renames are ordered per directory.
+        self.file_saver = FileSaver(config.setting["file_saver_threads"], self)
+        # Albums of files with release MBIDs are loaded in order of need.
+        self.album_loader = AlbumLoader(self)
+        self.metadata_cache = MetadataCache(os.path.join(CACHE_DIR, 'metadata.sqlite'))
+        # Parsed MusicBrainz documents, consulted before the web service.
+        self.entity_cache = EntityCache(os.path.join(CACHE_DIR, 'entities.sqlite'))
+
+        # Image data above this limit is moved from memory to a pack file.
+        image_store.memory_limit = config.setting["image_memory_limit_mb"] * 1024 * 1024
+
+        # Setup logging
+        log.debug("Starting Picard from %r", os.path.abspath(__file__))
+        log.debug("Platform: %s %s %s", platform.platform(),
+                  platform.python_implementation(), platform.python_version())
+        log.debug("Versions: %s", versions.as_string())
+        log.debug("Configuration file path: %r", config.config.fileName())
+
+        log.debug("User directory: %r", os.path.abspath(USER_DIR))
+
+        # for compatibility with pre-1.3 plugins
+        QtCore.QObject.tagger = self
+        QtCore.QObject.config = config
+        QtCore.QObject.log = log
+
+        check_io_encoding()
+
+        # Must be before config upgrade because upgrade dialogs need to be
+        # translated
+        setup_gettext(localedir, config.setting["ui_language"], log.debug)
+
+        upgrade_config(config.config)
+
+        self.webservice = WebService()
+        self.mb_api = MBAPIHelper(self.webservice)
+        self.acoustid_api = AcoustIdAPIHelper(self.webservice)
+
+        # Initialize fingerprinting
+        self._acoustid = acoustid.AcoustIDClient()
+        self._acoustid.init()
+
+        # Load plugins
+        self.pluginmanager = PluginManager()
+        if not self._no_plugins:
+            if IS_FROZEN:
+                self.pluginmanager.load_plugins_from_directory(os.path.join(os.path.dirname(sys.argv[0]), "plugins"))
+            else:
+                mydir = os.path.dirname(os.path.abspath(__file__))
+                self.pluginmanager.load_plugins_from_directory(os.path.join(mydir, "plugins"))
+
+            if not os.path.exists(USER_PLUGIN_DIR):
+                os.makedirs(USER_PLUGIN_DIR)
+            self.pluginmanager.load_plugins_from_directory(USER_PLUGIN_DIR)
+
+        self.acoustidmanager = AcoustIDManager()
+
+        self.files = {}
+        self.clusters = ClusterList()
+        self.cluster_jobs = set()
+        self.albums = {}
+        self.release_groups = {}
+        self.mbid_redirects = {}
+        self.unclustered_files = UnclusteredFiles()
+        self.nats = None
+        self.exit_cleanup = []
+        self.stopping = False
+
+    def register_cleanup(self, func):
+        self.exit_cleanup.append(func)
+
+    def run_cleanup(self):
+        for f in self.exit_cleanup:
+            f()
+
+    def set_log_level(self, level):
+        self._debug = level == logging.DEBUG
+        log.set_level(level)
+
+    def exit(self):
+        if self.stopping:
+            return
+        self.stopping = True
+        log.debug("Picard stopping")
+        self._acoustid.done()
+        self.album_loader.clear()
+        self.file_scanner.stop()
+        self.file_loader.wait_for_done()
+        self.thread_pool.waitForDone()
+        self.file_saver.wait_for_done()
+        self.priority_thread_pool.waitForDone()
+        self.metadata_cache.close()
+        self.entity_cache.close()
+        self.webservice.stop()
+        self.run_cleanup()
+        QtCore.QCoreApplication.processEvents()
+
+    def event(self, event):
+        if isinstance(event, thread.ProxyToMainEvent):
+            event.run()
+            return True
+        return super().event(event)
+
+    def move_files_to_album(self, files, albumid=None, album=None):
+        """Move `files` to tracks on album `albumid`."""
+        if album is None:
+            album = self.load_album(albumid)
+        if album.loaded:
+            album.match_files(files)
+        else:
+            for file in list(files):
+                file.move(album.unmatched_files)
+
+    def move_file_to_album(self, file, albumid):
+        """Move `file` to a track on album `albumid`."""
+        self.move_files_to_album([file], albumid)
+
+    def move_file_to_track(self, file, albumid, recordingid):
+        """Move `file` to recording `recordingid` on album `albumid`."""
+        album = self.load_album(albumid)
+        file.move(album.unmatched_files)
+        album.run_when_loaded(partial(album.match_files, [file],
+                                      recordingid=recordingid))
+
+    def create_nats(self):
+        if self.nats is None:
+            self.nats = NatAlbum()
+            self.albums["NATS"] = self.nats
+            self.album_added.emit(self.nats)
+            if self.nats.item:
+                self.nats.item.setExpanded(True)
+        return self.nats
+
+    def move_file_to_nat(self, file, recordingid, node=None):
+        self.create_nats()
+        file.move(self.nats.unmatched_files)
+        nat = self.load_nat(recordingid, node=node)
+        nat.run_when_loaded(partial(file.move, nat))
+        if nat.loaded:
+            self.nats.update()
+
+    def _file_loaded(self, file, target=None):
+        if file is None or file.has_error():
+            return
+
+        if target is not None:
+            self.move_files([file], target)
+            return
+
+        if not config.setting["ignore_file_mbids"]:
+            recordingid = file.metadata['musicbrainz_recordingid']
+            is_valid_recordingid = mbid_validate(recordingid)
+
+            albumid = file.metadata['musicbrainz_albumid']
+            is_valid_albumid = mbid_validate(albumid)
+
+            if is_valid_albumid:
+                self.load_album(albumid, queued=True)
+
+            if is_valid_albumid and is_valid_recordingid:
+                log.debug("%r has release (%s) and recording (%s) MBIDs, moving to track...",
+                          file, albumid, recordingid)
+                self.move_file_to_track(file, albumid, recordingid)
+                return
+
+            if is_valid_albumid:
+                log.debug("%r has only release MBID (%s), moving to album...",
+                          file, albumid)
+                self.move_file_to_album(file, albumid)
+                return
+
+            if is_valid_recordingid:
+                log.debug("%r has only recording MBID (%s), moving to non-album track...",
+                          file, recordingid)
+                self.move_file_to_nat(file, recordingid)
+                return
+
+        # fallback on analyze if nothing else worked
+        if config.setting['analyze_new_files'] and file.can_analyze():
+            log.debug("Trying to analyze %r ...", file)
+            self.analyze([file])
+
+    def move_files(self, files, target):
+        if target is None:
+            log.debug("Aborting move since target is invalid")
+            return
+        if isinstance(target, (Track, Cluster)):
+            for file in files:
+                file.move(target)
+                QtCore.QCoreApplication.processEvents()
+        elif isinstance(target, File):
+            for file in files:
+                file.move(target.parent)
+                QtCore.QCoreApplication.processEvents()
+        elif isinstance(target, Album):
+            self.move_files_to_album(files, album=target)
+        elif isinstance(target, ClusterList):
+            self.cluster(files)
+
+    def add_files(self, filenames, target=None):
+        """Add files to the tagger."""
+        self.file_scanner.scan_files(filenames, partial(self._add_scanned_files, target=target),
+                                     known=self.files)
+
+    def _add_scanned_files(self, files, target=None, directory=None):
+        new_files = []
+        for file in files:
+            if file.filename not in self.files:
+                self.files[file.filename] = file
+                new_files.append(file)
+        if new_files:
+            if directory is not None:
+                mparms = {
+                    'count': len(new_files),
+                    'directory': directory,
+                }
+                log.debug("Adding %(count)d files from '%(directory)r'" %
+                          mparms)
+                self.window.set_statusbar_message(
+                    ngettext(
+                        "Adding %(count)d file from '%(directory)s' ...",
+                        "Adding %(count)d files from '%(directory)s' ...",
+                        len(new_files)),
+                    mparms,
+                    translate=None,
+                    echo=None
+                )
+            log.debug("Adding files %r", new_files)
+            new_files.sort(key=lambda x: x.filename)
+            if target is self.unclustered_files:
+                target = None
+            self.file_loader.load(new_files, partial(self._files_loaded, target=target))
+
+    def _files_loaded(self, files, target=None):
+        if target is None:
+            self.unclustered_files.add_files(files)
+        else:
+            for file in files:
+                file.update()
+        for file in files:
+            self._file_loaded(file, target=target)
+
+    def add_directory(self, path):
+        self.file_scanner.scan_directory(path, partial(self._add_scanned_files, directory=path),
+                                         recursive=config.setting['recursively_add_files'],
+                                         known=self.files)
+
+    def get_files_from_objects(self, objects, save=False):
+        """Return list of files from list of albums, clusters, tracks or files."""
+        return uniqify(chain(*[obj.iterfiles(save) for obj in objects]))
+
+    def save(self, objects):
+        """Save the specified objects."""
+        files = self.get_files_from_objects(objects, save=True)
+        for file in files:
+            file.save()
+
+    def load_album(self, album_id, discid=None, queued=False):
+        """Return the album `album_id`, loading it if it is new.
+
+        With `queued` the album is loaded through the album loader, which
+        prioritizes the albums with the most files waiting for them. Without
+        it, an album still waiting in the album loader is loaded right away.
+        """
+        album_id = self.mbid_redirects.get(album_id, album_id)
+        album = self.albums.get(album_id)
+        if album:
+            log.debug("Album %s already loaded.", album_id)
+            album.add_discid(discid)
+            if not queued:
+                self.album_loader.load_now(album)
+            return album
+        album = Album(album_id, discid=discid)
+        self.albums[album_id] = album
+        self.album_added.emit(album)
+        if queued:
+            self.album_loader.queue(album)
+        else:
+            album.load()
+        return album
+
+    def load_nat(self, nat_id, node=None):
+        self.create_nats()
+        nat = self.get_nat_by_id(nat_id)
+        if nat:
+            log.debug("NAT %s already loaded.", nat_id)
+            return nat
+        nat = NonAlbumTrack(nat_id)
+        self.nats.tracks.append(nat)
+        self.nats.update(True)
+        if node:
+            nat._parse_recording(node)
+        else:
+            nat.load()
+        return nat
+
+    def get_nat_by_id(self, nat_id):
+        if self.nats is not None:
+            for nat in self.nats.tracks:
+                if nat.id == nat_id:
+                    return nat
+
+    def get_release_group_by_id(self, rg_id):
+        return self.release_groups.setdefault(rg_id, ReleaseGroup(rg_id))
+
+    def remove_files(self, files, from_parent=True):
+        """Remove files from the tagger."""
+        for file in files:
+            if file.filename in self.files:
+                file.clear_lookup_task()
+                self._acoustid.stop_analyze(file)
+                del self.files[file.filename]
+                file.remove(from_parent)
+        for job in self.cluster_jobs:
+            job.discard_files(files)
+        self.tagger_stats_changed.emit()
+
+    def remove_album(self, album):
+        """Remove the specified album."""
+        log.debug("Removing %r", album)
+        if album.id not in self.albums:
+            return
+        album.stop_loading()
+        self.album_loader.remove(album)
+        self.remove_files(self.get_files_from_objects([album]))
+        del self.albums[album.id]
+        if album.release_group:
+            album.release_group.remove_album(album.id)
+        if album == self.nats:
+            self.nats = None
+        self.album_removed.emit(album)
+        run_album_post_removal_processors(album)
+        self.tagger_stats_changed.emit()
+
+    def remove_nat(self, track):
+        """Remove the specified non-album track."""
+        log.debug("Removing %r", track)
+        self.remove_files(self.get_files_from_objects([track]))
+        self.nats.tracks.remove(track)
+        if not self.nats.tracks:
+            self.remove_album(self.nats)
+        else:
+            self.nats.update(True)
+
+    def remove_cluster(self, cluster):
+        """Remove the specified cluster."""
+        if not cluster.special:
+            log.debug("Removing %r", cluster)
+            files = list(cluster.files)
+            cluster.files = []
+            cluster.clear_lookup_task()
+            self.remove_files(files, from_parent=False)
+            self.clusters.remove(cluster)
+            self.cluster_removed.emit(cluster)
+
+    def remove(self, objects):
+        """Remove the specified objects."""
+        files = []
+        for obj in objects:
+            if isinstance(obj, File):
+                files.append(obj)
+            elif isinstance(obj, NonAlbumTrack):
+                self.remove_nat(obj)
+            elif isinstance(obj, Track):
+                files.extend(obj.linked_files)
+            elif isinstance(obj, Album):
+                self.window.set_statusbar_message(
+                    N_("Removing album %(id)s: %(artist)s - %(album)s"),
+                    {
+                        'id': obj.id,
+                        'artist': obj.metadata['albumartist'],
+                        'album': obj.metadata['album']
+                    }
+                )
+                self.remove_album(obj)
+            elif isinstance(obj, UnclusteredFiles):
+                files.extend(list(obj.files))
+            elif isinstance(obj, Cluster):
+                self.remove_cluster(obj)
+        if files:
+            self.remove_files(files)
+
+    @property
+    def use_acoustid(self):
+        return config.setting["fingerprinting_system"] == "acoustid"
+
+    def analyze(self, objs):
+        """Analyze the file(s)."""
+        if not self.use_acoustid:
+            return
+        files = self.get_files_from_objects(objs)
+        for file in files:
+            file.set_pending()
+            self._acoustid.analyze(file, partial(file._lookup_finished,
+                                                 File.LOOKUP_ACOUSTID))
+
+    def generate_fingerprints(self, objs):
+        """Generate the fingerprints without matching the files."""
+        if not self.use_acoustid:
+            return
+        files = self.get_files_from_objects(objs)
+
+        def finished(file, result):
+            file.acoustid_update()
+            file.clear_pending()
+
+        for file in files:
+            file.set_pending()
+            self._acoustid.fingerprint(file, partial(finished, file))
+
+    # =======================================================================
+    #  Metadata-based lookups
+    # =======================================================================
+
+    def autotag(self, objects):
+        for obj in objects:
+            if obj.can_autotag():
+                obj.lookup_metadata()
+
+    # =======================================================================
+    #  Clusters
+    # =======================================================================
+
+    def cluster(self, objs):
+        """Group files with similar metadata to 'clusters'."""
+        log.debug("Clustering %r", objs)
+        if len(objs) <= 1 or self.unclustered_files in objs:
+            files = list(self.unclustered_files.files)
+        else:
+            files = self.get_files_from_objects(objs)
+        job = ClusterJob(files, 1.0, self._add_cluster_files,
+                         finished=self.cluster_jobs.discard)
+        self.cluster_jobs.add(job)
+        job.run()
+
+    def _add_cluster_files(self, name, artist, files):
+        cluster = self.load_cluster(name, artist)
+        for file in sorted(files, key=attrgetter('discnumber', 'tracknumber', 'base_filename')):
+            file.move(cluster)
+
+    def load_cluster(self, name, artist):
+        for cluster in self.clusters:
+            cm = cluster.metadata
+            if name == cm["album"] and artist == cm["albumartist"]:
+                return cluster
+        cluster = Cluster(name, artist)
+        self.clusters.append(cluster)
+        self.cluster_added.emit(cluster)
+        return cluster
+
+    def refresh(self, objs):
+        for obj in objs:
+            if obj.can_refresh():
+                obj.load(priority=True, refresh=True)
@@ -171,7 +171,7 @@ class Track(DataObject, Item):
 
     def update(self):
         if self.item:
-            self.item.update()
+            self.item.schedule_update()
 
     def iterfiles(self, save=False):
         for file in self.linked_files:
@@ -350,11 +350,12 @@ class NonAlbumTrack(Track):
         if config.setting["enable_ratings"]:
             mblogin = True
             inc += ["user-ratings"]
-        self.tagger.mb_api.get_track_by_id(self.id,
-                                           partial(self._recording_request_finished),
-                                           inc, mblogin=mblogin,
-                                           priority=priority,
-                                           refresh=refresh)
+        request = partial(self.tagger.mb_api.get_track_by_id, self.id,
+                          inc=inc, mblogin=mblogin, priority=priority,
+                          refresh=refresh)
+        self.tagger.entity_cache.request('recording', self.id, inc,
+                                         self._recording_request_finished,
+                                         request, refresh=refresh)
 
     def can_remove(self):
         return True
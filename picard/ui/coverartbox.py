@@ -145,6 +145,15 @@ class CoverArtThumbnail(ActiveLabel):
     def show(self):
         self.set_data(self.data, True)
 
+    @staticmethod
+    def image_data(image):
+        # Data of lazily loaded images can be gone if the file was changed
+        try:
+            return image.data
+        except CoverArtImageError as e:
+            log.warning("Can't read image data: %s", e)
+            return b''
+
     def decorate_cover(self, pixmap):
         offx, offy, w, h = self.scaled(1, 1, 121, 121)
         cover = QtGui.QPixmap(self.shadow)
@@ -184,7 +193,7 @@ class CoverArtThumbnail(ActiveLabel):
         except KeyError:
             if len(self.data) == 1:
                 pixmap = QtGui.QPixmap()
-                pixmap.loadFromData(self.data[0].data)
+                pixmap.loadFromData(self.image_data(self.data[0]))
                 pixmap = self.decorate_cover(pixmap)
             else:
                 limited = len(self.data) > MAX_COVERS_TO_STACK
@@ -217,7 +226,7 @@ class CoverArtThumbnail(ActiveLabel):
                         thumb = image
                     else:
                         thumb = QtGui.QPixmap()
-                        thumb.loadFromData(image.data)
+                        thumb.loadFromData(self.image_data(image))
                     thumb = self.decorate_cover(thumb)
                     x, y = (cx - thumb.width() // 2, cy - thumb.height() // 2)
                     painter.drawPixmap(x, y, thumb)
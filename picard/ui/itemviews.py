@@ -157,6 +157,8 @@ class MainPanel(QtWidgets.QSplitter):
         self._ignore_selection_changes = False
 
         TreeItem.window = window
+        AlbumItem.column_font = QtGui.QFont(self.font())
+        AlbumItem.column_font.setBold(True)
         TreeItem.base_color = self.palette().base().color()
         TreeItem.text_color = self.palette().text().color()
         TreeItem.text_color_secondary = self.palette() \
@@ -798,11 +800,7 @@ class AlbumTreeView(BaseTreeView):
         else:
             item = AlbumItem(album, True, self)
         item.setIcon(MainPanel.TITLE_COLUMN, AlbumItem.icon_cd)
-        for i, column in enumerate(MainPanel.columns):
-            font = item.font(i)
-            font.setBold(True)
-            item.setFont(i, font)
-            item.setText(i, album.column(column[1]))
+        item.invalidate_columns()
         self.add_cluster(album.unmatched_files, item)
 
     def remove_album(self, album):
@@ -810,17 +808,137 @@ class AlbumTreeView(BaseTreeView):
         self.takeTopLevelItem(self.indexOfTopLevelItem(album.item))
 
 
+class ItemUpdateQueue:
+
+    """Coalesces item updates until the event loop runs.
+
+    Each scheduled item is updated once per flush, with the update flags
+    of all requests combined. Items are updated from the leaves up, so
+    updates of parents requested by their children are handled in the same
+    flush. Items whose parent will update all its children anyway are
+    skipped.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._heap = []
+        self._counter = 0
+        self._scheduled = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, item, **flags):
+        # Items not yet in the tree are updated once they are added, only
+        # items whose object moved to another item are dropped here.
+        if self._is_detached(item):
+            return
+        pending_flags = self._pending.get(item)
+        if pending_flags is not None:
+            # Flags not passed default to True in the update methods
+            for name in set(pending_flags) | set(flags):
+                pending_flags[name] = pending_flags.get(name, True) or flags.get(name, True)
+            return
+        self._pending[item] = flags
+        self._counter += 1
+        heappush(self._heap, (-self._depth(item), self._counter, item))
+        if not self._scheduled:
+            self._scheduled = True
+            QtCore.QTimer.singleShot(0, self.flush)
+
+    @staticmethod
+    def _depth(item):
+        depth = 0
+        parent = item.parent()
+        while parent is not None:
+            depth += 1
+            parent = parent.parent()
+        return depth
+
+    def _updated_by_parent(self, item):
+        parent = item.parent()
+        while parent is not None:
+            flags = self._pending.get(parent)
+            if flags is not None and parent.children_update_flag:
+                if flags.get(parent.children_update_flag, True):
+                    return True
+            parent = parent.parent()
+        return False
+
+    @staticmethod
+    def _is_detached(item):
+        obj = item.obj
+        return obj is None or getattr(obj, 'item', None) is not item
+
+    @classmethod
+    def _is_stale(cls, item):
+        return cls._is_detached(item) or item.treeWidget() is None
+
+    def flush(self):
+        self._scheduled = False
+        while self._heap:
+            item = heappop(self._heap)[-1]
+            flags = self._pending.pop(item)
+            if self._is_stale(item) or self._updated_by_parent(item):
+                continue
+            item.update(**flags)
+
+
 class TreeItem(QtWidgets.QTreeWidgetItem):
 
+    update_queue = ItemUpdateQueue()
+
+    # Name of the update() flag which makes an item update all its children
+    children_update_flag = None
+
+    right_aligned_columns = {1, 7, 8}
+    # Font used for all columns, None for the default font
+    column_font = None
+
     def __init__(self, obj, sortable, *args):
         super().__init__(*args)
         self.obj = obj
         if obj is not None:
             obj.item = self
         self.sortable = sortable
-        self.setTextAlignment(1, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-        self.setTextAlignment(7, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-        self.setTextAlignment(8, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        # Column texts are only computed when the view asks for them, see
+        # data(). Items with _column_texts set to None use setText().
+        self._column_texts = None
+        self._sort_keys = {}
+        self._foreground = None
+        self._background = None
+
+    def data(self, column, role):
+        if self._column_texts is not None and 0 <= column < len(MainPanel.columns):
+            if role == QtCore.Qt.DisplayRole:
+                return self.column_text(column)
+            elif role == QtCore.Qt.ForegroundRole and self._foreground is not None:
+                return self._foreground
+            elif role == QtCore.Qt.BackgroundRole and self._background is not None:
+                return self._background
+            elif role == QtCore.Qt.FontRole and self.column_font is not None:
+                return self.column_font
+        if role == QtCore.Qt.TextAlignmentRole and column in self.right_aligned_columns:
+            return QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+        return super().data(column, role)
+
+    def column_text(self, column):
+        try:
+            return self._column_texts[column]
+        except KeyError:
+            text = self.obj.column(MainPanel.columns[column][1])
+            self._column_texts[column] = text
+            return text
+
+    def invalidate_columns(self, foreground=None, background=None):
+        """Drops cached column texts and sort keys, the view is notified
+        by emitDataChanged()."""
+        self._column_texts = {}
+        self._sort_keys = {}
+        if foreground is not None:
+            self._foreground = QtGui.QBrush(foreground)
+        if background is not None:
+            self._background = QtGui.QBrush(background)
 
     def __lt__(self, other):
         if not self.sortable:
@@ -829,9 +947,24 @@ class TreeItem(QtWidgets.QTreeWidgetItem):
         return self.sortkey(column) < other.sortkey(column)
 
     def sortkey(self, column):
+        try:
+            return self._sort_keys[column]
+        except KeyError:
+            pass
         if column == 1:
-            return self.obj.metadata.length or 0
-        return natsort.natkey(self.text(column).lower())
+            key = self.obj.metadata.length or 0
+        else:
+            key = natsort.natkey(self.text(column).lower())
+        self._sort_keys[column] = key
+        return key
+
+    def schedule_update(self, **flags):
+        """Updates this item the next time the event loop runs.
+
+        ``flags`` are passed to :meth:`update`, a flag is set if any of the
+        coalesced requests set it.
+        """
+        TreeItem.update_queue.add(self, **flags)
 
 
 class ClusterItem(TreeItem):
@@ -841,11 +974,11 @@ class ClusterItem(TreeItem):
         self.setIcon(MainPanel.TITLE_COLUMN, ClusterItem.icon_dir)
 
     def update(self):
-        for i, column in enumerate(MainPanel.columns):
-            self.setText(i, self.obj.column(column[1]))
+        self.invalidate_columns()
+        self.emitDataChanged()
         album = self.obj.related_album
         if self.obj.special and album and album.loaded:
-            album.item.update(update_tracks=False)
+            album.item.schedule_update(update_tracks=False)
         if self.isSelected():
             TreeItem.window.update_selection()
 
@@ -874,6 +1007,8 @@ class ClusterItem(TreeItem):
 
 class AlbumItem(TreeItem):
 
+    children_update_flag = 'update_tracks'
+
     def update(self, update_tracks=True):
         album = self.obj
         selection_changed = self.isSelected()
@@ -920,8 +1055,7 @@ class AlbumItem(TreeItem):
             else:
                 self.setIcon(MainPanel.TITLE_COLUMN, AlbumItem.icon_cd)
                 self.setToolTip(MainPanel.TITLE_COLUMN, _("Album unchanged"))
-        for i, column in enumerate(MainPanel.columns):
-            self.setText(i, album.column(column[1]))
+        self.invalidate_columns()
         if selection_changed:
             TreeItem.window.panel.update_current_view()
         # Workaround for PICARD-1446: Expand/collapse indicator for the release
@@ -944,6 +1078,8 @@ class NatAlbumItem(AlbumItem):
 
 class TrackItem(TreeItem):
 
+    children_update_flag = 'update_files'
+
     def update(self, update_album=True, update_files=True):
         track = self.obj
         tree_widget = self.treeWidget()
@@ -1003,14 +1139,12 @@ class TrackItem(TreeItem):
             self.setToolTip(MainPanel.TITLE_COLUMN, track.error)
         else:
             self.setIcon(MainPanel.TITLE_COLUMN, icon)
-        for i, column in enumerate(MainPanel.columns):
-            self.setText(i, track.column(column[1]))
-            self.setForeground(i, color)
-            self.setBackground(i, bgcolor)
+        self.invalidate_columns(color, bgcolor)
+        self.emitDataChanged()
         if self.isSelected():
             TreeItem.window.update_selection()
         if update_album:
-            self.parent().update(update_tracks=False)
+            self.parent().schedule_update(update_tracks=False)
 
 
 class FileItem(TreeItem):
@@ -1021,10 +1155,8 @@ class FileItem(TreeItem):
         self.setToolTip(MainPanel.FINGERPRINT_COLUMN, self.decide_fingerprint_icon_info(file))
         color = FileItem.file_colors[file.state]
         bgcolor = get_match_color(file.similarity, TreeItem.base_color)
-        for i, column in enumerate(MainPanel.columns):
-            self.setText(i, file.column(column[1]))
-            self.setForeground(i, color)
-            self.setBackground(i, bgcolor)
+        self.invalidate_columns(color, bgcolor)
+        self.emitDataChanged()
         tree_widget = self.treeWidget()
         if tree_widget:
             if not tree_widget.itemWidget(self, MainPanel.FINGERPRINT_COLUMN):
@@ -1035,7 +1167,7 @@ class FileItem(TreeItem):
 
         parent = self.parent()
         if isinstance(parent, TrackItem) and update_track:
-            parent.update(update_files=False)
+            parent.schedule_update(update_files=False)
 
     @staticmethod
     def decide_file_icon(file):
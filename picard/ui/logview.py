@@ -31,6 +31,7 @@ from picard import (
     config,
     log,
 )
+from picard.options import LOG_OPTIONS
 from picard.util import reconnect
 
 from picard.ui import PicardDialog
@@ -144,9 +145,7 @@ class VerbosityMenu(QtWidgets.QMenu):
 
 class LogView(LogViewCommon):
 
-    options = [
-        config.IntOption("setting", "log_verbosity", log.VERBOSITY_DEFAULT),
-    ]
+    options = LOG_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(log.main_tail, _("Log"), parent=parent)
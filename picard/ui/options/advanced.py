@@ -18,6 +18,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from picard import config
+from picard.options import ADVANCED_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -34,17 +35,7 @@ class AdvancedOptionsPage(OptionsPage):
     SORT_ORDER = 90
     ACTIVE = True
 
-    options = [
-        config.TextOption("setting", "ignore_regex", ""),
-        config.BoolOption("setting", "ignore_hidden_files", False),
-        config.BoolOption("setting", "recursively_add_files", True),
-        config.IntOption("setting", "ignore_track_duration_difference_under", 2),
-        config.BoolOption("setting", "completeness_ignore_videos", False),
-        config.BoolOption("setting", "completeness_ignore_pregap", False),
-        config.BoolOption("setting", "completeness_ignore_data", False),
-        config.BoolOption("setting", "completeness_ignore_silence", False),
-        config.ListOption("setting", "compare_ignore_tags", []),
-    ]
+    options = ADVANCED_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -19,9 +19,9 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from picard import config
+from picard.options import CDLOOKUP_OPTIONS
 from picard.util.cdrom import (
     AUTO_DETECT_DRIVES,
-    DEFAULT_DRIVES,
     get_cdrom_drives,
 )
 
@@ -45,9 +45,7 @@ class CDLookupOptionsPage(OptionsPage):
     SORT_ORDER = 50
     ACTIVE = True
 
-    options = [
-        config.TextOption("setting", "cd_lookup_device", ",".join(DEFAULT_DRIVES)),
-    ]
+    options = CDLOOKUP_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -19,6 +19,7 @@
 
 from picard import config
 from picard.coverart.providers import cover_art_providers
+from picard.options import COVER_OPTIONS
 
 from picard.ui.checkbox_list_item import CheckboxListItem
 from picard.ui.moveable_list_view import MoveableListView
@@ -37,20 +38,7 @@ class CoverOptionsPage(OptionsPage):
     SORT_ORDER = 35
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "save_images_to_tags", True),
-        config.BoolOption("setting", "embed_only_one_front_image", True),
-        config.BoolOption("setting", "save_images_to_files", False),
-        config.TextOption("setting", "cover_image_filename", "cover"),
-        config.BoolOption("setting", "save_images_overwrite", False),
-        config.ListOption("setting", "ca_providers", [
-            ('Cover Art Archive', True),
-            ('Amazon', True),
-            ('Whitelist', True),
-            ('CaaReleaseGroup', False),
-            ('Local', False),
-        ]),
-    ]
+    options = COVER_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -26,6 +26,7 @@ from PyQt5 import (
 
 from picard import config
 from picard.const import FPCALC_NAMES
+from picard.options import FINGERPRINTING_OPTIONS
 from picard.util import (
     find_executable,
     webbrowser2,
@@ -47,12 +48,7 @@ class FingerprintingOptionsPage(OptionsPage):
     SORT_ORDER = 45
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "ignore_existing_acoustid_fingerprints", False),
-        config.TextOption("setting", "fingerprinting_system", "acoustid"),
-        config.TextOption("setting", "acoustid_fpcalc", ""),
-        config.TextOption("setting", "acoustid_apikey", ""),
-    ]
+    options = FINGERPRINTING_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
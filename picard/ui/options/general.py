@@ -24,6 +24,7 @@ from picard.const import (
     MUSICBRAINZ_SERVERS,
     PROGRAM_UPDATE_LEVELS,
 )
+from picard.options import GENERAL_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -40,22 +41,7 @@ class GeneralOptionsPage(OptionsPage):
     SORT_ORDER = 1
     ACTIVE = True
 
-    options = [
-        config.TextOption("setting", "server_host", MUSICBRAINZ_SERVERS[0]),
-        config.IntOption("setting", "server_port", 443),
-        config.TextOption("persist", "oauth_refresh_token", ""),
-        config.BoolOption("setting", "analyze_new_files", False),
-        config.BoolOption("setting", "ignore_file_mbids", False),
-        config.TextOption("persist", "oauth_refresh_token", ""),
-        config.TextOption("persist", "oauth_refresh_token_scopes", ""),
-        config.TextOption("persist", "oauth_access_token", ""),
-        config.IntOption("persist", "oauth_access_token_expires", 0),
-        config.TextOption("persist", "oauth_username", ""),
-        config.BoolOption("setting", "check_for_updates", True),
-        config.IntOption("setting", "update_check_days", 7),
-        config.IntOption("setting", "update_level", 0),
-        config.IntOption("persist", "last_update_check", 0),
-    ]
+    options = GENERAL_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -24,6 +24,7 @@ from PyQt5.QtGui import (
 )
 
 from picard import config
+from picard.options import GENRES_OPTIONS
 from picard.track import TagGenreFilter
 
 from picard.ui.options import (
@@ -77,16 +78,7 @@ class GenresOptionsPage(OptionsPage):
     SORT_ORDER = 20
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "use_genres", False),
-        config.IntOption("setting", "max_genres", 5),
-        config.IntOption("setting", "min_genre_usage", 90),
-        config.TextOption("setting", "genres_filter", "-seen live\n-favorites\n-fixme\n-owned"),
-        config.TextOption("setting", "join_genres", ""),
-        config.BoolOption("setting", "only_my_genres", False),
-        config.BoolOption("setting", "artists_genres", False),
-        config.BoolOption("setting", "folksonomy_tags", False),
-    ]
+    options = GENRES_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -25,10 +25,10 @@ from PyQt5 import (
     QtCore,
     QtWidgets,
 )
-from PyQt5.QtCore import QStandardPaths
 
 from picard import config
 from picard.const import UI_LANGUAGES
+from picard.options import INTERFACE_OPTIONS
 from picard.util import icontheme
 
 from picard.ui import PicardDialog
@@ -41,9 +41,6 @@ from picard.ui.ui_options_interface import Ui_InterfaceOptionsPage
 from picard.ui.util import enabledSlot
 
 
-_default_starting_dir = QStandardPaths.writableLocation(QStandardPaths.HomeLocation)
-
-
 class InterfaceOptionsPage(OptionsPage):
 
     NAME = "interface"
@@ -107,35 +104,7 @@ class InterfaceOptionsPage(OptionsPage):
         },
     }
     ACTION_NAMES = set(TOOLBAR_BUTTONS.keys())
-    options = [
-        config.BoolOption("setting", "toolbar_show_labels", True),
-        config.BoolOption("setting", "toolbar_multiselect", False),
-        config.BoolOption("setting", "builtin_search", False),
-        config.BoolOption("setting", "use_adv_search_syntax", False),
-        config.BoolOption("setting", "quit_confirmation", True),
-        config.TextOption("setting", "ui_language", ""),
-        config.BoolOption("setting", "starting_directory", False),
-        config.TextOption("setting", "starting_directory_path", _default_starting_dir),
-        config.TextOption("setting", "load_image_behavior", "append"),
-        config.ListOption("setting", "toolbar_layout", [
-            'add_directory_action',
-            'add_files_action',
-            'separator',
-            'cluster_action',
-            'separator',
-            'autotag_action',
-            'analyze_action',
-            'browser_lookup_action',
-            'separator',
-            'save_action',
-            'view_info_action',
-            'remove_action',
-            'separator',
-            'cd_lookup_action',
-            'separator',
-            'submit_acoustid_action',
-        ]),
-    ]
+    options = INTERFACE_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
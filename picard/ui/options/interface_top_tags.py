@@ -18,6 +18,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from picard import config
+from picard.options import INTERFACE_TOP_TAGS_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -36,16 +37,7 @@ class InterfaceTopTagsOptionsPage(OptionsPage):
     SORT_ORDER = 30
     ACTIVE = True
 
-    options = [
-        config.ListOption("setting", "metadatabox_top_tags", [
-            "title",
-            "artist",
-            "album",
-            "tracknumber",
-            "~length",
-            "date",
-        ]),
-    ]
+    options = INTERFACE_TOP_TAGS_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -18,6 +18,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from picard import config
+from picard.options import MATCHING_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -34,11 +35,7 @@ class MatchingOptionsPage(OptionsPage):
     SORT_ORDER = 30
     ACTIVE = True
 
-    options = [
-        config.FloatOption("setting", "file_lookup_threshold", 0.7),
-        config.FloatOption("setting", "cluster_lookup_threshold", 0.7),
-        config.FloatOption("setting", "track_matching_threshold", 0.4),
-    ]
+    options = MATCHING_OPTIONS
 
     _release_type_sliders = {}
 
@@ -19,6 +19,7 @@
 
 from picard import config
 from picard.const import ALIAS_LOCALES
+from picard.options import METADATA_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -52,17 +53,7 @@ class MetadataOptionsPage(OptionsPage):
     SORT_ORDER = 20
     ACTIVE = True
 
-    options = [
-        config.TextOption("setting", "va_name", "Various Artists"),
-        config.TextOption("setting", "nat_name", "[non-album tracks]"),
-        config.TextOption("setting", "artist_locale", "en"),
-        config.BoolOption("setting", "translate_artist_names", False),
-        config.BoolOption("setting", "release_ars", True),
-        config.BoolOption("setting", "track_ars", False),
-        config.BoolOption("setting", "convert_punctuation", True),
-        config.BoolOption("setting", "standardize_artists", False),
-        config.BoolOption("setting", "standardize_instruments", True),
-    ]
+    options = METADATA_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
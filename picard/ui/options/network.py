@@ -18,6 +18,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from picard import config
+from picard.options import NETWORK_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -34,16 +35,7 @@ class NetworkOptionsPage(OptionsPage):
     SORT_ORDER = 10
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "use_proxy", False),
-        config.TextOption("setting", "proxy_server_host", ""),
-        config.IntOption("setting", "proxy_server_port", 80),
-        config.TextOption("setting", "proxy_username", ""),
-        config.TextOption("setting", "proxy_password", ""),
-        config.BoolOption("setting", "browser_integration", True),
-        config.IntOption("setting", "browser_integration_port", 8000),
-        config.BoolOption("setting", "browser_integration_localhost_only", True)
-    ]
+    options = NETWORK_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
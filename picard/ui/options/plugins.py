@@ -40,6 +40,7 @@ from picard.const import (
     USER_PLUGIN_DIR,
 )
 from picard.const.sys import IS_WIN
+from picard.options import PLUGINS_OPTIONS
 from picard.util import reconnect
 
 from picard.ui import HashableTreeWidgetItem
@@ -209,8 +210,7 @@ class PluginsOptionsPage(OptionsPage):
     SORT_ORDER = 70
     ACTIVE = True
 
-    options = [
-        config.ListOption("setting", "enabled_plugins", []),
+    options = PLUGINS_OPTIONS + [
         config.Option("persist", "plugins_list_state", QtCore.QByteArray()),
         config.Option("persist", "plugins_list_sort_section", 0),
         config.Option("persist", "plugins_list_sort_order",
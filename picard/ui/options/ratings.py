@@ -18,6 +18,7 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
 from picard import config
+from picard.options import RATINGS_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -34,12 +35,7 @@ class RatingsOptionsPage(OptionsPage):
     SORT_ORDER = 20
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "enable_ratings", False),
-        config.TextOption("setting", "rating_user_email", "users@musicbrainz.org"),
-        config.BoolOption("setting", "submit_ratings", True),
-        config.IntOption("setting", "rating_steps", 6),
-    ]
+    options = RATINGS_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
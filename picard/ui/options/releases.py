@@ -34,6 +34,10 @@ from picard.const import (
 )
 from picard.const.sys import IS_WIN
 from picard.i18n import gettext_attr
+from picard.options import (
+    DEFAULT_RELEASE_TYPE_SCORE,
+    RELEASES_OPTIONS,
+)
 
 from picard.ui.options import (
     OptionsPage,
@@ -43,10 +47,6 @@ from picard.ui.ui_options_releases import Ui_ReleasesOptionsPage
 from picard.ui.widgets import ClickableSlider
 
 
-_DEFAULT_SCORE = 0.5
-_release_type_scores = [(g, _DEFAULT_SCORE) for g in list(RELEASE_PRIMARY_GROUPS.keys()) + list(RELEASE_SECONDARY_GROUPS.keys())]
-
-
 class TipSlider(ClickableSlider):
 
     _offset = QtCore.QPoint(0, -30)
@@ -116,7 +116,7 @@ class ReleaseTypeScore:
         return float(self.slider.value()) / 100.0
 
     def reset(self):
-        self.setValue(_DEFAULT_SCORE)
+        self.setValue(DEFAULT_RELEASE_TYPE_SCORE)
 
 
 class RowColIter:
@@ -149,11 +149,7 @@ class ReleasesOptionsPage(OptionsPage):
     SORT_ORDER = 10
     ACTIVE = True
 
-    options = [
-        config.ListOption("setting", "release_type_scores", _release_type_scores),
-        config.ListOption("setting", "preferred_release_countries", []),
-        config.ListOption("setting", "preferred_release_formats", []),
-    ]
+    options = RELEASES_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -211,7 +207,7 @@ class ReleasesOptionsPage(OptionsPage):
         scores = dict(config.setting["release_type_scores"])
         for (release_type, release_type_slider) in self._release_type_sliders.items():
             release_type_slider.setValue(scores.get(release_type,
-                                                    _DEFAULT_SCORE))
+                                                    DEFAULT_RELEASE_TYPE_SCORE))
 
         self._load_list_items("preferred_release_countries", RELEASE_COUNTRIES,
                               self.ui.country_list, self.ui.preferred_country_list)
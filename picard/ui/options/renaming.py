@@ -22,19 +22,16 @@ from functools import partial
 import os.path
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QStandardPaths
 from PyQt5.QtGui import (
     QFont,
     QPalette,
 )
 
 from picard import config
-from picard.const import (
-    DEFAULT_FILE_NAMING_FORMAT,
-    PICARD_URLS,
-)
+from picard.const import PICARD_URLS
 from picard.const.sys import IS_WIN
 from picard.file import File
+from picard.options import RENAMING_OPTIONS
 from picard.script import (
     ScriptError,
     ScriptParser,
@@ -54,9 +51,6 @@ from picard.ui.ui_options_renaming import Ui_RenamingOptionsPage
 from picard.ui.util import enabledSlot
 
 
-_default_music_dir = QStandardPaths.writableLocation(QStandardPaths.MusicLocation)
-
-
 class RenamingOptionsPage(OptionsPage):
 
     NAME = "filerenaming"
@@ -65,21 +59,7 @@ class RenamingOptionsPage(OptionsPage):
     SORT_ORDER = 40
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "windows_compatibility", True),
-        config.BoolOption("setting", "ascii_filenames", False),
-        config.BoolOption("setting", "rename_files", False),
-        config.TextOption(
-            "setting",
-            "file_naming_format",
-            DEFAULT_FILE_NAMING_FORMAT,
-        ),
-        config.BoolOption("setting", "move_files", False),
-        config.TextOption("setting", "move_files_to", _default_music_dir),
-        config.BoolOption("setting", "move_additional_files", False),
-        config.TextOption("setting", "move_additional_files_pattern", "*.jpg *.png"),
-        config.BoolOption("setting", "delete_empty_dirs", True),
-    ]
+    options = RENAMING_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -24,6 +24,7 @@ from PyQt5 import (
 
 from picard import config
 from picard.const import PICARD_URLS
+from picard.options import SCRIPTING_OPTIONS
 from picard.script import ScriptParser
 from picard.util import restore_method
 
@@ -118,9 +119,7 @@ class ScriptingOptionsPage(OptionsPage):
     SORT_ORDER = 85
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "enable_tagger_scripts", False),
-        config.ListOption("setting", "list_of_scripts", []),
+    options = SCRIPTING_OPTIONS + [
         config.IntOption("persist", "last_selected_script_pos", 0),
         config.Option("persist", "scripting_splitter", QtCore.QByteArray()),
     ]
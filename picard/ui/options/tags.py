@@ -25,6 +25,7 @@ from PyQt5 import (
 )
 
 from picard import config
+from picard.options import TAGS_OPTIONS
 from picard.util.tags import TAG_NAMES
 
 from picard.ui.options import (
@@ -42,14 +43,7 @@ class TagsOptionsPage(OptionsPage):
     SORT_ORDER = 30
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "dont_write_tags", False),
-        config.BoolOption("setting", "preserve_timestamps", False),
-        config.BoolOption("setting", "clear_existing_tags", False),
-        config.BoolOption("setting", "remove_id3_from_flac", False),
-        config.BoolOption("setting", "remove_ape_from_mp3", False),
-        config.TextOption("setting", "preserved_tags", ""),
-    ]
+    options = TAGS_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -20,6 +20,7 @@
 from functools import partial
 
 from picard import config
+from picard.options import TAGS_COMPATIBILITY_OPTIONS
 
 from picard.ui.options import (
     OptionsPage,
@@ -38,17 +39,7 @@ class TagsCompatibilityOptionsPage(OptionsPage):
     SORT_ORDER = 30
     ACTIVE = True
 
-    options = [
-        config.BoolOption("setting", "write_id3v1", True),
-        config.BoolOption("setting", "write_id3v23", True),
-        config.TextOption("setting", "id3v2_encoding", "utf-16"),
-        config.TextOption("setting", "id3v23_join_with", "/"),
-        config.BoolOption("setting", "itunes_compatible_grouping", False),
-        config.BoolOption("setting", "aac_save_ape", True),
-        config.BoolOption("setting", "remove_ape_from_aac", False),
-        config.BoolOption("setting", "ac3_save_ape", True),
-        config.BoolOption("setting", "remove_ape_from_ac3", False),
-    ]
+    options = TAGS_COMPATIBILITY_OPTIONS
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -126,8 +126,7 @@ class TrackSearchDialog(SearchDialog):
             metadata = self.file_.orig_metadata
 
             def candidates():
-                for track in tracks:
-                    yield metadata.compare_to_track(track, File.comparison_weights)
+                yield from metadata.compare_to_tracks(tracks, File.comparison_weights)
 
             tracks = [result.track for result in sort_by_similarity(candidates)]
 
@@ -173,8 +173,151 @@ astrcmp(PyObject *self, PyObject *args)
 	return Py_BuildValue("f", d);
 }
 
+/***
+ * Copy a sequence of str objects into UCS4 buffers. Returns 0 on success.
+ ***/
+
+static int
+copy_words(PyObject *seq, Py_UCS4 **words, Py_ssize_t *lengths, Py_ssize_t count)
+{
+	Py_ssize_t i;
+	PyObject **items = PySequence_Fast_ITEMS(seq);
+
+	for (i = 0; i < count; i++)
+	{
+		if (!PyUnicode_Check(items[i]))
+		{
+			PyErr_SetString(PyExc_TypeError, "words must be str");
+			return -1;
+		}
+		if (PyUnicode_READY(items[i]) == -1)
+			return -1;
+		lengths[i] = PyUnicode_GetLength(items[i]);
+		words[i] = PyUnicode_AsUCS4Copy(items[i]);
+		if (words[i] == NULL)
+			return -1;
+	}
+	return 0;
+}
+
+/***
+ * Similarity of two lists of words, see picard.similarity.similarity2.
+ * Each word of the shorter list is matched to its most similar word of the
+ * longer list, which is consumed if the similarity is above 0.6.
+ ***/
+
+static double
+WordsSimilarity(Py_UCS4 **awords, Py_ssize_t *alengths, Py_ssize_t acount,
+                Py_UCS4 **bwords, Py_ssize_t *blengths, Py_ssize_t bcount,
+                char *consumed)
+{
+	Py_ssize_t i, j, remaining = bcount;
+	double score = 0.0, total = 0.0;
+
+	for (i = 0; i < acount; i++)
+	{
+		double ms = 0.0;
+		Py_ssize_t mp = -1;
+
+		for (j = 0; j < bcount; j++)
+		{
+			double s;
+
+			if (consumed[j])
+				continue;
+			s = LevenshteinDistance(awords[i], alengths[i], bwords[j], blengths[j]);
+			if (s > ms)
+			{
+				ms = s;
+				mp = j;
+			}
+		}
+		if (mp >= 0)
+		{
+			score += ms;
+			if (ms > 0.6)
+			{
+				consumed[mp] = 1;
+				remaining--;
+			}
+		}
+		total += 1;
+	}
+	total += remaining * 0.4;
+	if (total)
+		return score / total;
+	return 0.0;
+}
+
+static PyObject *
+similarity2_words(PyObject *self, PyObject *args)
+{
+	PyObject *a, *b, *aseq = NULL, *bseq = NULL, *result = NULL;
+	Py_UCS4 **words = NULL;
+	Py_ssize_t *lengths = NULL;
+	Py_ssize_t acount = 0, bcount = 0, i;
+	char *consumed = NULL;
+	double d;
+	PyThreadState *_save;
+
+	if (!PyArg_ParseTuple(args, "OO", &a, &b))
+		return NULL;
+
+	aseq = PySequence_Fast(a, "words must be a sequence");
+	if (aseq == NULL)
+		goto done;
+	bseq = PySequence_Fast(b, "words must be a sequence");
+	if (bseq == NULL)
+		goto done;
+
+	/* Always match the words of the shorter list */
+	if (PySequence_Fast_GET_SIZE(aseq) > PySequence_Fast_GET_SIZE(bseq))
+	{
+		PyObject *tmp = aseq;
+		aseq = bseq;
+		bseq = tmp;
+	}
+	acount = PySequence_Fast_GET_SIZE(aseq);
+	bcount = PySequence_Fast_GET_SIZE(bseq);
+
+	words = PyMem_Calloc(acount + bcount + 1, sizeof(Py_UCS4 *));
+	lengths = PyMem_Calloc(acount + bcount + 1, sizeof(Py_ssize_t));
+	consumed = PyMem_Calloc(bcount + 1, sizeof(char));
+	if (words == NULL || lengths == NULL || consumed == NULL)
+	{
+		PyErr_NoMemory();
+		goto done;
+	}
+
+	if (copy_words(aseq, words, lengths, acount) == -1
+	    || copy_words(bseq, words + acount, lengths + acount, bcount) == -1)
+		goto done;
+
+	Py_UNBLOCK_THREADS
+	d = WordsSimilarity(words, lengths, acount,
+	                    words + acount, lengths + acount, bcount,
+	                    consumed);
+	Py_BLOCK_THREADS
+
+	result = PyFloat_FromDouble(d);
+
+done:
+	if (words != NULL)
+	{
+		for (i = 0; i < acount + bcount; i++)
+			PyMem_Free(words[i]);
+	}
+	PyMem_Free(words);
+	PyMem_Free(lengths);
+	PyMem_Free(consumed);
+	Py_XDECREF(aseq);
+	Py_XDECREF(bseq);
+	return result;
+}
+
 static PyMethodDef AstrcmpMethods[] = {
 	{"astrcmp", astrcmp, METH_VARARGS, "Compute Levenshtein distance"},
+	{"similarity2_words", similarity2_words, METH_VARARGS, "Compute the similarity of two word lists"},
 	{NULL, NULL, 0, NULL}
 };
 
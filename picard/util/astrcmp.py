@@ -33,6 +33,38 @@ def astrcmp_py(a, b):
     return 1.0 - current[n] / max(m, n)
 
 
+def similarity2_words_py(alist, blist):
+    """Calculates the similarity of two sequences of words.
+
+    Every word of the shorter sequence is matched against its most similar
+    word of the longer one, which is used up if the words are similar enough.
+    """
+    alist = list(alist)
+    blist = list(blist)
+    total = 0
+    score = 0.0
+    if len(alist) > len(blist):
+        alist, blist = blist, alist
+    for av in alist:
+        ms = 0.0
+        mp = None
+        for position, bv in enumerate(blist):
+            s = astrcmp(av, bv)
+            if s > ms:
+                ms = s
+                mp = position
+        if mp is not None:
+            score += ms
+            if ms > 0.6:
+                del blist[mp]
+        total += 1
+    total += len(blist) * 0.4
+    if total:
+        return score / total
+    else:
+        return 0
+
+
 try:
     from picard.util._astrcmp import astrcmp as astrcmp_c
     astrcmp = astrcmp_c
@@ -40,3 +72,10 @@ try:
 except ImportError:
     astrcmp = astrcmp_py
     astrcmp_implementation = "Python"
+
+
+try:
+    from picard.util._astrcmp import similarity2_words as similarity2_words_c
+    similarity2_words = similarity2_words_c
+except ImportError:
+    similarity2_words = similarity2_words_py
@@ -18,6 +18,7 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+from collections import Counter
 from collections.abc import MutableSequence
 
 from picard import config
@@ -83,53 +84,98 @@ class ImageList(MutableSequence):
         self._images = [image for image in self._images if not image.is_front_image()]
 
 
+class ImageCounter:
+
+    """Counts the images of the children of an object.
+
+    For every image the number of children having it is kept, as well as the
+    number of children having each distinct set of images. Adding or
+    removing a child only touches the images of that child.
+    """
+
+    def __init__(self):
+        self.images = Counter()
+        self.image_sets = Counter()
+        self.sources = {}
+
+    def add(self, source, images):
+        """Count ``images`` of ``source``.
+
+        A source may be added more than once, it is only uncounted after
+        being removed as often as it was added.
+        """
+        images = frozenset(images)
+        counted = self.sources.get(source)
+        if counted is None:
+            self._count(images, 1)
+            self.sources[source] = [images, 1]
+        else:
+            if counted[0] != images:
+                self._count(counted[0], -1)
+                self._count(images, 1)
+                counted[0] = images
+            counted[1] += 1
+
+    def remove(self, source):
+        counted = self.sources.get(source)
+        if counted is None:
+            return
+        counted[1] -= 1
+        if counted[1] <= 0:
+            del self.sources[source]
+            self._count(counted[0], -1)
+
+    def _count(self, images, delta):
+        for image in images:
+            self.images[image] += delta
+            if self.images[image] <= 0:
+                del self.images[image]
+        self.image_sets[images] += delta
+        if self.image_sets[images] <= 0:
+            del self.image_sets[images]
+
+    @property
+    def has_common_images(self):
+        return len(self.image_sets) <= 1
+
+    def apply(self, metadata):
+        metadata.images = ImageList(self.images)
+        metadata.has_common_images = self.has_common_images
+
+
 class ImageListState:
     def __init__(self):
-        self.new_images = set()
-        self.orig_images = set()
         self.sources = []
-        self.has_common_new_images = True
-        self.has_common_orig_images = True
-        self.first_new_obj = True
-        self.first_orig_obj = True
         # The next variables specify what will be updated
         self.update_new_metadata = False
         self.update_orig_metadata = False
 
 
-def _process_images(state, src_obj):
+def _counts_orig_images(src_obj):
     from picard.track import Track
 
-    # Check new images
-    if state.update_new_metadata:
-        if state.new_images != set(src_obj.metadata.images):
-            if not state.first_new_obj:
-                state.has_common_new_images = False
-            state.new_images = state.new_images.union(src_obj.metadata.images)
-        if state.first_new_obj:
-            state.first_new_obj = False
-
-    if state.update_orig_metadata and not isinstance(src_obj, Track):
-        # Check orig images, but not for Tracks (which don't have a useful orig_metadata)
-        if state.orig_images != set(src_obj.orig_metadata.images):
-            if not state.first_orig_obj:
-                state.has_common_orig_images = False
-            state.orig_images = state.orig_images.union(src_obj.orig_metadata.images)
-        if state.first_orig_obj:
-            state.first_orig_obj = False
-
-
-def _update_state(obj, state):
-    for src_obj in state.sources:
-        _process_images(state, src_obj)
+    # Tracks don't have a useful orig_metadata
+    return not isinstance(src_obj, Track)
+
 
+def _rebuild(obj, state):
     if state.update_new_metadata:
-        obj.metadata.images = ImageList(state.new_images)
-        obj.metadata.has_common_images = state.has_common_new_images
+        counter = obj.new_image_counter = ImageCounter()
+        for src_obj in state.sources:
+            counter.add(src_obj, src_obj.metadata.images)
+        counter.apply(obj.metadata)
 
     if state.update_orig_metadata:
-        obj.orig_metadata.images = ImageList(state.orig_images)
-        obj.orig_metadata.has_common_images = state.has_common_orig_images
+        counter = obj.orig_image_counter = ImageCounter()
+        for src_obj in state.sources:
+            if _counts_orig_images(src_obj):
+                counter.add(src_obj, src_obj.orig_metadata.images)
+        counter.apply(obj.orig_metadata)
+
+
+def _has_counters(obj, state):
+    return ((not state.update_new_metadata or getattr(obj, 'new_image_counter', None) is not None)
+            and (not state.update_orig_metadata or getattr(obj, 'orig_image_counter', None) is not None))
 
 
 # TODO: use functools.singledispatch when py3 is supported
@@ -157,17 +203,6 @@ def _get_state(obj):
     return state
 
 
-def _get_metadata_images(state, sources):
-    new_images = set()
-    orig_images = set()
-    for s in sources:
-        if state.update_new_metadata:
-            new_images = new_images.union(s.metadata.images)
-        if state.update_orig_metadata:
-            orig_images = orig_images.union(s.orig_metadata.images)
-    return (new_images, orig_images)
-
-
 def update_metadata_images(obj):
     """Update the metadata images `obj` based on its children.
 
@@ -181,17 +216,7 @@ def update_metadata_images(obj):
     Args:
         obj: A `Cluster`, `Album` or `Track` object with `metadata` property
     """
-    _update_state(obj, _get_state(obj))
-
-
-def _add_images(metadata, added_images):
-    if not added_images:
-        return
-
-    current_images = set(metadata.images)
-    if added_images != current_images:
-        metadata.images = ImageList(current_images.union(added_images))
-        metadata.has_common_images = False
+    _rebuild(obj, _get_state(obj))
 
 
 def add_metadata_images(obj, added_sources):
@@ -202,52 +227,22 @@ def add_metadata_images(obj, added_sources):
         added_sources: List of child objects (`Track` or `File`) which's metadata images should be added to `obj`
     """
     state = _get_state(obj)
-    (added_new_images, added_orig_images) = _get_metadata_images(state, added_sources)
+    if not _has_counters(obj, state):
+        # The sources passed in are already children of obj
+        _rebuild(obj, state)
+        return
 
     if state.update_new_metadata:
-        _add_images(obj.metadata, added_new_images)
+        counter = obj.new_image_counter
+        for source in added_sources:
+            counter.add(source, source.metadata.images)
+        counter.apply(obj.metadata)
     if state.update_orig_metadata:
-        _add_images(obj.orig_metadata, added_orig_images)
-
-
-def _remove_images(metadata, sources, removed_images):
-    """Removes `removed_images` from metadata `images`, but only if they are not included in `sources`.
-
-    Args:
-        metadata: `Metadata` object from which images should be removed
-        sources: List of source `Metadata` objects
-        removed_images: Set of `CoverArt` proposed for removal from `metadata`
-    """
-    if not metadata.images or not removed_images:
-        return
-
-    if not sources:
-        metadata.images = ImageList()
-        metadata.has_common_images = True
-        return
-
-    current_images = set(metadata.images)
-
-    if metadata.has_common_images and current_images == removed_images:
-        return
-
-    common_images = True  # True, if all children share the same images
-    previous_images = None
-
-    # Iterate over all sources and check whether the images proposed to be
-    # removed are used in any sources. Images used in existing sources
-    # must not be removed.
-    for source_metadata in sources:
-        source_images = set(source_metadata.images)
-        if previous_images and common_images and previous_images != source_images:
-            common_images = False
-        previous_images = set(source_metadata.images)  # Remember for next iteration
-        removed_images = removed_images.difference(source_images)
-        if not removed_images and not common_images:
-            return  # No images left to remove, abort immediatelly
-
-    metadata.images = ImageList(current_images.difference(removed_images))
-    metadata.has_common_images = common_images
+        counter = obj.orig_image_counter
+        for source in added_sources:
+            if _counts_orig_images(source):
+                counter.add(source, source.orig_metadata.images)
+        counter.apply(obj.orig_metadata)
 
 
 def remove_metadata_images(obj, removed_sources):
@@ -257,14 +252,18 @@ def remove_metadata_images(obj, removed_sources):
         obj: A `Cluster`, `Album` or `Track` object with `metadata` property
         removed_sources: List of child objects (`Track` or `File`) which's metadata images should be removed from `obj`
     """
-    from picard.track import Track
-
     state = _get_state(obj)
-    (removed_new_images, removed_orig_images) = _get_metadata_images(state, removed_sources)
+    if not _has_counters(obj, state):
+        _rebuild(obj, state)
+        return
 
     if state.update_new_metadata:
-        sources = [s.metadata for s in state.sources]
-        _remove_images(obj.metadata, sources, removed_new_images)
+        counter = obj.new_image_counter
+        for source in removed_sources:
+            counter.remove(source)
+        counter.apply(obj.metadata)
     if state.update_orig_metadata:
-        sources = [s.orig_metadata for s in state.sources if not isinstance(s, Track)]
-        _remove_images(obj.orig_metadata, sources, removed_orig_images)
+        counter = obj.orig_image_counter
+        for source in removed_sources:
+            counter.remove(source)
+        counter.apply(obj.orig_metadata)
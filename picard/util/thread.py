@@ -26,6 +26,8 @@ from PyQt5.QtCore import (
     QRunnable,
 )
 
+from picard import config
+
 
 class ProxyToMainEvent(QEvent):
 
@@ -46,10 +48,13 @@ class Runnable(QRunnable):
         self.func = func
         self.next_func = next_func
         self.traceback = traceback
+        # The task sees the settings as they were when it was queued
+        self.settings = config.settings_snapshot()
 
     def run(self):
         try:
-            result = self.func()
+            with config.use_settings_snapshot(self.settings):
+                result = self.func()
         except BaseException:
             from picard import log
             if self.traceback:
@@ -33,6 +33,7 @@ from functools import partial
 import os.path
 import platform
 import sys
+import time
 
 from PyQt5 import (
     QtCore,
@@ -56,6 +57,7 @@ from picard.oauth import OAuthManager
 from picard.util import (
     build_qurl,
     parse_json,
+    thread,
 )
 from picard.util.xml import parse_xml
 from picard.webservice import ratecontrol
@@ -76,7 +78,9 @@ CLIENT_STRING = bytes(QUrl.toPercentEncoding('%s %s-%s' % (PICARD_ORG_NAME,
 
 DEFAULT_RESPONSE_PARSER_TYPE = "json"
 
-Parser = namedtuple('Parser', 'mimetype parser')
+Parser = namedtuple('Parser', 'mimetype parser threaded')
+
+ParseTiming = namedtuple('ParseTiming', 'url size seconds threaded')
 
 
 class UnknownResponseParserError(Exception):
@@ -92,7 +96,7 @@ class WSRequest(QNetworkRequest):
     def __init__(self, method, host, port, path, handler, parse_response_type=None, data=None,
                  mblogin=False, cacheloadcontrol=None, refresh=False,
                  queryargs=None, priority=False, important=False,
-                 request_mimetype=None):
+                 request_mimetype=None, headers=None):
         """
         Args:
             method: HTTP method.  One of ``GET``, ``POST``, ``PUT``, or ``DELETE``.
@@ -115,6 +119,8 @@ class WSRequest(QNetworkRequest):
             priority: Indicates that this is a high priority request.
             important: Indicates that this is an important request.
             request_mimetype: Set the Content-Type header.
+            headers: `dict` of additional raw headers, e.g. for conditional
+            requests.
         """
         url = build_qurl(host, port, path=path, queryargs=queryargs)
         super().__init__(url)
@@ -133,6 +139,7 @@ class WSRequest(QNetworkRequest):
         self.handler = handler
         self.parse_response_type = parse_response_type
         self.response_parser = None
+        self.response_parser_threaded = False
         self.response_mimetype = None
         self.request_mimetype = request_mimetype
         self.data = data
@@ -142,6 +149,7 @@ class WSRequest(QNetworkRequest):
         self.queryargs = queryargs
         self.priority = priority
         self.important = important
+        self.headers = headers
         self._high_prio_no_cache = False
 
         self.access_token = None
@@ -160,6 +168,7 @@ class WSRequest(QNetworkRequest):
             try:
                 self.response_mimetype = WebService.get_response_mimetype(self.parse_response_type)
                 self.response_parser = WebService.get_response_parser(self.parse_response_type)
+                self.response_parser_threaded = WebService.PARSERS[self.parse_response_type].threaded
             except UnknownResponseParserError as e:
                 log.error(e.args[0])
             else:
@@ -170,6 +179,13 @@ class WSRequest(QNetworkRequest):
                 self.request_mimetype = self.response_mimetype or "application/x-www-form-urlencoded"
             self.setHeader(QNetworkRequest.ContentTypeHeader, self.request_mimetype)
 
+        if self.headers:
+            # Validation is done by the caller, the disk cache must not
+            # answer in its place
+            self.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+            for name, value in self.headers.items():
+                self.setRawHeader(name.encode('ascii'), value.encode('latin-1'))
+
     def _update_authorization_header(self):
         authorization = b""
         if self.mblogin and self.access_token:
@@ -252,16 +268,56 @@ class WSPostRequest(WSRequest):
         super()._init_headers()
 
 
+class _PendingReply:
+
+    """A reply whose handler is called once all earlier replies to the same
+    handler owner are handled."""
+
+    __slots__ = ('reply', 'handler', 'owner', 'document', 'error', 'done')
+
+    def __init__(self, reply, handler, document=None, error=None, done=True):
+        self.reply = reply
+        self.handler = handler
+        self.owner = self.handler_owner(handler)
+        self.document = document
+        self.error = error
+        self.done = done
+
+    @staticmethod
+    def handler_owner(handler):
+        """Returns the id of the object ``handler`` is a method of, or of
+        ``handler`` itself if it is a function."""
+        while isinstance(handler, partial):
+            handler = handler.func
+        return id(getattr(handler, '__self__', handler))
+
+
 class WebService(QtCore.QObject):
 
     PARSERS = dict()
 
+    # Replies with at least this many bytes are parsed on a worker thread,
+    # if their parser was added with threaded=True
+    parse_in_thread_min_size = 64 * 1024
+
+    # Number of recent ParseTiming entries kept in parse_timings
+    parse_timings_size = 100
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Replies in the order they finished, by handler owner. The handlers
+        # of an owner are called in this order even if a later reply was
+        # parsed first, replies to other owners are not held back.
+        self._pending_replies = {}
+        self._held_replies = set()
+        self._parse_thread_pool = QtCore.QThreadPool(self)
+        self.parse_timings = deque(maxlen=self.parse_timings_size)
         self.manager = QtNetwork.QNetworkAccessManager()
         self.oauth_manager = OAuthManager(self)
         self.set_cache()
         self.setup_proxy()
+        self.setup_concurrency()
+        self.setup_rate_policies()
         self.manager.finished.connect(self._process_reply)
         self._request_methods = {
             "GET": self.manager.get,
@@ -305,11 +361,35 @@ class WebService(QtCore.QObject):
             proxy.setPassword(config.setting["proxy_password"])
         self.manager.setProxy(proxy)
 
+    def setup_concurrency(self):
+        """If enabled, requests to a host are started as long as its
+        congestion window allows, instead of one per run of the queue.
+        Hosts allowed by ratecontrol.set_http2_allowed() also use HTTP/2,
+        so those requests share a single connection.
+        """
+        self.concurrent_requests = config.setting["network_concurrent_requests"]
+
+    def setup_rate_policies(self):
+        """Apply the rate policies declared in the rate_policies setting,
+        see ratecontrol.parse_rate_policy() for their format.
+        """
+        self.rate_policies = {}
+        for text in config.setting["rate_policies"]:
+            try:
+                hostkey, policy = ratecontrol.parse_rate_policy(text)
+            except ValueError as e:
+                log.error("Ignoring rate policy: %s", e)
+                continue
+            self.rate_policies[hostkey] = policy
+            ratecontrol.set_rate_policy(hostkey, policy)
+
     def _send_request(self, request, access_token=None):
         hostkey = request.get_host_key()
         ratecontrol.increment_requests(hostkey)
 
         request.access_token = access_token
+        if self.concurrent_requests and ratecontrol.http2_allowed(hostkey):
+            request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
         send = self._request_methods[request.method]
         data = request.data
         reply = send(request, data.encode('utf-8')) if data is not None else send(request)
@@ -354,6 +434,7 @@ class WebService(QtCore.QObject):
             original_host_key = (original_host, original_port)
             redirect_host_key = (redirect_host, redirect_port)
             ratecontrol.copy_minimal_delay(original_host_key, redirect_host_key)
+            ratecontrol.copy_http2_allowed(original_host_key, redirect_host_key)
 
             self.get(redirect_host,
                      redirect_port,
@@ -398,7 +479,7 @@ class WebService(QtCore.QObject):
                 self.add_request(request)
 
             elif handler is not None:
-                handler(reply.readAll(), reply, error)
+                self._call_handler(reply, handler, reply.readAll(), error)
 
             slow_down = (slow_down or code >= 500)
 
@@ -416,21 +497,104 @@ class WebService(QtCore.QObject):
                 # Redirect if found and not infinite
                 if redirect:
                     self._handle_redirect(reply, request, redirect)
+                elif reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) == 304:
+                    # Not modified, only returned to conditional requests
+                    self._call_handler(reply, handler, None, error)
                 elif request.response_parser:
-                    try:
-                        document = request.response_parser(reply)
-                    except Exception as e:
-                        url = reply.request().url().toString(QUrl.RemoveUserInfo)
-                        log.error("Unable to parse the response for %s: %s", url, e)
-                        document = reply.readAll()
-                        error = e
-                    finally:
-                        handler(document, reply, error)
+                    self._parse_reply(reply, request, handler, error)
                 else:
-                    handler(reply.readAll(), reply, error)
+                    self._call_handler(reply, handler, reply.readAll(), error)
 
         ratecontrol.adjust(hostkey, slow_down)
 
+    def _parse_reply(self, reply, request, handler, error):
+        url = reply.request().url().toString(QUrl.RemoveUserInfo)
+        size = reply.bytesAvailable()
+        if request.response_parser_threaded and size >= self.parse_in_thread_min_size:
+            # Read the data here, the reply must not be used from the worker
+            pending = _PendingReply(reply, handler, error=error, done=False)
+            self._pending_replies.setdefault(pending.owner, deque()).append(pending)
+            self._held_replies.add(reply)
+            thread.run_task(
+                partial(self._parse_data, request.response_parser, reply.readAll()),
+                partial(self._data_parsed, pending, url, size),
+                thread_pool=self._parse_thread_pool)
+            return
+        start = time.perf_counter()
+        try:
+            document = request.response_parser(reply)
+        except Exception as e:
+            log.error("Unable to parse the response for %s: %s", url, e)
+            document = reply.readAll()
+            error = e
+        self._add_parse_timing(url, size, time.perf_counter() - start, False)
+        self._call_handler(reply, handler, document, error)
+
+    @staticmethod
+    def _parse_data(parser, data):
+        # Runs on a worker thread, parsers read from a QIODevice
+        start = time.perf_counter()
+        buffer = QtCore.QBuffer()
+        buffer.setData(data)
+        buffer.open(QtCore.QIODevice.ReadOnly)
+        try:
+            document = parser(buffer)
+            error = None
+        except Exception as e:
+            document = data
+            error = e
+        finally:
+            buffer.close()
+        return document, error, time.perf_counter() - start
+
+    def _data_parsed(self, pending, url, size, result=None, error=None):
+        if error is None:
+            document, error, seconds = result
+            if error is not None:
+                log.error("Unable to parse the response for %s: %s", url, error)
+            self._add_parse_timing(url, size, seconds, True)
+        else:
+            document = None
+        if error is not None:
+            pending.error = error
+        pending.document = document
+        pending.done = True
+        self._flush_pending_replies(pending.owner)
+
+    def _add_parse_timing(self, url, size, seconds, threaded):
+        log.debug("Parsed %d bytes from %s in %.1f ms%s", size, url, seconds * 1000,
+                  ' (worker thread)' if threaded else '')
+        self.parse_timings.append(ParseTiming(url, size, seconds, threaded))
+
+    def _call_handler(self, reply, handler, document, error):
+        """Calls ``handler`` once the handlers of all replies to the same
+        owner which finished before ``reply`` were called."""
+        pending = _PendingReply(reply, handler, document, error)
+        queue = self._pending_replies.get(pending.owner)
+        if not queue:
+            handler(document, reply, error)
+            return
+        queue.append(pending)
+        self._held_replies.add(reply)
+
+    def _flush_pending_replies(self, owner):
+        queue = self._pending_replies.get(owner)
+        while queue and queue[0].done:
+            pending = queue.popleft()
+            if not queue:
+                del self._pending_replies[owner]
+            try:
+                pending.handler(pending.document, pending.reply, pending.error)
+            finally:
+                if pending.reply in self._held_replies:
+                    self._held_replies.discard(pending.reply)
+                    self._release_reply(pending.reply)
+
+    @staticmethod
+    def _release_reply(reply):
+        reply.close()
+        reply.deleteLater()
+
     def _process_reply(self, reply):
         try:
             request = self._active_requests.pop(reply)
@@ -440,15 +604,16 @@ class WebService(QtCore.QObject):
         try:
             self._handle_reply(reply, request)
         finally:
-            reply.close()
-            reply.deleteLater()
+            if reply not in self._held_replies:
+                self._release_reply(reply)
 
     def get(self, host, port, path, handler, parse_response_type=DEFAULT_RESPONSE_PARSER_TYPE,
             priority=False, important=False, mblogin=False, cacheloadcontrol=None, refresh=False,
-            queryargs=None):
+            queryargs=None, headers=None):
         request = WSGetRequest(host, port, path, handler, parse_response_type=parse_response_type,
                                mblogin=mblogin, cacheloadcontrol=cacheloadcontrol, refresh=refresh,
-                               queryargs=queryargs, priority=priority, important=important)
+                               queryargs=queryargs, priority=priority, important=important,
+                               headers=headers)
         return self.add_request(request)
 
     def post(self, host, port, path, data, handler, parse_response_type=DEFAULT_RESPONSE_PARSER_TYPE,
@@ -485,12 +650,22 @@ class WebService(QtCore.QObject):
         for reply in list(self._active_requests):
             reply.abort()
         self._init_queues()
+        self._pending_replies.clear()
+        for reply in self._held_replies:
+            self._release_reply(reply)
+        self._held_replies.clear()
 
-    def _count_pending_requests(self):
+    def count_pending_requests(self):
+        """Number of requests which are queued, active or being parsed."""
         count = len(self._active_requests)
+        count += sum(len(queue) for queue in self._pending_replies.values())
         for prio_queue in self._queues.values():
             for queue in prio_queue.values():
                 count += len(queue)
+        return count
+
+    def _count_pending_requests(self):
+        count = self.count_pending_requests()
         self.num_pending_web_requests = count
         if count != self._last_num_pending_web_requests:
             self._last_num_pending_web_requests = count
@@ -511,14 +686,25 @@ class WebService(QtCore.QObject):
                 if not queue:
                     del(self._queues[prio][hostkey])
                     continue
-                wait, d = ratecontrol.get_delay_to_next_request(hostkey)
-                if not wait:
+                for _ in range(self._max_requests_per_run(hostkey)):
+                    wait, d = ratecontrol.get_delay_to_next_request(hostkey)
+                    if d < delay:
+                        delay = d
+                    if wait:
+                        break
                     queue.popleft()()
-                if d < delay:
-                    delay = d
+                    # Hosts which have to wait before their next request
+                    # get one per run
+                    if d or not queue:
+                        break
         if delay < sys.maxsize:
             self._timer_run_next_task.start(delay)
 
+    def _max_requests_per_run(self, hostkey):
+        if self.concurrent_requests:
+            return max(1, ratecontrol.available_slots(hostkey))
+        return 1
+
     def add_task(self, func, request):
         hostkey = request.get_host_key()
         prio = int(request.priority)  # priority is a boolean
@@ -548,8 +734,14 @@ class WebService(QtCore.QObject):
             log.debug(e)
 
     @classmethod
-    def add_parser(cls, response_type, mimetype, parser):
-        cls.PARSERS[response_type] = Parser(mimetype=mimetype, parser=parser)
+    def add_parser(cls, response_type, mimetype, parser, threaded=False):
+        """Add a parser for ``response_type``.
+
+        ``parser`` is called with a QIODevice to read the response from.
+        With ``threaded`` set it may be called on a worker thread with a
+        buffer of the data for large responses, instead of the reply.
+        """
+        cls.PARSERS[response_type] = Parser(mimetype=mimetype, parser=parser, threaded=threaded)
 
     @classmethod
     def get_response_mimetype(cls, response_type):
@@ -566,5 +758,5 @@ class WebService(QtCore.QObject):
             raise UnknownResponseParserError(response_type)
 
 
-WebService.add_parser('xml', 'application/xml', parse_xml)
-WebService.add_parser('json', 'application/json', parse_json)
+WebService.add_parser('xml', 'application/xml', parse_xml, threaded=True)
+WebService.add_parser('json', 'application/json', parse_json, threaded=True)
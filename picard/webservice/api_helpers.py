@@ -17,6 +17,7 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
+import ipaddress
 import re
 
 from PyQt5.QtCore import QUrl
@@ -41,12 +42,30 @@ from picard.webservice import (
 
 ratecontrol.set_minimum_delay((ACOUSTID_HOST, ACOUSTID_PORT), 333)
 ratecontrol.set_minimum_delay((CAA_HOST, CAA_PORT), 0)
+ratecontrol.set_http2_allowed((CAA_HOST, CAA_PORT))
+
+# Rate policies of the MusicBrainz server, unless one is declared in the
+# rate_policies setting. Only servers on the local machine or network are
+# assumed to be mirrors which can be used without rate limiting.
+OFFICIAL_SERVER_RATE_POLICY = ratecontrol.RatePolicy(1000, None, ratecontrol.DEFAULT_BURST)
+MIRROR_SERVER_RATE_POLICY = ratecontrol.RatePolicy(0, 64, 64)
 
 
 def escape_lucene_query(text):
     return re.sub(r'([+\-&|!(){}\[\]\^"~*?:\\/])', r'\\\1', text)
 
 
+def is_local_host(host):
+    """Returns True if ``host`` is on the local machine or a private network."""
+    if host == 'localhost':
+        return True
+    try:
+        address = ipaddress.ip_address(host.strip('[]'))
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private
+
+
 def _wrap_xml_metadata(data):
     return ('<?xml version="1.0" encoding="UTF-8"?>'
             '<metadata xmlns="http://musicbrainz.org/ns/mmd-2.0#">%s</metadata>'
@@ -70,11 +89,13 @@ class APIHelper(object):
         return self._port
 
     def get(self, path_list, handler, priority=False, important=False, mblogin=False,
-            cacheloadcontrol=None, refresh=False, queryargs=None, parse_response_type=DEFAULT_RESPONSE_PARSER_TYPE):
+            cacheloadcontrol=None, refresh=False, queryargs=None, parse_response_type=DEFAULT_RESPONSE_PARSER_TYPE,
+            headers=None):
         path = self.api_path + "/".join(path_list)
         return self._webservice.get(self.host, self.port, path, handler,
                                     priority=priority, important=important, mblogin=mblogin,
-                                    refresh=refresh, queryargs=queryargs, parse_response_type=parse_response_type)
+                                    refresh=refresh, queryargs=queryargs, parse_response_type=parse_response_type,
+                                    headers=headers)
 
     def post(self, path_list, data, handler, priority=False, important=False,
              mblogin=True, queryargs=None, parse_response_type=DEFAULT_RESPONSE_PARSER_TYPE,
@@ -104,6 +125,7 @@ class MBAPIHelper(APIHelper):
 
     def __init__(self, webservice):
         super().__init__(None, None, "/ws/2/", webservice)
+        self._rate_limit = None
 
     @property
     def host(self):
@@ -113,8 +135,39 @@ class MBAPIHelper(APIHelper):
     def port(self):
         return config.setting['server_port']
 
+    def _update_rate_limit(self):
+        # A local mirror of the web service can be used without rate limiting
+        hostkey = (self.host, self.port)
+        rate_limit = (hostkey, config.setting['server_rate_limited'])
+        if rate_limit == self._rate_limit:
+            return
+        self._rate_limit = rate_limit
+        if hostkey in self._webservice.rate_policies:
+            return
+        if not rate_limit[1] or is_local_host(self.host):
+            policy = MIRROR_SERVER_RATE_POLICY
+        else:
+            policy = OFFICIAL_SERVER_RATE_POLICY
+        ratecontrol.set_rate_policy(hostkey, policy)
+
+    def get(self, path_list, handler, **kwargs):
+        self._update_rate_limit()
+        return super().get(path_list, handler, **kwargs)
+
+    def post(self, path_list, data, handler, **kwargs):
+        self._update_rate_limit()
+        return super().post(path_list, data, handler, **kwargs)
+
+    def put(self, path_list, data, handler, **kwargs):
+        self._update_rate_limit()
+        return super().put(path_list, data, handler, **kwargs)
+
+    def delete(self, path_list, handler, **kwargs):
+        self._update_rate_limit()
+        return super().delete(path_list, handler, **kwargs)
+
     def _get_by_id(self, entitytype, entityid, handler, inc=None, queryargs=None,
-                   priority=False, important=False, mblogin=False, refresh=False):
+                   priority=False, important=False, mblogin=False, refresh=False, headers=None):
         path_list = [entitytype, entityid]
         if queryargs is None:
             queryargs = {}
@@ -122,21 +175,25 @@ class MBAPIHelper(APIHelper):
             queryargs["inc"] = "+".join(inc)
         return self.get(path_list, handler,
                         priority=priority, important=important, mblogin=mblogin,
-                        refresh=refresh, queryargs=queryargs)
+                        refresh=refresh, queryargs=queryargs, headers=headers)
 
     def get_release_by_id(self, releaseid, handler, inc=None,
-                          priority=False, important=False, mblogin=False, refresh=False):
+                          priority=False, important=False, mblogin=False, refresh=False,
+                          headers=None):
         if inc is None:
             inc = []
         return self._get_by_id('release', releaseid, handler, inc,
-                               priority=priority, important=important, mblogin=mblogin, refresh=refresh)
+                               priority=priority, important=important, mblogin=mblogin, refresh=refresh,
+                               headers=headers)
 
     def get_track_by_id(self, trackid, handler, inc=None,
-                        priority=False, important=False, mblogin=False, refresh=False):
+                        priority=False, important=False, mblogin=False, refresh=False,
+                        headers=None):
         if inc is None:
             inc = []
         return self._get_by_id('recording', trackid, handler, inc,
-                               priority=priority, important=important, mblogin=mblogin, refresh=refresh)
+                               priority=priority, important=important, mblogin=mblogin, refresh=refresh,
+                               headers=headers)
 
     def lookup_discid(self, discid, handler, priority=True, important=True, refresh=False):
         inc = ['artist-credits', 'labels']
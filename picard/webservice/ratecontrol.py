@@ -20,7 +20,10 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
 
-from collections import defaultdict
+from collections import (
+    defaultdict,
+    namedtuple,
+)
 import math
 import sys
 import time
@@ -40,6 +43,14 @@ from picard import log
 #
 # >>> from picard.webservice import ratecontrol
 # >>> ratecontrol.set_minimum_delay(('myservice.org', 80), 100)  # 10 requests/second
+#
+# or a complete policy, also limiting the requests on the wire and the burst
+# size:
+#
+# >>> ratecontrol.set_rate_policy(('myservice.org', 80), ratecontrol.RatePolicy(100, 4, 5))
+#
+# Users can declare policies in the rate_policies setting, see
+# parse_rate_policy().
 
 
 # Minimun delay for the given hostkey (in milliseconds), can be set using
@@ -73,6 +84,77 @@ CONGESTION_SSTHRESH = defaultdict(lambda: 0)
 # Storage of last request times per host key
 LAST_REQUEST_TIMES = defaultdict(lambda: 0)
 
+# Host keys which may be contacted over HTTP/2, if enabled in the options.
+# Use set_http2_allowed() to add a host key.
+HTTP2_ALLOWED = set()
+
+# Requests are spaced by a token bucket per host key: a request takes a token,
+# tokens are added at one per REQUEST_DELAY up to REQUEST_BURST. A host which
+# was idle thus gets a short burst of requests, while the average rate stays
+# at one per REQUEST_DELAY. Bursts are disabled during backoff.
+DEFAULT_BURST = 2
+REQUEST_BURST = defaultdict(lambda: DEFAULT_BURST)
+
+# Tokens (float) available per host key, and when they were last updated
+REQUEST_TOKENS = {}
+
+# Maximum number of requests on the wire per host key, whatever the
+# congestion window size is. Hosts without entry are only limited by the
+# congestion window.
+MAX_IN_FLIGHT = {}
+
+# Number of requests sent per host key, see get_stats()
+REQUEST_COUNTS = defaultdict(lambda: 0)
+
+# Rate policy of a host key, see set_rate_policy()
+RatePolicy = namedtuple('RatePolicy', 'min_delay max_in_flight burst')
+
+
+def set_rate_policy(hostkey, policy):
+    """Set the rate policy of a host key
+            hostkey is an unique key, for example (host, port)
+            policy is a RatePolicy, its fields are:
+                min_delay: minimum average delay between requests in ms
+                max_in_flight: maximum number of unacknowledged requests,
+                               None for no limit beside the congestion window
+                burst: number of requests which can be sent without delay
+                       after the host was idle
+    """
+    REQUEST_DELAY_MINIMUM[hostkey] = policy.min_delay
+    if REQUEST_DELAY[hostkey] < policy.min_delay or REQUEST_DELAY_EXPONENT[hostkey] == 0:
+        # Apply a new policy right away unless backing off
+        REQUEST_DELAY[hostkey] = policy.min_delay
+    if policy.max_in_flight:
+        MAX_IN_FLIGHT[hostkey] = policy.max_in_flight
+        # Start the congestion window at the allowed size instead of
+        # growing it from a single request
+        CONGESTION_WINDOW_SIZE[hostkey] = max(CONGESTION_WINDOW_SIZE[hostkey],
+                                              float(policy.max_in_flight))
+    else:
+        MAX_IN_FLIGHT.pop(hostkey, None)
+    REQUEST_BURST[hostkey] = max(1, policy.burst)
+    REQUEST_TOKENS.pop(hostkey, None)
+    log.debug("%s: rate policy %r", hostkey, policy)
+
+
+def parse_rate_policy(text):
+    """Parse a rate policy declared as "host:port=min_delay,max_in_flight,burst"
+
+    max_in_flight and burst are optional, a max_in_flight of 0 means no
+    limit. Returns a tuple (hostkey, RatePolicy), raises ValueError if text
+    is invalid.
+    """
+    hostkey, sep, values = text.partition('=')
+    host, sep_port, port = hostkey.strip().rpartition(':')
+    if not sep or not sep_port or not host:
+        raise ValueError("Invalid rate policy %r" % text)
+    values = [int(value) for value in values.split(',')]
+    if not 1 <= len(values) <= 3 or any(value < 0 for value in values):
+        raise ValueError("Invalid rate policy %r" % text)
+    values += [0, DEFAULT_BURST][len(values) - 1:]
+    min_delay, max_in_flight, burst = values
+    return (host, int(port)), RatePolicy(min_delay, max_in_flight or None, burst)
+
 
 def set_minimum_delay(hostkey, delay_ms):
     """Set the minimun delay between requests
@@ -89,13 +171,85 @@ def current_delay(hostkey):
     return REQUEST_DELAY[hostkey]
 
 
+def get_stats(hostkey=None):
+    """Returns live statistics of the rate control
+            hostkey is an unique key, for example (host, port), if None the
+            statistics of all host keys which were contacted are returned,
+            as a dict of hostkey: stats
+       The stats of a host key are a dict with the current delay, minimum
+       delay, window size, requests in flight, available tokens, burst size
+       and the number of requests sent.
+    """
+    if hostkey is None:
+        return {key: get_stats(key) for key in list(REQUEST_COUNTS)}
+    return {
+        'delay': REQUEST_DELAY[hostkey],
+        'min_delay': REQUEST_DELAY_MINIMUM[hostkey],
+        'window_size': _window_size(hostkey),
+        'in_flight': CONGESTION_UNACK[hostkey],
+        'tokens': _tokens(hostkey, time.time()),
+        'burst': _burst(hostkey),
+        'requests': REQUEST_COUNTS[hostkey],
+    }
+
+
+def set_http2_allowed(hostkey, allowed=True):
+    """Allow or disallow HTTP/2 for this hostkey
+            hostkey is an unique key, for example (host, port)
+    """
+    if allowed:
+        HTTP2_ALLOWED.add(hostkey)
+    else:
+        HTTP2_ALLOWED.discard(hostkey)
+
+
+def http2_allowed(hostkey):
+    """Returns True if requests to hostkey may use HTTP/2"""
+    return hostkey in HTTP2_ALLOWED
+
+
+def _window_size(hostkey):
+    size = int(CONGESTION_WINDOW_SIZE[hostkey])
+    if hostkey in MAX_IN_FLIGHT:
+        size = min(size, MAX_IN_FLIGHT[hostkey])
+    return size
+
+
+def available_slots(hostkey):
+    """Returns the number of requests which can be sent to hostkey before
+       the congestion window is full
+    """
+    return max(0, _window_size(hostkey) - CONGESTION_UNACK[hostkey])
+
+
+def _burst(hostkey):
+    if REQUEST_DELAY_EXPONENT[hostkey]:
+        return 1
+    return REQUEST_BURST[hostkey]
+
+
+def _tokens(hostkey, now):
+    """Returns the tokens available for hostkey, refilled until now"""
+    burst = _burst(hostkey)
+    try:
+        tokens, last = REQUEST_TOKENS[hostkey]
+    except KeyError:
+        return burst
+    interval = REQUEST_DELAY[hostkey]
+    if interval:
+        tokens += (now - last) * 1000 / interval
+    else:
+        tokens = burst
+    return min(tokens, burst)
+
+
 def get_delay_to_next_request(hostkey):
     """Calculate delay to next request to hostkey (host, port)
        returns a tuple (wait, delay) where:
            wait is True if a delay is needed
            delay is the delay in milliseconds to next request
     """
-    if CONGESTION_UNACK[hostkey] >= int(CONGESTION_WINDOW_SIZE[hostkey]):
+    if CONGESTION_UNACK[hostkey] >= _window_size(hostkey):
         # We've maxed out the number of requests to `hostkey`, so wait
         # until responses begin to come back.  (See `_timer_run_next_task`
         # strobe in `_handle_reply`.)
@@ -105,24 +259,22 @@ def get_delay_to_next_request(hostkey):
     if not interval:
         log.debug("%s: Starting another request without delay", hostkey)
         return (False, 0)
-    last_request = LAST_REQUEST_TIMES[hostkey]
-    if not last_request:
-        log.debug("%s: First request", hostkey)
-        _remember_request_time(hostkey)  # set it on first run
-        return (False, interval)
-    elapsed = (time.time() - last_request) * 1000
-    if elapsed >= interval:
-        log.debug("%s: Last request was %d ms ago, starting another one", hostkey, elapsed)
-        return (False, interval)
-    delay = int(math.ceil(interval - elapsed))
-    log.debug("%s: Last request was %d ms ago, waiting %d ms before starting another one",
-              hostkey, elapsed, delay)
+    tokens = _tokens(hostkey, time.time())
+    if tokens >= 1:
+        # Delay until a token is available again after this request
+        delay = max(0, int(math.ceil((2 - tokens) * interval)))
+        log.debug("%s: %.1f request tokens left, starting another one", hostkey, tokens)
+        return (False, delay)
+    delay = int(math.ceil((1 - tokens) * interval))
+    log.debug("%s: No request token left, waiting %d ms before starting another one",
+              hostkey, delay)
     return (True, delay)
 
 
 def _remember_request_time(hostkey):
-    if REQUEST_DELAY[hostkey]:
-        LAST_REQUEST_TIMES[hostkey] = time.time()
+    now = time.time()
+    LAST_REQUEST_TIMES[hostkey] = now
+    REQUEST_TOKENS[hostkey] = (_tokens(hostkey, now) - 1, now)
 
 
 def increment_requests(hostkey):
@@ -130,6 +282,7 @@ def increment_requests(hostkey):
        It has to be called on each request
     """
     _remember_request_time(hostkey)
+    REQUEST_COUNTS[hostkey] += 1
     # Increment the number of unack'd requests on sending a new one
     CONGESTION_UNACK[hostkey] += 1
     log.debug("%s: Incrementing requests to: %d", hostkey, CONGESTION_UNACK[hostkey])
@@ -154,6 +307,15 @@ def copy_minimal_delay(from_hostkey, to_hostkey):
                   to_hostkey, from_hostkey, REQUEST_DELAY_MINIMUM[to_hostkey])
 
 
+def copy_http2_allowed(from_hostkey, to_hostkey):
+    """Allow HTTP/2 for to_hostkey if it is allowed for from_hostkey
+        Useful for redirections
+    """
+    if from_hostkey in HTTP2_ALLOWED and to_hostkey not in HTTP2_ALLOWED:
+        HTTP2_ALLOWED.add(to_hostkey)
+        log.debug("%s: Allow HTTP/2, as for %s", to_hostkey, from_hostkey)
+
+
 def adjust(hostkey, slow_down):
     """Adjust `REQUEST` and `CONGESTION` metrics when a HTTP request completes.
 
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""Measure how ClusterEngine.cluster scales with the number of distinct tokens.
+
+Call with benchmark-cluster.py [threshold] from the source directory.
+
+The default threshold is the default of the cluster_lookup_threshold option,
+low enough for similar tokens to be compared. With a threshold of 1.0 only
+identical tokens are paired and the similarity computation is skipped.
+"""
+
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from picard.cluster import (  # noqa: E402
+    ClusterDict,
+    ClusterEngine,
+)
+
+
+SIZES = (500, 1000, 2000, 5000, 10000)
+
+DEFAULT_THRESHOLD = 0.7
+
+
+def random_word(rnd):
+    length = rnd.randint(3, 40)
+    return ''.join(rnd.choice(string.ascii_letters + '   ') for i in range(length))
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THRESHOLD
+    rnd = random.Random(42)
+    print("threshold %.2f" % threshold)
+    for size in SIZES:
+        cluster_dict = ClusterDict()
+        while cluster_dict.get_size() < size:
+            cluster_dict.add(random_word(rnd))
+        engine = ClusterEngine(cluster_dict)
+        start = time.perf_counter()
+        engine.cluster(threshold)
+        elapsed = time.perf_counter() - start
+        print("%7d tokens: %8.3f s" % (size, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -34,6 +34,7 @@ settings = {
     'itunes_compatible_grouping': False,
     'aac_save_ape': True,
     'ac3_save_ape': True,
+    'lazy_embedded_images': False,
 }
 
 
@@ -410,6 +411,15 @@ class CommonTests:
             audio_original = picard.formats.open_(self.filename)
             self.assertEqual(type(audio), type(audio_original))
 
+        @skipUnlessTestfile
+        def test_guess_format_magic(self):
+            audio_original = picard.formats.open_(self.filename)
+            if not audio_original.MAGIC:
+                raise unittest.SkipTest("Format has no magic")
+            temp_file = self.copy_file_tmp(self.testfile_path, '.unknown')
+            audio = picard.formats.guess_format(temp_file)
+            self.assertEqual(type(audio_original), type(audio))
+
         @skipUnlessTestfile
         def test_split_ext(self):
             f = picard.formats.open_(self.filename)
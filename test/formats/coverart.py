@@ -1,12 +1,19 @@
 import os.path
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
 
 from picard import config
 from picard.coverart.image import (
     CoverArtImage,
+    CoverArtImageIOError,
+    LazyTagCoverArtImage,
     TagCoverArtImage,
 )
 import picard.formats
 from picard.metadata import Metadata
+from picard.metadatacache import MetadataCache
 
 from .common import (
     CommonTests,
@@ -55,6 +62,94 @@ class CommonCoverArtTests:
                 self.assertEqual(test.mimetype, image.mimetype)
                 self.assertEqual(test, image)
 
+        @skipUnlessTestfile
+        def test_cover_art_lazy(self):
+            config.setting['lazy_embedded_images'] = True
+            image = CoverArtImage(data=self.jpegdata, types=["front"])
+            file_save_image(self.filename, image)
+            f = picard.formats.open_(self.filename)
+            loaded_metadata = f._load(self.filename)
+            loaded_image = loaded_metadata.images[0]
+            self.assertIsInstance(loaded_image, LazyTagCoverArtImage)
+            self.assertFalse(loaded_image.datahash.loaded)
+            self.assertEqual(image.mimetype, loaded_image.mimetype)
+            self.assertEqual(image.datahash, loaded_image.datahash)
+            self.assertEqual(self.jpegdata, loaded_image.data)
+            self.assertTrue(loaded_image.datahash.loaded)
+
+        @skipUnlessTestfile
+        def test_cover_art_lazy_kept_on_save(self):
+            config.setting['lazy_embedded_images'] = True
+            file_save_image(self.filename, CoverArtImage(data=self.jpegdata, types=["front"]))
+            f = picard.formats.open_(self.filename)
+            f.orig_metadata = f._load(self.filename)
+            metadata = Metadata(title='Title', images=f.orig_metadata.images)
+            f._save(self.filename, metadata)
+            self.assertFalse(f.orig_metadata.images[0].datahash.loaded)
+            loaded_metadata = f._load(self.filename)
+            self.assertEqual('Title', loaded_metadata['title'])
+            self.assertEqual(self.jpegdata, loaded_metadata.images[0].data)
+
+        @skipUnlessTestfile
+        def test_cover_art_lazy_from_metadata_cache(self):
+            config.setting.update({
+                'lazy_embedded_images': True,
+                'itunes_compatible_grouping': False,
+                'rating_user_email': 'users@musicbrainz.org',
+                'rating_steps': 6,
+            })
+            file_save_image(self.filename, CoverArtImage(data=self.jpegdata, types=["front"]))
+            cache = MetadataCache(os.path.join(os.path.dirname(self.filename), 'metadata.sqlite'))
+            self.addCleanup(cache.close)
+            f = picard.formats.open_(self.filename)
+            f.tagger = MagicMock(metadata_cache=cache)
+            f._load_cached(self.filename)
+            f = picard.formats.open_(self.filename)
+            f.tagger = MagicMock(metadata_cache=cache)
+            with patch.object(f, '_load') as load:
+                loaded_image = f._load_cached(self.filename).images[0]
+            load.assert_not_called()
+            self.assertIsInstance(loaded_image, LazyTagCoverArtImage)
+            self.assertFalse(loaded_image.datahash.loaded)
+            self.assertEqual(self.jpegdata, loaded_image.data)
+
+        @skipUnlessTestfile
+        def test_cover_art_lazy_file_renamed(self):
+            config.setting.update({
+                'lazy_embedded_images': True,
+                'rename_files': True,
+                'move_files': False,
+                'file_naming_format': '%title%',
+                'dont_write_tags': False,
+                'preserve_timestamps': False,
+                'delete_empty_dirs': False,
+                'save_images_to_files': False,
+                'ascii_filenames': False,
+                'enabled_plugins': [],
+                'windows_compatibility': True,
+            })
+            file_save_image(self.filename, CoverArtImage(data=self.jpegdata, types=["front"]))
+            f = picard.formats.open_(self.filename)
+            f.orig_metadata = f._load(self.filename)
+            f.metadata.copy(f.orig_metadata)
+            metadata = Metadata(title='Renamed', images=f.orig_metadata.images)
+            new_filename = f._save_and_rename(self.filename, metadata)
+            self.assertNotEqual(self.filename, new_filename)
+            self.assertFalse(os.path.exists(self.filename))
+            loaded_image = f.orig_metadata.images[0]
+            self.assertEqual(new_filename, loaded_image.sourcefile)
+            self.assertEqual(self.jpegdata, loaded_image.data)
+
+        @skipUnlessTestfile
+        def test_cover_art_lazy_file_changed(self):
+            config.setting['lazy_embedded_images'] = True
+            file_save_image(self.filename, CoverArtImage(data=self.jpegdata, types=["front"]))
+            f = picard.formats.open_(self.filename)
+            loaded_image = f._load(self.filename).images[0]
+            file_save_image(self.filename, CoverArtImage(data=self.pngdata, types=["front"]))
+            with self.assertRaises(CoverArtImageIOError):
+                loaded_image.data
+
         def test_cover_art_with_types(self):
             expected = set('abcdefg'[:]) if self.supports_types else set('a')
             f = picard.formats.open_(self.filename)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.albumloader import AlbumLoader
+
+
+class FakeAlbum:
+
+    def __init__(self, album_id, files=0):
+        self.id = album_id
+        self.files = files
+        self.status = None
+        self.loaded = []
+
+    def get_num_unmatched_files(self):
+        return self.files
+
+    def update(self):
+        pass
+
+    def load(self):
+        self.loaded.append(True)
+
+
+@patch('PyQt5.QtCore.QTimer.singleShot', lambda delay, func: None)
+@patch('picard.webservice.ratecontrol.current_delay', lambda hostkey: 1000)
+class AlbumLoaderTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = {
+            'server_host': 'musicbrainz.org',
+            'server_port': 443,
+            'album_loader_window': 2,
+        }
+        self.loader = AlbumLoader()
+        self.loader.tagger = MagicMock()
+
+    def loading(self):
+        return sorted(self.loader._loading)
+
+    def test_most_waiting_files_first(self):
+        albums = [FakeAlbum('a', 1), FakeAlbum('b', 5), FakeAlbum('c', 3), FakeAlbum('d', 1)]
+        for album in albums:
+            self.loader.queue(album)
+        self.loader.queue(albums[0])
+        self.assertEqual(4, self.loader.pending_count)
+        self.loader._fill()
+        self.assertEqual(['b', 'c'], self.loading())
+        # More files arrived for the last album while the others loaded
+        albums[3].files = 10
+        self.loader.done(albums[1])
+        self.assertEqual(['c', 'd'], self.loading())
+        self.loader.done(albums[2])
+        self.loader.done(albums[3])
+        self.assertEqual(['a'], self.loading())
+        self.loader.done(albums[0])
+        self.assertEqual(0, self.loader.pending_count)
+        self.assertEqual([[True]] * 4, [album.loaded for album in albums])
+
+    def test_removed(self):
+        albums = [FakeAlbum('a', 2), FakeAlbum('b', 1), FakeAlbum('c')]
+        for album in albums:
+            self.loader.queue(album)
+        self.loader._fill()
+        self.loader.remove(albums[2])
+        self.loader.remove(albums[0])
+        self.assertEqual(['b'], self.loading())
+        self.assertEqual([], albums[2].loaded)
+
+    def test_unthrottled_server(self):
+        for i in range(5):
+            self.loader.queue(FakeAlbum(str(i)))
+        with patch('picard.webservice.ratecontrol.current_delay', lambda hostkey: 0):
+            self.loader._fill()
+        self.assertEqual(5, len(self.loading()))
+
+    def test_progress(self):
+        for i in range(4):
+            self.loader.queue(FakeAlbum(str(i)))
+        self.loader._finished_times.extend([10.0, 12.0])
+        self.loader._fill()
+        self.loader.tagger.window.set_statusbar_message.assert_called_once_with(
+            "Loading albums: %(queued)d queued, %(loading)d loading, about %(eta)s remaining",
+            {'queued': 2, 'loading': 2, 'eta': '0:08'})
+
+    def test_final_progress(self):
+        albums = [FakeAlbum(str(i)) for i in range(3)]
+        for album in albums:
+            self.loader.queue(album)
+        self.loader._fill()
+        for album in albums:
+            self.loader.done(album)
+        self.loader.tagger.window.set_statusbar_message.assert_called_with(
+            "Albums loaded: %(count)d", {'count': 3})
+        self.assertFalse(self.loader._reporting)
+
+    def test_load_now(self):
+        albums = [FakeAlbum('a', 2), FakeAlbum('b', 1), FakeAlbum('c')]
+        for album in albums:
+            self.loader.queue(album)
+        self.loader._fill()
+        self.loader.load_now(albums[2])
+        self.assertEqual([True], albums[2].loaded)
+        self.assertEqual(0, len(self.loader._queued))
+        # Not loaded twice when it is done
+        self.loader.done(albums[2])
+        self.loader.load_now(albums[0])
+        self.assertEqual([[True]] * 3, [album.loaded for album in albums])
@@ -1,9 +1,15 @@
-from unittest.mock import MagicMock
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
 
 from test.picardtestcase import PicardTestCase
 
 from picard import config
-from picard.webservice import WebService
+from picard.webservice import (
+    WebService,
+    ratecontrol,
+)
 from picard.webservice.api_helpers import (
     APIHelper,
     MBAPIHelper,
@@ -48,7 +54,7 @@ class APITest(PicardTestCase):
 class MBAPITest(PicardTestCase):
 
     def setUp(self):
-        self.config = {'server_host': "mb.org", "server_port": 443}
+        self.config = {'server_host': "mb.org", "server_port": 443, "server_rate_limited": True}
         config.setting = self.config.copy()
         self.ws = MagicMock(auto_spec=WebService)
         self.api = MBAPIHelper(self.ws)
@@ -87,6 +93,44 @@ class MBAPITest(PicardTestCase):
         self.assertInPath(self.ws.get, "/recording/1")
         self._test_inc_args(self.ws.get, inc_args_list)
 
+    def reset_rate_control(self, hostkey):
+        for values in (ratecontrol.REQUEST_DELAY_MINIMUM, ratecontrol.REQUEST_DELAY,
+                       ratecontrol.CONGESTION_WINDOW_SIZE, ratecontrol.MAX_IN_FLIGHT,
+                       ratecontrol.REQUEST_BURST, ratecontrol.REQUEST_TOKENS):
+            values.pop(hostkey, None)
+
+    def test_server_rate_policy(self):
+        self.addCleanup(self.reset_rate_control, ("mb.org", 443))
+        self.addCleanup(self.reset_rate_control, ("musicbrainz.org", 443))
+        self.api.get_track_by_id("1", None)
+        self.assertEqual(1000, ratecontrol.REQUEST_DELAY_MINIMUM[("mb.org", 443)])
+        config.setting['server_host'] = "musicbrainz.org"
+        self.api.get_track_by_id("1", None)
+        self.assertEqual(1000, ratecontrol.REQUEST_DELAY_MINIMUM[("musicbrainz.org", 443)])
+        config.setting['server_rate_limited'] = False
+        self.api.get_track_by_id("1", None)
+        self.assertEqual(0, ratecontrol.REQUEST_DELAY_MINIMUM[("musicbrainz.org", 443)])
+
+    def test_local_server_rate_policy(self):
+        for host in ("localhost", "127.0.0.1", "192.168.1.10", "[::1]"):
+            self.addCleanup(self.reset_rate_control, (host, 5000))
+            config.setting['server_host'] = host
+            config.setting['server_port'] = 5000
+            self.api.get_track_by_id("1", None)
+            self.assertEqual(0, ratecontrol.REQUEST_DELAY_MINIMUM[(host, 5000)])
+            self.assertEqual(64, ratecontrol.MAX_IN_FLIGHT[(host, 5000)])
+
+    def test_rate_policy_applied_before_post(self):
+        self.addCleanup(self.reset_rate_control, ("mb.org", 443))
+        self.api.submit_ratings({}, None)
+        self.assertEqual(1000, ratecontrol.REQUEST_DELAY_MINIMUM[("mb.org", 443)])
+
+    def test_declared_rate_policy_kept(self):
+        self.ws.rate_policies = {("mb.org", 443): None}
+        with patch('picard.webservice.ratecontrol.set_rate_policy') as set_rate_policy:
+            self.api.get_track_by_id("1", None)
+        set_rate_policy.assert_not_called()
+
     def test_get_collection(self):
         inc_args_list = ["releases", "artist-credits", "media"]
         self.api.get_collection("1", None)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard.batch import (
+    BatchTagger,
+    HeadlessWindow,
+)
+from picard.file import File
+from picard.launcher import main
+from picard.track import Track
+
+
+class HeadlessWindowTest(PicardTestCase):
+
+    def test_statusbar_message_named(self):
+        echo = MagicMock()
+        HeadlessWindow().set_statusbar_message("File %(filename)s", {'filename': 'x.mp3'}, echo=echo)
+        echo.assert_called_once_with("File x.mp3")
+
+    def test_statusbar_message_positional(self):
+        echo = MagicMock()
+        HeadlessWindow().set_statusbar_message("%s of %d", 'a', 2, echo=echo)
+        echo.assert_called_once_with("a of 2")
+
+    def test_statusbar_message_no_echo(self):
+        HeadlessWindow().set_statusbar_message("%s", 'a', echo=None)
+        HeadlessWindow().enable_cluster(True)
+        HeadlessWindow().enable_submit(False)
+
+
+class BatchTaggerTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file = File('somepath/somefile.mp3')
+        self.file.state = File.NORMAL
+
+    def test_file_status(self):
+        self.assertEqual('unmatched', BatchTagger._file_status(self.file, False))
+        self.file.parent = Track('00000000-0000-0000-0000-000000000000')
+        self.assertEqual('matched', BatchTagger._file_status(self.file, False))
+        self.assertEqual('saved', BatchTagger._file_status(self.file, True))
+        self.file.state = File.ERROR
+        self.assertEqual('error', BatchTagger._file_status(self.file, True))
+
+    def fake_batch_tagger(self):
+        tagger = MagicMock()
+        tagger.file_scanner.pending_count = 0
+        tagger.file_loader.pending_count = 0
+        tagger.cluster_jobs = set()
+        tagger.webservice.count_pending_requests.return_value = 0
+        tagger.thread_pool.activeThreadCount.return_value = 0
+        tagger.priority_thread_pool.activeThreadCount.return_value = 0
+        tagger.file_saver.pending_count = 0
+        tagger.album_loader.pending_count = 0
+        tagger.files = {self.file.filename: self.file}
+        return tagger
+
+    def test_is_busy(self):
+        tagger = self.fake_batch_tagger()
+        self.assertFalse(BatchTagger.is_busy(tagger))
+        self.file.state = File.PENDING
+        self.assertTrue(BatchTagger.is_busy(tagger))
+        self.file.state = File.NORMAL
+        tagger.webservice.count_pending_requests.return_value = 1
+        self.assertTrue(BatchTagger.is_busy(tagger))
+        tagger.webservice.count_pending_requests.return_value = 0
+        tagger.file_scanner.pending_count = 1
+        self.assertTrue(BatchTagger.is_busy(tagger))
+        tagger.file_scanner.pending_count = 0
+        tagger.cluster_jobs.add(MagicMock())
+        self.assertTrue(BatchTagger.is_busy(tagger))
+
+
+class LauncherTest(PicardTestCase):
+
+    def test_batch_mode(self):
+        with patch('sys.argv', ['picard', '--batch', '--save', 'a.mp3']), \
+                patch('picard.batch.main') as batch_main, \
+                patch('picard.tagger.main') as tagger_main:
+            main('locale')
+        tagger_main.assert_not_called()
+        picard_args, localedir = batch_main.call_args[0]
+        self.assertTrue(picard_args.save)
+        self.assertEqual(['a.mp3'], picard_args.FILE)
+        self.assertEqual('locale', localedir)
+
+    def test_gui_mode(self):
+        with patch('sys.argv', ['picard', 'a.mp3']), \
+                patch('picard.batch.main') as batch_main, \
+                patch('picard.tagger.main') as tagger_main:
+            main('locale', False)
+        batch_main.assert_not_called()
+        picard_args, unparsed_args, localedir, autoupdate = tagger_main.call_args[0]
+        self.assertEqual(['a.mp3'], picard_args.FILE)
+        self.assertFalse(autoupdate)
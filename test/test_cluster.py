@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+from heapq import (
+    heappop,
+    heappush,
+)
+from unittest.mock import patch
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.cluster import (
+    Cluster,
+    ClusterDict,
+    ClusterEngine,
+    ClusterJob,
+)
+from picard.similarity import similarity
+
+
+WORDS = [
+    'The Wall', 'the wall', 'The Wal', 'Wall, The', 'Abbey Road',
+    'Abbey Rd', 'abbey road!', 'Revolver', 'Revolve', 'Let It Be',
+    'Let It Be... Naked', 'Help!', 'Help', 'Yellow Submarine', 'A',
+    'AB', 'ABC', '!!!', '...', 'Ænima', 'Ænema', 'Revolver',
+]
+
+
+def brute_force_heap(cluster_dict, threshold):
+    heap = []
+    for y in range(cluster_dict.get_size()):
+        token_y = cluster_dict.get_token(y).lower()
+        for x in range(y):
+            token_x = cluster_dict.get_token(x).lower()
+            c = similarity(token_x, token_y)
+            if c >= threshold:
+                heappush(heap, ((1.0 - c), [x, y]))
+    return [heappop(heap) for i in range(len(heap))]
+
+
+class ClusterEngineTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cluster_dict = ClusterDict()
+        for word in WORDS:
+            self.cluster_dict.add(word)
+
+    def candidate_heap(self, threshold):
+        engine = ClusterEngine(self.cluster_dict)
+        tokens = [self.cluster_dict.get_token(i).lower()
+                  for i in range(self.cluster_dict.get_size())]
+        heap = []
+        for x, partners in engine._candidate_rows(threshold):
+            for y in partners:
+                c = similarity(tokens[x], tokens[y])
+                if c >= threshold:
+                    heappush(heap, ((1.0 - c), [min(x, y), max(x, y)]))
+        return [heappop(heap) for i in range(len(heap))]
+
+    def test_candidates_match_brute_force(self):
+        for threshold in (0.0, 0.3, 0.4, 0.5, 0.7, 0.8, 0.9, 1.0):
+            self.assertEqual(brute_force_heap(self.cluster_dict, threshold),
+                             self.candidate_heap(threshold), threshold)
+
+    def test_candidate_pairs_are_unique(self):
+        engine = ClusterEngine(self.cluster_dict)
+        pairs = [frozenset((x, y)) for x, partners in engine._candidate_rows(0.0) for y in partners]
+        self.assertEqual(len(pairs), len(set(pairs)))
+        size = self.cluster_dict.get_size()
+        self.assertEqual(size * (size - 1) // 2, len(pairs))
+
+    def test_exact_threshold_only_pairs_identical(self):
+        engine = ClusterEngine(self.cluster_dict)
+        pairs = [{self.cluster_dict.get_word(x), self.cluster_dict.get_word(y)}
+                 for x, partners in engine._candidate_rows(1.0) for y in partners]
+        self.assertIn({'The Wall', 'the wall'}, pairs)
+        self.assertIn({'Abbey Road', 'abbey road!'}, pairs)
+        self.assertNotIn({'The Wall', 'The Wal'}, pairs)
+
+    def test_cluster(self):
+        engine = ClusterEngine(self.cluster_dict)
+        engine.cluster(1.0)
+        wall = engine.get_cluster_from_id(self.cluster_dict.add('The Wall'))
+        self.assertIsNotNone(wall)
+        self.assertEqual(wall, engine.get_cluster_from_id(self.cluster_dict.add('the wall')))
+        self.assertNotEqual(wall, engine.get_cluster_from_id(self.cluster_dict.add('The Wal')))
+
+
+class ClusterSnapshotTest(PicardTestCase):
+
+    snapshot = (
+        ('/music/a/01.mp3', 'The Wall', 'Pink Floyd'),
+        ('/music/a/02.mp3', 'the wall', 'Pink Floyd'),
+        ('/music/b/01.mp3', 'Abbey Road', 'The Beatles'),
+        ('/music/b/02.mp3', 'Abbey Road', 'The Beatles'),
+        ('/music/c/01.mp3', 'Help!', 'The Beatles'),
+    )
+
+    def test_cluster_snapshot(self):
+        clusters = sorted(Cluster.cluster_snapshot(self.snapshot, 1.0))
+        self.assertEqual([
+            ('Abbey Road', 'The Beatles', [2, 3]),
+            ('the wall', 'Pink Floyd', [0, 1]),
+        ], clusters)
+
+
+class FakeFile:
+
+    def __init__(self, filename, album, artist):
+        self.filename = filename
+        self.metadata = {'album': album, 'artist': artist, 'albumartist': ''}
+
+    def __repr__(self):
+        return self.filename
+
+
+class ClusterJobTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = {'windows_compatibility': False}
+        self.files = [FakeFile('/m/%d.mp3' % i, 'Album %d' % i, 'Artist') for i in range(4)]
+        self.delivered = []
+        self.job = ClusterJob(self.files, 1.0, self.callback)
+
+    def callback(self, name, artist, files):
+        self.delivered.append((name, files))
+
+    def test_deliver(self):
+        self.job._deliver([('a', 'x', [0, 1]), ('b', 'y', [2, 3])])
+        self.assertEqual([('a', self.files[:2]), ('b', self.files[2:])], self.delivered)
+
+    def test_deliver_skips_removed_files(self):
+        self.job.discard_files(self.files[:3] + [FakeFile('/other.mp3', '', '')])
+        self.assertFalse(self.job.cancelled)
+        self.job._deliver([('a', 'x', [0, 1]), ('b', 'y', [2, 3])])
+        self.assertEqual([('b', self.files[3:])], self.delivered)
+
+    def test_cancel_stops_clustering(self):
+        files = [FakeFile('/m/%d.mp3' % i, 'Album %d' % i, 'Artist %d' % i) for i in range(20)]
+        job = ClusterJob(files, 0.5, self.callback)
+        compared = []
+
+        def cancel_on_compare(a, b):
+            compared.append((a, b))
+            job.cancel()
+            return 0.0
+
+        with patch('picard.cluster.similarity', cancel_on_compare):
+            self.assertIsNone(job._cluster())
+        # Only the first row of candidate pairs is compared
+        self.assertLess(len(compared), 20)
+
+    def test_cancel_when_all_files_removed(self):
+        self.job.discard_files(self.files)
+        self.assertTrue(self.job.cancelled)
+        self.job._deliver([('a', 'x', [0, 1])])
+        self.assertEqual([], self.delivered)
@@ -62,6 +62,41 @@ class TestPicardConfig(TestPicardConfigCommon):
         self.config.setting.remove("text_option")
         self.assertEqual(self.config.setting["text_option"], "abc")
 
+    def test_snapshot(self):
+        IntOption("setting", "int_option", 666)
+        ListOption("setting", "list_option", ["a"])
+
+        snapshot = self.config.setting.snapshot()
+        self.assertIs(snapshot, self.config.setting.snapshot())
+        self.assertEqual(666, snapshot["int_option"])
+
+        self.config.setting["int_option"] = 333
+        self.assertEqual(666, snapshot["int_option"])
+        new_snapshot = self.config.setting.snapshot()
+        self.assertNotEqual(snapshot.version, new_snapshot.version)
+        self.assertEqual(333, new_snapshot["int_option"])
+
+        # Mutable values are copied
+        snapshot["list_option"].append("b")
+        self.config.setting["list_option"].append("b")
+        self.assertEqual(["a"], snapshot["list_option"])
+        self.assertEqual(["a"], self.config.setting["list_option"])
+
+    def test_use_snapshot(self):
+        IntOption("setting", "int_option", 666)
+        snapshot = self.config.setting.snapshot()
+        self.config.setting["int_option"] = 333
+        with self.config.setting.use_snapshot(snapshot):
+            self.assertEqual(666, self.config.setting["int_option"])
+        self.assertEqual(333, self.config.setting["int_option"])
+
+    def test_cached_value_write_through(self):
+        IntOption("setting", "int_option", 666)
+        self.assertEqual(666, self.config.setting["int_option"])
+        self.config.setValue('setting/int_option', 333)
+        self.assertEqual(333, self.config.setting["int_option"])
+        self.assertEqual(333, self.config.value('setting/int_option'))
+
 
 class TestPicardConfigTextOption(TestPicardConfigCommon):
 
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import os.path
+import shutil
+import tempfile
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.coverart import CoverArt
+from picard.coverart.image import CoverArtImage
+from picard.i18n import setup_gettext
+
+
+class CoverArtWindowTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        tmp_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_path)
+        setup_gettext(os.path.join(tmp_path, 'locale'), 'C')
+        config.setting = {
+            'save_images_to_tags': True,
+            'save_images_to_files': False,
+            'embed_only_one_front_image': False,
+            'cover_art_download_window': 3,
+        }
+        self.album = MagicMock()
+        self.album.id = 'albumid'
+        self.album.tagger.albums = {'albumid': self.album}
+        self.album._requests = 0
+        self.downloads = []
+        self.album.tagger.webservice.download.side_effect = self.download
+        self.coverart = CoverArt(self.album, MagicMock(), {})
+        self.coverart.providers = iter([])
+        self.coverart._message = MagicMock()
+        self.stored = []
+        self.coverart._set_metadata = self.set_metadata
+        self.slots = 10
+        patcher = patch('picard.webservice.ratecontrol.available_slots', lambda hostkey: self.slots)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def download(self, host, port, path, handler, **kwargs):
+        self.downloads.append((path, handler))
+
+    def set_metadata(self, coverartimage, data):
+        self.stored.append(coverartimage)
+        if not self.coverart.front_image_found:
+            self.coverart.front_image_found = coverartimage.is_front_image()
+
+    def queue(self, name, types=None, support_types=True):
+        image = CoverArtImage(url='https://example.com/%s' % name, types=types or ['back'],
+                              support_types=support_types)
+        self.coverart.queue_put(image)
+        return image
+
+    def finish(self, path):
+        for download in self.downloads:
+            if download[0] == path:
+                self.downloads.remove(download)
+                download[1](b'x' * 1000, MagicMock(), None)
+                return
+        self.fail('%s is not downloading' % path)
+
+    def downloading(self):
+        return [path for path, handler in self.downloads]
+
+    def test_window(self):
+        images = [self.queue('%d' % i) for i in range(5)]
+        self.coverart.next_in_queue()
+        self.assertEqual(['/0', '/1', '/2'], self.downloading())
+        self.assertEqual(3, self.album._requests)
+        # Out of order results are kept until the earlier images are done
+        self.finish('/2')
+        self.finish('/1')
+        self.assertEqual([], self.stored)
+        self.assertEqual(['/0'], self.downloading())
+        self.finish('/0')
+        self.assertEqual(images[:3], self.stored)
+        self.assertEqual(['/3', '/4'], self.downloading())
+        self.finish('/3')
+        self.finish('/4')
+        self.assertEqual(images, self.stored)
+        self.assertEqual(0, self.album._requests)
+        self.album._finalize_loading.assert_called_once_with(None)
+
+    def test_window_limited_by_slots(self):
+        for i in range(4):
+            self.queue('%d' % i)
+        self.slots = 2
+        self.coverart.next_in_queue()
+        self.assertEqual(['/0', '/1'], self.downloading())
+        self.finish('/0')
+        self.assertEqual(['/1', '/2'], self.downloading())
+
+    def test_typeless_waits_for_front(self):
+        front = self.queue('front', types=['front'])
+        self.queue('typeless', types=['front'], support_types=False)
+        self.coverart.next_in_queue()
+        self.assertEqual(['/front'], self.downloading())
+        self.finish('/front')
+        # The type-less image is skipped as a front image was found
+        self.assertEqual([], self.downloading())
+        self.assertEqual([front], self.stored)
+        self.album._finalize_loading.assert_called_once_with(None)
+
+    def test_only_one_front_image(self):
+        config.setting['embed_only_one_front_image'] = True
+        back = self.queue('back')
+        front = self.queue('front', types=['front'])
+        self.queue('medium', types=['medium'])
+        self.coverart.next_in_queue()
+        self.assertEqual(['/back', '/front'], self.downloading())
+        self.finish('/front')
+        self.finish('/back')
+        self.assertEqual([back, front], self.stored)
+        self.assertEqual([], self.downloading())
+        self.album._finalize_loading.assert_called_once_with(None)
+
+    def test_downloads_after_finalizing(self):
+        config.setting['embed_only_one_front_image'] = True
+        self.queue('front', types=['front'])
+        self.coverart.next_in_queue()
+        # e.g. a front image was found by an earlier provider
+        self.coverart._finish()
+        self.finish('/front')
+        self.assertEqual([], self.stored)
+        self.assertEqual(0, self.album._requests)
+        self.assertEqual(2, self.album._finalize_loading.call_count)
+
+    def test_download_error(self):
+        self.queue('broken')
+        image = self.queue('ok')
+        self.coverart.next_in_queue()
+        http = MagicMock()
+        http.errorString.return_value = 'Not found'
+        self.downloads.pop(0)[1](b'', http, True)
+        self.finish('/ok')
+        self.album.error_append.assert_called_once_with('Coverart error: Not found')
+        self.assertEqual([image], self.stored)
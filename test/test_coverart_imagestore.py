@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import gc
+import os.path
+
+from test.picardtestcase import PicardTestCase
+
+from picard.coverart.image import DataHash
+from picard.coverart.imagestore import (
+    ImageStore,
+    content_hash,
+)
+
+
+class ImageStoreTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.store = ImageStore(memory_limit=10)
+        self.addCleanup(self.store.clear)
+
+    def test_shared_data(self):
+        key1 = self.store.acquire(b'abc')
+        key2 = self.store.acquire(bytearray(b'abc'))
+        self.assertEqual(key1, key2)
+        self.assertEqual(1, len(self.store))
+        self.store.release(key1)
+        self.assertEqual(b'abc', self.store.data(key2))
+        self.store.release(key2)
+        self.assertEqual(0, len(self.store))
+        self.assertEqual(0, self.store.memory_used)
+
+    def test_spill_to_pack(self):
+        key1 = self.store.acquire(b'0123456789')
+        key2 = self.store.acquire(b'abcdef')
+        key3 = self.store.acquire(b'ghijkl')
+        self.assertEqual(10, self.store.memory_used)
+        self.assertEqual(12, self.store.pack_size)
+        self.assertEqual(b'0123456789', self.store.data(key1))
+        self.assertEqual(b'abcdef', self.store.data(key2))
+        view = self.store.view(key3)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(b'ghijkl', view.tobytes())
+        view.release()
+        for key in (key1, key2, key3):
+            self.store.release(key)
+        self.assertEqual(0, self.store.pack_size)
+
+    def test_compact_pack(self):
+        self.store.compact_limit = 4
+        self.store.acquire(b'0123456789')
+        key1 = self.store.acquire(b'abcdef')
+        key2 = self.store.acquire(b'ghijkl')
+        key3 = self.store.acquire(b'mnopqr')
+        view = self.store.view(key2)
+        self.store.release(key1)
+        self.assertEqual(18, self.store.pack_size)
+        self.store.release(key2)
+        self.assertEqual(6, self.store.pack_size)
+        self.assertEqual(b'mnopqr', self.store.data(key3))
+        # Views handed out before still reference the old pack file
+        self.assertEqual(b'ghijkl', view.tobytes())
+        view.release()
+
+    def test_hash_collision(self):
+        data = b'abc'
+        key1 = self.store.acquire(data)
+        key2 = self.store.acquire(b'xyz', key=content_hash(data))
+        self.assertNotEqual(key1, key2)
+        self.assertEqual(b'abc', self.store.data(key1))
+        self.assertEqual(b'xyz', self.store.data(key2))
+
+    def test_filename(self):
+        key = self.store.acquire(b'0123456789abc')
+        filename = self.store.filename(key, '.png')
+        self.assertTrue(filename.endswith('.png'))
+        with open(filename, 'rb') as f:
+            self.assertEqual(b'0123456789abc', f.read())
+        self.store.release(key)
+        self.assertFalse(os.path.exists(filename))
+
+
+class DataHashTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.store = ImageStore()
+        self.addCleanup(self.store.clear)
+
+    def test_released_on_collect(self):
+        datahash1 = DataHash(b'abc', store=self.store)
+        datahash2 = DataHash(b'abc', store=self.store)
+        self.assertEqual(datahash1, datahash2)
+        del datahash1
+        gc.collect()
+        self.assertEqual(b'abc', datahash2.data)
+        del datahash2
+        gc.collect()
+        self.assertEqual(0, len(self.store))
+
+    def test_delete_file(self):
+        datahash = DataHash(b'abc', store=self.store)
+        datahash.delete_file()
+        datahash.delete_file()
+        self.assertIsNone(datahash.data)
+        self.assertEqual(0, len(self.store))
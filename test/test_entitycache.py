@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+from tempfile import mkdtemp
+import time
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from PyQt5.QtNetwork import QNetworkRequest
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.entitycache import (
+    CachedDocument,
+    EntityCache,
+    EntityRequest,
+    strip_includes,
+)
+from picard.webservice import (
+    WebService,
+    ratecontrol,
+)
+
+
+def release(with_rels=True):
+    recording = {'id': 'r1', 'title': 'Recording', 'isrcs': ['ISRC1']}
+    document = {
+        'id': 'mbid',
+        'title': 'Release',
+        'aliases': [{'name': 'Alias'}],
+        'media': [{'tracks': [{'id': 't1', 'recording': recording}]}],
+    }
+    if with_rels:
+        document['relations'] = [
+            {'target-type': 'url', 'url': {'resource': 'https://example.com'}},
+            {'target-type': 'artist', 'artist': {'name': 'Artist'}},
+        ]
+        recording['relations'] = [
+            {'target-type': 'work', 'work': {'title': 'Work', 'relations': [
+                {'target-type': 'artist', 'artist': {'name': 'Composer'}},
+            ]}},
+        ]
+    return document
+
+
+def run_now(func, next_func, **kwargs):
+    try:
+        result = func()
+    except Exception as e:
+        next_func(error=e)
+    else:
+        next_func(result=result)
+
+
+class EntityCacheTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_directory)
+        config.setting = {
+            'use_entity_cache': True,
+            'entity_cache_ttl_hours': 24,
+            'entity_cache_size_mb': 256,
+            'server_host': 'musicbrainz.org',
+            'server_port': 443,
+        }
+        self.cache = EntityCache(os.path.join(self.tmp_directory, 'cache', 'entities.sqlite'))
+        self.addCleanup(self.cache.close)
+
+    def test_roundtrip(self):
+        self.assertIsNone(self.cache.get('release', 'mbid', ['aliases']))
+        self.cache.put('release', 'mbid', ['aliases', 'media'], release(), '"etag"', 'date')
+        cached = self.cache.get('release', 'mbid', ['media', 'aliases'])
+        self.assertEqual(release(), cached.document)
+        self.assertTrue(cached.fresh)
+        self.assertEqual('aliases+media', cached.inc)
+        self.assertEqual('"etag"', cached.etag)
+        self.assertEqual('date', cached.last_modified)
+        self.assertIsNone(self.cache.get('recording', 'mbid', []))
+
+    def test_superset(self):
+        inc = ['aliases', 'isrcs', 'url-rels', 'artist-rels', 'recording-level-rels',
+               'work-rels', 'work-level-rels']
+        self.cache.put('release', 'mbid', inc, release())
+        self.assertIsNone(self.cache.get('release', 'mbid', inc + ['tags']))
+        document = self.cache.get('release', 'mbid', ['url-rels']).document
+        self.assertEqual(['url'], [r['target-type'] for r in document['relations']])
+        self.assertNotIn('aliases', document)
+        recording = document['media'][0]['tracks'][0]['recording']
+        self.assertEqual({'id': 'r1', 'title': 'Recording'}, recording)
+        document = self.cache.get('release', 'mbid', inc[:-1]).document
+        work = document['media'][0]['tracks'][0]['recording']['relations'][0]['work']
+        self.assertNotIn('relations', work)
+
+    def test_subsets_replaced(self):
+        self.cache.put('release', 'mbid', ['aliases'], release(False))
+        self.cache.put('release', 'mbid', ['url-rels'], release())
+        self.cache.put('release', 'mbid', ['aliases', 'url-rels'], release())
+        connection = self.cache._connect()
+        rows = connection.execute("SELECT inc FROM entities").fetchall()
+        self.assertEqual([('aliases+url-rels',)], rows)
+
+    def test_stale_and_revalidated(self):
+        self.cache.put('release', 'mbid', [], release())
+        with patch('time.time', return_value=time.time() + 25 * 3600):
+            cached = self.cache.get('release', 'mbid', [])
+            self.assertFalse(cached.fresh)
+            self.cache.revalidated('release', 'mbid', cached.inc)
+            self.assertTrue(self.cache.get('release', 'mbid', []).fresh)
+
+    def test_evict_least_recently_used(self):
+        config.setting['entity_cache_size_mb'] = 0
+        self.cache.put('release', 'mbid1', [], release())
+        self.cache.put('release', 'mbid2', [], release())
+        self.assertIsNone(self.cache.get('release', 'mbid1', []))
+        self.assertIsNone(self.cache.get('release', 'mbid2', []))
+
+    def test_total_size(self):
+        self.cache.put('release', 'mbid1', ['aliases'], release())
+        self.cache.put('release', 'mbid1', ['aliases', 'url-rels'], release())
+        self.cache.put('release', 'mbid2', [], '{"id": "mbid2"}')
+        connection = self.cache._connect()
+        total_size = connection.execute("SELECT SUM(size) FROM entities").fetchone()[0]
+        self.assertEqual(total_size, self.cache._total_size)
+        self.cache.close()
+        self.cache._total_size = 0
+        self.cache._connect()
+        self.assertEqual(total_size, self.cache._total_size)
+        self.cache.clear()
+        self.assertEqual(0, self.cache._total_size)
+
+    def test_server_in_key(self):
+        self.cache.put('release', 'mbid', [], release())
+        config.setting['server_host'] = 'test.musicbrainz.org'
+        self.assertIsNone(self.cache.get('release', 'mbid', []))
+        config.setting['server_host'] = 'musicbrainz.org'
+        self.assertIsNotNone(self.cache.get('release', 'mbid', []))
+
+    def test_user_includes_not_cached(self):
+        self.cache.put('release', 'mbid', ['user-tags'], release())
+        self.assertIsNone(self.cache.get('release', 'mbid', []))
+
+    def test_strip_keys(self):
+        document = {'id': 'a', 'tags': [], 'rating': {}, 'artist-credit': [{'artist': {'genres': []}}]}
+        strip_includes(document, ['tags', 'ratings', 'genres'])
+        self.assertEqual({'id': 'a', 'artist-credit': [{'artist': {}}]}, document)
+
+
+@patch('picard.util.thread.run_task', run_now)
+class EntityRequestTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = {
+            'use_entity_cache': True,
+            'entity_cache_ttl_hours': 24,
+            'entity_cache_size_mb': 256,
+        }
+        self.cache = MagicMock()
+        self.cache.get.return_value = None
+        self.cache.cacheable = EntityCache.cacheable
+        self.handler = MagicMock()
+        self.requests = []
+
+    def request(self, handler, headers=None):
+        self.requests.append((handler, headers))
+        return 'task'
+
+    def reply(self, status=200, headers=None):
+        http = MagicMock()
+        http.attribute.side_effect = lambda attr: status if attr == QNetworkRequest.HttpStatusCodeAttribute else None
+        headers = headers or {}
+        http.rawHeader.side_effect = lambda name: headers.get(name, b'')
+        return http
+
+    def start(self, refresh=False):
+        return EntityRequest(self.cache, 'release', 'mbid', ['media'], self.handler,
+                             self.request, refresh).start()
+
+    def stale(self):
+        return CachedDocument({'id': 'stale'}, False, 'media', '"etag"', None)
+
+    def test_fresh_hit(self):
+        self.cache.get.return_value = CachedDocument({'id': 'mbid'}, True, 'media', None, None)
+        self.start()
+        self.assertEqual([], self.requests)
+        self.handler.assert_called_once_with({'id': 'mbid'}, None, 0)
+
+    def test_miss_stores_document(self):
+        self.start()
+        handler, headers = self.requests[0]
+        self.assertIsNone(headers)
+        with patch('picard.util.thread.run_task') as run_task:
+            handler({'id': 'mbid'}, self.reply(headers={b'ETag': b'"e"'}), 0)
+        # The handler does not wait for the document to be stored
+        self.handler.assert_called_once()
+        self.cache.put.assert_not_called()
+        run_task.call_args[0][0]()
+        self.cache.put.assert_called_once_with('release', 'mbid', ['media'], '{"id": "mbid"}', '"e"', None)
+
+    def test_refresh_skips_cache(self):
+        self.start(refresh=True)
+        self.cache.get.assert_not_called()
+        self.assertEqual(1, len(self.requests))
+
+    def test_not_modified(self):
+        self.cache.get.return_value = self.stale()
+        self.start()
+        handler, headers = self.requests[0]
+        self.assertEqual({'If-None-Match': '"etag"'}, headers)
+        http = self.reply(304)
+        handler(None, http, 0)
+        self.cache.revalidated.assert_called_once_with('release', 'mbid', 'media')
+        self.handler.assert_called_once_with({'id': 'stale'}, http, 0)
+
+    def test_not_modified_through_webservice(self):
+        config.setting.update({
+            'use_proxy': False,
+            'server_host': '',
+            'network_concurrent_requests': False,
+            'rate_policies': [],
+        })
+        ws = WebService()
+        self.addCleanup(ws.deleteLater)
+        self.cache.get.return_value = self.stale()
+        self.start()
+        ws_request = MagicMock()
+        ws_request.handler = self.requests[0][0]
+        ws_request.response_parser = WebService.get_response_parser('json')
+        ws_request.get_host_key.return_value = ('entitycache.test', 443)
+        ratecontrol.increment_requests(('entitycache.test', 443))
+        reply = self.reply(304)
+        reply.error.return_value = 0
+        reply.readAll.return_value = b''
+        ws._handle_reply(reply, ws_request)
+        self.cache.revalidated.assert_called_once_with('release', 'mbid', 'media')
+        self.handler.assert_called_once_with({'id': 'stale'}, reply, 0)
+
+    def test_not_modified_with_error(self):
+        self.cache.get.return_value = self.stale()
+        self.start()
+        http = self.reply(304)
+        self.requests[0][0](b'', http, ValueError('no JSON'))
+        self.cache.revalidated.assert_called_once_with('release', 'mbid', 'media')
+        self.handler.assert_called_once_with({'id': 'stale'}, http, 0)
+
+    def test_user_includes_skip_cache(self):
+        EntityRequest(self.cache, 'release', 'mbid', ['user-tags'], self.handler,
+                      self.request).start()
+        self.cache.get.assert_not_called()
+        self.assertEqual(1, len(self.requests))
+
+    def test_stale_if_error(self):
+        self.cache.get.return_value = self.stale()
+        self.start()
+        http = self.reply(503)
+        self.requests[0][0](None, http, 1)
+        self.handler.assert_called_once_with({'id': 'stale'}, http, 0)
+
+    def test_not_found(self):
+        self.cache.get.return_value = self.stale()
+        self.start()
+        http = self.reply(404)
+        self.requests[0][0](None, http, 203)
+        self.handler.assert_called_once_with(None, http, 203)
+        self.cache.put.assert_not_called()
+
+    def test_cancel(self):
+        request = EntityRequest(self.cache, 'release', 'mbid', [], self.handler, self.request)
+        request.cancel()
+        request.start()
+        self.handler.assert_not_called()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.fileloader import (
+    FileLoader,
+    _LoadRunnable,
+)
+from picard.formats.id3 import MP3File
+from picard.formats.vorbis import OggVorbisFile
+from picard.metadata import Metadata
+
+
+class FakeFile:
+
+    def __init__(self, name, usable=True):
+        self.filename = name
+        self.usable = usable
+        self.result = None
+
+    def _set_loaded(self, result=None, error=None):
+        self.result = result
+        return self.usable
+
+
+class FileLoaderTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.loader = FileLoader(thread_count=1)
+        self.loader.thread_pool = MagicMock()
+        self.loader.thread_pool.maxThreadCount.return_value = 1
+        self.loader.pending_per_thread = 4
+
+    def started_files(self):
+        return [call[0][0].file for call in self.loader.thread_pool.start.call_args_list]
+
+    def test_backpressure(self):
+        files = [FakeFile(str(i)) for i in range(10)]
+        self.loader.load(files, MagicMock())
+        self.assertEqual(files[:4], self.started_files())
+        self.assertEqual(10, self.loader.pending_count)
+
+    @patch('picard.util.thread.to_main')
+    def test_batched_delivery(self, to_main):
+        callback = MagicMock()
+        files = [FakeFile(str(i)) for i in range(6)]
+        files[1].usable = False
+        self.loader.load(files, callback)
+        for file in files[:3]:
+            self.loader._add_result(file, callback, 'result', None)
+        to_main.assert_called_once_with(self.loader._flush)
+        self.loader._flush()
+        callback.assert_called_once_with([files[0], files[2]])
+        self.assertEqual('result', files[1].result)
+        self.assertEqual(files[:6], self.started_files()[:6])
+        self.assertEqual(3, self.loader.pending_count)
+
+    @patch('picard.util.thread.to_main')
+    def test_callbacks_grouped(self, to_main):
+        callback1 = MagicMock()
+        callback2 = MagicMock()
+        files = [FakeFile(str(i)) for i in range(3)]
+        self.loader.load(files[:2], callback1)
+        self.loader.load(files[2:], callback2)
+        for file, callback in ((files[0], callback1), (files[2], callback2), (files[1], callback1)):
+            self.loader._add_result(file, callback, None, None)
+        self.loader._flush()
+        callback1.assert_called_once_with([files[0], files[1]])
+        callback2.assert_called_once_with([files[2]])
+
+    @patch('picard.util.thread.to_main')
+    def test_other_format_reloaded(self, to_main):
+        config.setting = {
+            'use_metadata_cache': False,
+            'enabled_plugins': [],
+        }
+        self.tagger.stopping = False
+        # MP3 data with the extension of Ogg Vorbis
+        file = OggVorbisFile('test/data/test.mp3')
+        callback = MagicMock()
+        self.loader.load([file], callback)
+        runnable = self.loader.thread_pool.start.call_args[0][0]
+        positions = []
+
+        def load_fileobj(file, filename, fileobj):
+            positions.append(fileobj.tell())
+            return Metadata()
+
+        with patch.object(MP3File, '_load', autospec=True, side_effect=load_fileobj) as load:
+            runnable.run()
+            load.assert_not_called()
+            self.loader._flush()
+            self.assertIsInstance(file, MP3File)
+            callback.assert_not_called()
+            runnable = self.loader.thread_pool.start.call_args[0][0]
+            self.assertIsInstance(runnable, _LoadRunnable)
+            self.assertIs(file, runnable.file)
+            runnable.run()
+            load.assert_called_once()
+        # The file is passed open at its start and closed after loading
+        self.assertEqual([0], positions)
+        self.assertTrue(load.call_args[0][2].closed)
+        self.loader._flush()
+        callback.assert_called_once_with([file])
+        self.assertEqual(0, self.loader.pending_count)
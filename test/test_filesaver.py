@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import (
+    MagicMock,
+    call,
+    patch,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.filesaver import (
+    FileSaver,
+    _CleanupTask,
+    _SaveRunnable,
+)
+
+
+def call_now(func, *args, **kwargs):
+    func(*args, **kwargs)
+
+
+class FakeFile:
+
+    def __init__(self, filename, new_filename):
+        self.filename = filename
+        self.new_filename = new_filename
+        self.finished = []
+
+    def _save_metadata(self, old_filename, metadata):
+        return self.new_filename
+
+    def _finish_save(self, old_filename, new_filename, metadata, additional_files=None):
+        return new_filename
+
+    def _saving_finished(self, result=None, error=None):
+        self.finished.append((result, error))
+
+
+@patch('picard.util.thread.to_main', call_now)
+class FileSaverTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = {
+            'delete_empty_dirs': False,
+            'move_files': False,
+        }
+        self.saver = FileSaver()
+        self.saver.tagger = MagicMock()
+        self.saver.tagger.files = {}
+        self.started = []
+        self.saver._start = lambda task, func: self.started.append(_SaveRunnable(self.saver, task, func))
+
+    def run_started(self, file):
+        for runnable in self.started:
+            if runnable.task.file is file:
+                self.started.remove(runnable)
+                runnable.run()
+                return
+        self.fail('%r not started' % getattr(file, 'filename', file))
+
+    def running(self):
+        return [runnable.task.file for runnable in self.started]
+
+    def test_conflict_keys(self):
+        self.assertEqual({'/a', '/b'}, set(FileSaver.conflict_keys('/a/1.mp3', '/b/1.mp3')))
+        self.assertEqual(('/a',), FileSaver.conflict_keys('/a/1.mp3', '/a/2.mp3'))
+
+    def test_tags_written_in_parallel(self):
+        files = [FakeFile('/a/%d.mp3' % i, '/b/%d.mp3' % i) for i in range(3)]
+        for file in files:
+            self.saver.save(file, None)
+        self.assertEqual(files, self.running())
+        self.assertEqual(3, self.saver.pending_count)
+
+    def test_same_directory_ordered(self):
+        file1 = FakeFile('/a/1.mp3', '/b/1.mp3')
+        file2 = FakeFile('/c/2.mp3', '/b/2.mp3')
+        file3 = FakeFile('/d/3.mp3', '/e/3.mp3')
+        for file in (file1, file2, file3):
+            self.saver.save(file, None)
+        # The tags of the second file are written first, it still has to
+        # wait for the first file to be moved
+        self.run_started(file2)
+        self.run_started(file3)
+        self.run_started(file1)
+        self.assertEqual([file1, file3], self.running())
+        self.run_started(file1)
+        self.assertEqual([('/b/1.mp3', None)], file1.finished)
+        self.assertEqual([file3, file2], self.running())
+        self.run_started(file2)
+        self.run_started(file3)
+        self.assertEqual([('/b/2.mp3', None)], file2.finished)
+        self.assertEqual([('/e/3.mp3', None)], file3.finished)
+        self.assertEqual(0, self.saver.pending_count)
+        self.assertEqual({}, self.saver._key_queues)
+
+    def test_same_file_saved_one_after_the_other(self):
+        file = FakeFile('/a/1.mp3', '/b/1.mp3')
+        file._saving_finished = lambda result=None, error=None: setattr(file, 'filename', result)
+        self.saver.save(file, 'first')
+        self.saver.save(file, 'second')
+        self.saver.save(file, 'third')
+        self.assertEqual(2, self.saver.pending_count)
+        self.assertEqual(['first'], [runnable.task.metadata for runnable in self.started])
+        self.run_started(file)
+        self.run_started(file)
+        self.assertEqual(1, self.saver.pending_count)
+        self.assertEqual(['third'], [runnable.task.metadata for runnable in self.started])
+        self.assertEqual('/b/1.mp3', self.started[0].task.old_filename)
+        self.run_started(file)
+        self.run_started(file)
+        self.assertEqual(0, self.saver.pending_count)
+        self.assertEqual([], self.running())
+
+    def test_skipped_and_errors(self):
+        skipped = FakeFile('/a/1.mp3', None)
+        failing = FakeFile('/a/2.mp3', '/b/2.mp3')
+        failing._save_metadata = MagicMock(side_effect=OSError('disk full'))
+        self.saver.save(skipped, None)
+        self.saver.save(failing, None)
+        self.run_started(skipped)
+        with patch('picard.log.error'):
+            self.run_started(failing)
+        self.assertEqual([(None, None)], skipped.finished)
+        self.assertIsInstance(failing.finished[0][1], OSError)
+        self.assertEqual([], self.running())
+        self.assertEqual(0, self.saver.pending_count)
+        self.saver.tagger.window.set_statusbar_message.assert_called_with(
+            "Saved %(saved)d files, %(errors)d failed", {'saved': 0, 'errors': 1, 'pending': 0})
+
+    @patch('picard.file.File._delete_empty_dirs')
+    def test_delete_empty_dirs_after_moves(self, delete_empty_dirs):
+        config.setting['delete_empty_dirs'] = True
+        file1 = FakeFile('/a/1.mp3', '/b/1.mp3')
+        file2 = FakeFile('/c/2.mp3', '/d/2.mp3')
+        file3 = FakeFile('/e/3.mp3', '/e/3.mp3')
+        file4 = FakeFile('/f/4.mp3', '/g/4.mp3')
+        for file in (file1, file2, file3):
+            self.saver.save(file, None)
+        self.run_started(file1)
+        self.run_started(file2)
+        self.run_started(file3)
+        # The files are moved in parallel
+        self.assertEqual([file1, file2, file3], self.running())
+        self.run_started(file1)
+        self.run_started(file3)
+        self.assertEqual([file2], self.running())
+        self.saver.save(file4, None)
+        self.run_started(file2)
+        # The source directories are deleted once no file is moved anymore
+        self.assertEqual([file4, None], self.running())
+        self.assertEqual(['/a', '/c'], self.started[1].task.dirnames)
+        self.run_started(file4)
+        # Files waiting for their second step wait for the cleanup
+        self.assertEqual([None], self.running())
+        self.run_started(None)
+        delete_empty_dirs.assert_has_calls([call('/a'), call('/c')])
+        self.assertEqual([file4], self.running())
+        self.run_started(file4)
+        self.assertEqual([None], self.running())
+        self.assertIsInstance(self.started[0].task, _CleanupTask)
+        self.run_started(None)
+        delete_empty_dirs.assert_called_with('/f')
+        self.assertEqual([], self.running())
+        self.assertEqual(0, self.saver.pending_count)
+
+    def test_collisions_planned(self):
+        file1 = FakeFile('/a/1.mp3', '/b/x.mp3')
+        file2 = FakeFile('/c/2.mp3', '/b/x.mp3')
+        for file in (file1, file2):
+            self.saver.save(file, None)
+        self.run_started(file1)
+        self.run_started(file2)
+        self.run_started(file1)
+        self.run_started(file2)
+        self.assertEqual([('/b/x.mp3', None)], file1.finished)
+        self.assertEqual([('/b/x (1).mp3', None)], file2.finished)
+        self.assertIsNone(self.saver._plan)
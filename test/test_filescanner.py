@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.filescanner import FileScanner
+from picard.formats.id3 import MP3File
+from picard.formats.vorbis import FLACFile
+
+
+def call_now(func, *args, **kwargs):
+    func(*args, **kwargs)
+
+
+@patch('picard.util.thread.to_main', call_now)
+class FileScannerTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = {
+            'ignore_hidden_files': True,
+            'ignore_regex': '',
+            'enabled_plugins': [],
+        }
+        self.tmpdir = os.path.realpath(mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        os.mkdir(os.path.join(self.tmpdir, 'sub'))
+        os.mkdir(os.path.join(self.tmpdir, '.hidden'))
+        self.copy('test.mp3', 'a.mp3')
+        self.copy('test.flac', 'b.FLAC')
+        self.copy('test.mp3', 'not-audio.txt')
+        self.copy('test.mp3', '.c.mp3')
+        self.copy('test.ogg', os.path.join('sub', 'd.ogg'))
+        self.copy('test.ogg', os.path.join('.hidden', 'e.ogg'))
+        self.scanner = FileScanner()
+        self.callback = MagicMock()
+
+    def copy(self, source, name):
+        shutil.copy(os.path.join('test', 'data', source), os.path.join(self.tmpdir, name))
+
+    def path(self, *names):
+        return os.path.join(self.tmpdir, *names)
+
+    def scanned_filenames(self):
+        return sorted(file.filename for call in self.callback.call_args_list for file in call[0][0])
+
+    def scan(self, recursive=True, known=()):
+        walk = self.scanner._walk(self.tmpdir, recursive, config.setting['ignore_hidden_files'])
+        self.scanner._open_files(walk, self.callback, known)
+
+    def test_scan_recursive(self):
+        self.scan()
+        self.assertEqual([self.path('a.mp3'), self.path('b.FLAC'), self.path('sub', 'd.ogg')],
+                         self.scanned_filenames())
+
+    def test_scan_non_recursive(self):
+        self.scan(recursive=False)
+        self.assertEqual([self.path('a.mp3'), self.path('b.FLAC')], self.scanned_filenames())
+
+    def test_scan_hidden(self):
+        config.setting['ignore_hidden_files'] = False
+        self.scan()
+        self.assertIn(self.path('.c.mp3'), self.scanned_filenames())
+        self.assertIn(self.path('.hidden', 'e.ogg'), self.scanned_filenames())
+
+    def test_scan_ignore_regex(self):
+        config.setting['ignore_regex'] = r'(?i)\.flac$'
+        self.scan()
+        self.assertEqual([self.path('a.mp3'), self.path('sub', 'd.ogg')], self.scanned_filenames())
+
+    def test_scan_known(self):
+        self.scan(known={self.path('a.mp3')})
+        self.assertNotIn(self.path('a.mp3'), self.scanned_filenames())
+
+    def test_scan_hard_links(self):
+        try:
+            os.link(self.path('a.mp3'), self.path('a-link.mp3'))
+        except (OSError, AttributeError):
+            self.skipTest('hard links not supported')
+        self.scan(recursive=False)
+        self.assertEqual(1, len([f for f in self.scanned_filenames() if f.startswith(self.path('a'))]))
+
+    def test_batches(self):
+        self.scanner.batch_size = 1
+        self.scan()
+        self.assertEqual(3, self.callback.call_count)
+
+    def test_files_created_on_delivery(self):
+        delivered = []
+        with patch('picard.util.thread.to_main', lambda func, *args: delivered.extend(args[1])):
+            self.scan(recursive=False)
+        delivered.sort(key=lambda entry: entry[1])
+        self.assertEqual([(MP3File, self.path('a.mp3')), (FLACFile, self.path('b.FLAC'))], delivered)
+        self.callback.assert_not_called()
+        self.scanner._deliver(self.callback, delivered)
+        self.assertEqual([MP3File, FLACFile], [type(file) for file in self.callback.call_args[0][0]])
+
+    def test_files_not_read(self):
+        self.copy('test.ogg', 'f.oga')
+        with patch('picard.filescanner.get_format', return_value=None) as get_format:
+            self.scan(recursive=False)
+        # Only the generic Ogg audio format needs the file header
+        get_format.assert_called_once_with(self.path('f.oga'))
+
+    def test_stopped(self):
+        self.scanner._stopped = True
+        self.scan()
+        self.callback.assert_not_called()
@@ -11,6 +11,7 @@ from picard.coverart.image import CoverArtImage
 from picard.file import File
 from picard.track import Track
 from picard.util.imagelist import (
+    ImageCounter,
     ImageList,
     add_metadata_images,
     remove_metadata_images,
@@ -222,6 +223,72 @@ class AddMetadataImagesTest(PicardTestCase):
         self.assertEqual(set(self.test_images), set(cluster.metadata.images))
         self.assertFalse(cluster.metadata.has_common_images)
 
+    def test_add_to_album_without_counters(self):
+        album = Album('00000000-0000-0000-0000-000000000000')
+        album.unmatched_files.files = list(self.test_files)
+        add_metadata_images(album, self.test_files[:1])
+        self.assertEqual(set(self.test_images), set(album.metadata.images))
+        self.assertEqual(set(self.test_images), set(album.orig_metadata.images))
+        self.assertFalse(album.metadata.has_common_images)
+
+    def test_add_remove_album(self):
+        album = Album('00000000-0000-0000-0000-000000000000')
+        update_metadata_images(album)
+        album.unmatched_files.files = list(self.test_files[1:])
+        add_metadata_images(album, self.test_files[1:])
+        self.assertEqual(set(self.test_images[1:]), set(album.metadata.images))
+        self.assertTrue(album.metadata.has_common_images)
+        album.unmatched_files.files.append(self.test_files[0])
+        add_metadata_images(album, self.test_files[:1])
+        self.assertFalse(album.orig_metadata.has_common_images)
+        album.unmatched_files.files.remove(self.test_files[1])
+        remove_metadata_images(album, self.test_files[1:2])
+        self.assertEqual(set(self.test_images), set(album.metadata.images))
+
+
+class ImageCounterTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        (self.test_images, self.test_files) = create_test_files()
+
+    def test_add_remove(self):
+        counter = ImageCounter()
+        for file in self.test_files:
+            counter.add(file, file.metadata.images)
+        self.assertEqual(set(self.test_images), set(counter.images))
+        self.assertEqual(2, counter.images[self.test_images[1]])
+        self.assertFalse(counter.has_common_images)
+        counter.remove(self.test_files[0])
+        self.assertEqual(set(self.test_images[1:]), set(counter.images))
+        self.assertTrue(counter.has_common_images)
+        counter.remove(self.test_files[0])
+        counter.remove(self.test_files[1])
+        counter.remove(self.test_files[2])
+        self.assertEqual(0, len(counter.images))
+        self.assertEqual(0, len(counter.image_sets))
+
+    def test_source_added_twice(self):
+        # A file moving between two children of the same parent may be
+        # added again before it gets removed from its old place
+        counter = ImageCounter()
+        file = self.test_files[0]
+        counter.add(file, file.metadata.images)
+        counter.add(file, file.metadata.images)
+        counter.remove(file)
+        self.assertEqual(set(self.test_images[:1]), set(counter.images))
+        self.assertEqual(1, counter.images[self.test_images[0]])
+
+    def test_changed_images(self):
+        counter = ImageCounter()
+        file = self.test_files[0]
+        counter.add(file, self.test_images[:1])
+        counter.add(file, self.test_images[1:])
+        self.assertEqual(set(self.test_images[1:]), set(counter.images))
+        counter.remove(file)
+        counter.remove(file)
+        self.assertEqual(0, len(counter.images))
+
 
 class ImageListTest(PicardTestCase):
 
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from PyQt5 import (
+    QtCore,
+    QtGui,
+)
+
+from test.picardtestcase import PicardTestCase
+
+from picard.ui.itemviews import (
+    ItemUpdateQueue,
+    MainPanel,
+    TreeItem,
+)
+
+
+class FakeObj:
+    item = None
+
+
+class FakeItem:
+
+    children_update_flag = None
+
+    def __init__(self, parent=None, children_update_flag=None):
+        self._parent = parent
+        self.children_update_flag = children_update_flag
+        self.obj = FakeObj()
+        self.obj.item = self
+        self.updates = []
+
+    def parent(self):
+        return self._parent
+
+    def treeWidget(self):
+        return True
+
+    def update(self, **flags):
+        self.updates.append(flags)
+        if self._parent is not None and flags.get('update_parent', True):
+            self.queue.add(self._parent, update_children=False)
+
+
+@patch('PyQt5.QtCore.QTimer.singleShot')
+class ItemUpdateQueueTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = ItemUpdateQueue()
+        FakeItem.queue = self.queue
+
+    def test_coalesce_leaves_first(self, single_shot):
+        album = FakeItem(children_update_flag='update_children')
+        tracks = [FakeItem(album) for i in range(3)]
+        for track in tracks:
+            self.queue.add(track)
+            self.queue.add(track)
+        single_shot.assert_called_once_with(0, self.queue.flush)
+        self.queue.flush()
+        for track in tracks:
+            self.assertEqual([{}], track.updates)
+        self.assertEqual([{'update_children': False}], album.updates)
+        self.assertEqual(0, len(self.queue))
+
+    def test_merge_flags(self, single_shot):
+        album = FakeItem(children_update_flag='update_children')
+        self.queue.add(album, update_children=False)
+        self.queue.add(album, update_children=True)
+        self.queue.add(album, update_children=False)
+        self.queue.flush()
+        self.assertEqual([{'update_children': True}], album.updates)
+
+    def test_merge_default_flags(self, single_shot):
+        album = FakeItem(children_update_flag='update_children')
+        self.queue.add(album)
+        self.queue.add(album, update_children=False)
+        self.queue.flush()
+        self.assertEqual([{'update_children': True}], album.updates)
+
+    def test_skip_children_of_updated_parent(self, single_shot):
+        album = FakeItem(children_update_flag='update_children')
+        track = FakeItem(album)
+        self.queue.add(track)
+        self.queue.add(album)
+        self.queue.flush()
+        self.assertEqual([], track.updates)
+        self.assertEqual([{}], album.updates)
+
+    def test_skip_stale(self, single_shot):
+        item = FakeItem()
+        self.queue.add(item)
+        item.obj.item = None
+        self.queue.flush()
+        self.assertEqual([], item.updates)
+        self.assertEqual(0, len(self.queue))
+
+    def test_skip_detached(self, single_shot):
+        item = FakeItem()
+        item.obj.item = None
+        item.parent = None
+        self.queue.add(item)
+        self.assertEqual(0, len(self.queue))
+        single_shot.assert_not_called()
+
+
+class ColumnObj:
+
+    item = None
+
+    def __init__(self, title):
+        self.title = title
+        self.metadata = {'title': title}
+        self.calls = 0
+
+    def column(self, column):
+        self.calls += 1
+        return self.metadata.get(column, '')
+
+
+class TreeItemTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.obj = ColumnObj('B Title')
+        self.item = TreeItem(self.obj, True)
+        self.title_column = MainPanel.TITLE_COLUMN
+
+    def test_lazy_column_text(self):
+        self.item.invalidate_columns()
+        self.assertEqual(0, self.obj.calls)
+        self.assertEqual('B Title', self.item.text(self.title_column))
+        self.assertEqual('B Title', self.item.data(self.title_column, QtCore.Qt.DisplayRole))
+        self.assertEqual(1, self.obj.calls)
+        self.obj.metadata['title'] = 'A Title'
+        self.assertEqual('B Title', self.item.text(self.title_column))
+        self.item.invalidate_columns()
+        self.assertEqual('A Title', self.item.text(self.title_column))
+
+    def test_colors(self):
+        color = QtGui.QColor('red')
+        self.item.invalidate_columns(foreground=color)
+        brush = self.item.data(self.title_column, QtCore.Qt.ForegroundRole)
+        self.assertEqual(color, brush.color())
+
+    def test_stored_text(self):
+        self.item.setText(self.title_column, 'Stored')
+        self.assertEqual('Stored', self.item.text(self.title_column))
+        self.assertEqual(0, self.obj.calls)
+
+    def test_sort_key_cached(self):
+        self.item.invalidate_columns()
+        key = self.item.sortkey(self.title_column)
+        self.assertIs(key, self.item.sortkey(self.title_column))
+        self.assertEqual(1, self.obj.calls)
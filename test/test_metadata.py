@@ -291,6 +291,40 @@ class MetadataTest(PicardTestCase):
         m2.delete("title")
         self.assertTrue(m1.compare(m2) < 1)
 
+    def test_compare_tracknumber_not_a_number(self):
+        m1 = Metadata(tracknumber="1/10")
+        m2 = Metadata(tracknumber="1/10")
+        m3 = Metadata(tracknumber="1")
+        self.assertEqual(m1.compare(m2), 1)
+        self.assertEqual(m1.compare(m3), 0)
+
+    def test_comparison_features(self):
+        m1 = Metadata(title="The Great Gig in the Sky", artist="Pink Floyd",
+                      album="The Dark Side of the Moon", tracknumber="5", totaltracks="10")
+        m1.length = 283000
+        others = [
+            Metadata(title="Great Gig In The sky", artist="Floyd", tracknumber="05", length=280000),
+            Metadata(title="Money", artist="Pink Floyd", album="Dark Side", tracknumber="6"),
+            Metadata(),
+        ]
+        features = m1.comparison_features()
+        for other in others:
+            self.assertEqual(m1.compare(other), features.compare(other.comparison_features()))
+            self.assertEqual(m1.compare(other, ignored=['title']),
+                             features.compare(other.comparison_features(), ignored=['title']))
+
+    def test_comparison_features_cached(self):
+        m = Metadata(title="Title", length=1000)
+        features = m.comparison_features()
+        self.assertIs(features, m.comparison_features())
+        for change in (lambda: m.set('title', 'Other'), lambda: m.add('artist', 'Artist'),
+                       lambda: m.__delitem__('artist'), lambda: m.unset('title'),
+                       lambda: setattr(m, 'length', 2000), m.clear_deleted):
+            change()
+            changed_features = m.comparison_features()
+            self.assertIsNot(features, changed_features)
+            features = changed_features
+
     def test_strip_whitespace(self):
         m1 = Metadata()
         m1["artist"] = "  TheArtist  "
@@ -492,6 +526,18 @@ class MetadataTest(PicardTestCase):
             match = metadata.compare_to_release(release, Cluster.comparison_weights)
             self.assertEqual(sim, match.similarity)
 
+    def test_compare_to_releases(self):
+        release1 = load_test_json('release.json')
+        release2 = load_test_json('release.json')
+        release2['title'] = 'Something else'
+        metadata = Metadata()
+        release_to_metadata(release1, metadata)
+        matches = metadata.compare_to_releases([release1, release2], Cluster.comparison_weights)
+        self.assertEqual([release1, release2], [match.release for match in matches])
+        for release, match in zip([release1, release2], matches):
+            self.assertEqual(metadata.compare_to_release(release, Cluster.comparison_weights), match)
+        self.assertGreater(matches[0].similarity, matches[1].similarity)
+
     def test_weights_from_release_type_scores(self):
         release = load_test_json('release.json')
         parts = []
@@ -548,3 +594,15 @@ class MetadataTest(PicardTestCase):
             track_json['score'] = score
             match = track.metadata.compare_to_track(track_json, File.comparison_weights)
             self.assertEqual(sim, match.similarity)
+
+    def test_compare_to_tracks(self):
+        track_json1 = load_test_json('track.json')
+        track_json2 = load_test_json('track.json')
+        track_json2['title'] = 'Something else'
+        track = Track(track_json1['id'])
+        track_to_metadata(track_json1, track)
+        matches = track.metadata.compare_to_tracks([track_json1, track_json2], File.comparison_weights)
+        self.assertEqual([track_json1, track_json2], [match.track for match in matches])
+        for track_json, match in zip([track_json1, track_json2], matches):
+            self.assertEqual(track.metadata.compare_to_track(track_json, File.comparison_weights), match)
+        self.assertGreater(matches[0].similarity, matches[1].similarity)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+from tempfile import mkdtemp
+import time
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from test.picardtestcase import (
+    PicardTestCase,
+    create_fake_png,
+)
+
+from picard import config
+from picard.coverart.image import (
+    CoverArtImage,
+    LazyTagCoverArtImage,
+    TagCoverArtImage,
+)
+from picard.metadata import Metadata
+from picard.metadatacache import MetadataCache
+
+
+class MetadataCacheTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_directory)
+        config.setting = {
+            'itunes_compatible_grouping': False,
+            'rating_user_email': 'users@musicbrainz.org',
+            'rating_steps': 6,
+            'lazy_embedded_images': False,
+        }
+        self.cache = MetadataCache(os.path.join(self.tmp_directory, 'cache', 'metadata.sqlite'))
+        self.addCleanup(self.cache.close)
+        self.filename = os.path.join(self.tmp_directory, 'test.mp3')
+        with open(self.filename, 'wb') as f:
+            f.write(b'data')
+
+    def metadata(self):
+        metadata = Metadata(title='Title', artist=['Artist 1', 'Artist 2'], length=12345)
+        metadata['~format'] = 'MPEG-1 Layer 3'
+        metadata.images.append(TagCoverArtImage(
+            file=self.filename, tag='APIC', types=['front', 'booklet'],
+            support_types=True, comment='Cover', data=create_fake_png(b'a')))
+        return metadata
+
+    def test_roundtrip(self):
+        metadata = self.metadata()
+        self.cache.put(self.filename, 'MP3File', metadata)
+        cached = self.cache.get(self.filename, 'MP3File')
+        self.assertEqual(metadata.rawitems(), cached.rawitems())
+        self.assertEqual(12345, cached.length)
+        self.assertEqual(1, len(cached.images))
+        image = cached.images[0]
+        self.assertEqual(metadata.images[0], image)
+        self.assertEqual(['front', 'booklet'], image.types)
+        self.assertEqual('APIC', image.tag)
+        self.assertEqual('Cover', image.comment)
+        self.assertTrue(image.support_types)
+
+    def test_missing(self):
+        self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+
+    def test_format_mismatch(self):
+        self.cache.put(self.filename, 'MP3File', self.metadata())
+        self.assertIsNone(self.cache.get(self.filename, 'OggVorbisFile'))
+
+    def test_invalidated_by_modification(self):
+        self.cache.put(self.filename, 'MP3File', self.metadata())
+        st = os.stat(self.filename)
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+
+    def test_invalidated_by_size(self):
+        self.cache.put(self.filename, 'MP3File', self.metadata())
+        st = os.stat(self.filename)
+        with open(self.filename, 'ab') as f:
+            f.write(b'more')
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+
+    def test_other_images_not_cached(self):
+        metadata = self.metadata()
+        metadata.images.append(CoverArtImage(data=create_fake_png(b'b')))
+        self.cache.put(self.filename, 'MP3File', metadata)
+        self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+
+    def test_lazy_images_not_stored(self):
+        reader = MagicMock()
+        metadata = Metadata(title='Title')
+        metadata.images.append(LazyTagCoverArtImage(
+            self.filename, reader, create_fake_png(b'a'), tag='APIC', types=['front'],
+            support_types=True))
+        metadata.images.append(TagCoverArtImage(file=self.filename, data=create_fake_png(b'b')))
+        self.cache.put(self.filename, 'MP3File', metadata)
+        connection = self.cache._connect()
+        self.assertEqual([(1,)], connection.execute("SELECT position FROM images").fetchall())
+
+        def lazy_image(filename, **kwargs):
+            return LazyTagCoverArtImage(filename, reader, **kwargs)
+
+        cached = self.cache.get(self.filename, 'MP3File', lazy_image=lazy_image)
+        image = cached.images[0]
+        self.assertIsInstance(image, LazyTagCoverArtImage)
+        self.assertEqual(metadata.images[0].image_info(), image.image_info())
+        self.assertEqual(['front'], image.types)
+        self.assertFalse(image.datahash.loaded)
+        self.assertEqual(metadata.images[1].data, cached.images[1].data)
+        reader.load.assert_not_called()
+
+    def test_clear(self):
+        self.cache.put(self.filename, 'MP3File', self.metadata())
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+
+    def test_invalidated_by_settings(self):
+        self.cache.put(self.filename, 'MP3File', self.metadata())
+        config.setting['itunes_compatible_grouping'] = True
+        self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+
+    def test_unused_entries_removed(self):
+        self.cache.put(self.filename, 'MP3File', self.metadata())
+        self.cache.close()
+        with patch('time.time', return_value=time.time() + self.cache.max_age + 1):
+            self.assertIsNone(self.cache.get(self.filename, 'MP3File'))
+        connection = self.cache._connect()
+        self.assertEqual([], connection.execute("SELECT path FROM images").fetchall())
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest.mock import MagicMock
+
+from test.picardtestcase import PicardTestCase
+
+from picard import config
+from picard.renameplan import RenamePlan
+
+
+settings = {
+    'rename_files': True,
+    'move_files': True,
+    'move_additional_files': True,
+    'move_additional_files_pattern': 'cover.jpg *.log',
+}
+
+
+class RenamePlanTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = settings.copy()
+        self.tmpdir = os.path.realpath(mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        for name in ('src', 'src2', 'dst'):
+            os.mkdir(self.path(name))
+        for name in ('src/1.mp3', 'src/2.mp3', 'src/cover.jpg', 'src/rip.log',
+                     'src2/3.mp3', 'dst/taken.mp3'):
+            open(self.path(name), 'w').close()
+        self.plan = RenamePlan()
+
+    def path(self, *names):
+        return os.path.join(self.tmpdir, *names)
+
+    def test_no_move(self):
+        self.assertEqual((self.path('src/1.mp3'), []),
+                         self.plan.add(self.path('src/1.mp3'), self.path('src/1.mp3')))
+        self.assertEqual([], self.plan.moves)
+
+    def test_existing_target(self):
+        target, _ = self.plan.add(self.path('src2/3.mp3'), self.path('dst/taken.mp3'))
+        self.assertEqual(self.path('dst/taken (1).mp3'), target)
+
+    def test_planned_collisions(self):
+        target1, _ = self.plan.add(self.path('src/1.mp3'), self.path('dst/x.mp3'))
+        target2, _ = self.plan.add(self.path('src/2.mp3'), self.path('dst/x.mp3'))
+        target3, _ = self.plan.add(self.path('src2/3.mp3'), self.path('dst/x.mp3'))
+        self.assertEqual(self.path('dst/x.mp3'), target1)
+        self.assertEqual(self.path('dst/x (1).mp3'), target2)
+        self.assertEqual(self.path('dst/x (2).mp3'), target3)
+        # Nothing is moved while planning
+        self.assertFalse(os.path.exists(target1))
+
+    def test_freed_name(self):
+        self.plan.add(self.path('src/1.mp3'), self.path('dst/1.mp3'))
+        target, _ = self.plan.add(self.path('src/2.mp3'), self.path('src/1.mp3'))
+        self.assertEqual(self.path('src/1.mp3'), target)
+
+    def test_additional_files_once(self):
+        _, additional = self.plan.add(self.path('src/1.mp3'), self.path('dst/1.mp3'))
+        self.assertEqual([
+            (self.path('src/cover.jpg'), self.path('dst/cover.jpg')),
+            (self.path('src/rip.log'), self.path('dst/rip.log')),
+        ], additional)
+        _, additional = self.plan.add(self.path('src/2.mp3'), self.path('dst/2.mp3'))
+        self.assertEqual([], additional)
+
+    def test_additional_files_loaded(self):
+        plan = RenamePlan(loaded_files={self.path('src/rip.log'): MagicMock()})
+        _, additional = plan.add(self.path('src/1.mp3'), self.path('dst/1.mp3'))
+        self.assertEqual([(self.path('src/cover.jpg'), self.path('dst/cover.jpg'))], additional)
+
+    def test_additional_files_disabled(self):
+        config.setting['move_additional_files'] = False
+        _, additional = RenamePlan().add(self.path('src/1.mp3'), self.path('dst/1.mp3'))
+        self.assertEqual([], additional)
+
+    def test_add_file(self):
+        file = MagicMock()
+        file.filename = self.path('src/1.mp3')
+        file.make_filename.return_value = self.path('dst/taken.mp3')
+        target, _ = self.plan.add_file(file)
+        self.assertEqual(self.path('dst/taken (1).mp3'), target)
+        file.make_filename.assert_called_once_with(file.filename, file.metadata, config.setting)
+
+    def test_add_file_no_rename(self):
+        config.setting['rename_files'] = False
+        config.setting['move_files'] = False
+        file = MagicMock()
+        file.filename = self.path('src/1.mp3')
+        self.assertEqual((file.filename, []), RenamePlan().add_file(file))
+        file.make_filename.assert_not_called()
+
+    def test_export(self):
+        self.plan.add(self.path('src2/3.mp3'), self.path('dst/3.mp3'))
+        expected = [{'source': self.path('src2/3.mp3'), 'target': self.path('dst/3.mp3'), 'type': 'file'}]
+        self.assertEqual(expected, self.plan.export())
+        fp = io.StringIO()
+        self.plan.write(fp)
+        self.assertEqual(expected, json.loads(fp.getvalue()))
@@ -7,11 +7,14 @@ from picard.cluster import Cluster
 from picard.const import DEFAULT_FILE_NAMING_FORMAT
 from picard.metadata import Metadata
 from picard.script import (
+    CompiledScriptCache,
     ScriptEndOfFile,
     ScriptError,
+    ScriptExpression,
     ScriptParser,
     ScriptSyntaxError,
     ScriptUnknownFunction,
+    ScriptVariable,
     register_script_function,
 )
 
@@ -866,3 +869,60 @@ class ScriptParserTest(PicardTestCase):
             self.parser.eval("$map(abc; def)")
         with self.assertRaisesRegex(ScriptError, areg):
             self.parser.eval("$map(abc:def,$noop(),:,extra)")
+
+    def test_compile_constant_folding(self):
+        compiled = self.parser.compile("abc\\$def")
+        self.assertEqual("abc$def", compiled(self.parser))
+        self.assertIs(compiled, self.parser.compile("abc\\$def"))
+
+    def test_compile_invalidated_by_registration(self):
+        def func_compiletest(parser):
+            return "a"
+        register_script_function(func_compiletest, "compiletest")
+        self.assertScriptResultEquals("$compiletest()", "a")
+
+        def func_compiletest2(parser):
+            return "b"
+        register_script_function(func_compiletest2, "compiletest")
+        self.assertScriptResultEquals("$compiletest()", "b")
+
+    def test_compile_unevaluated_arguments(self):
+        received = []
+
+        def func_rawargs(parser, arg):
+            received.append(arg)
+            return arg.eval(parser)
+        register_script_function(func_rawargs, "rawargs", eval_args=False)
+        context = Metadata()
+        context["foo"] = "bar"
+        self.assertScriptResultEquals("$rawargs(x%foo%)", "xbar", context)
+        self.assertIsInstance(received[0], ScriptExpression)
+        self.assertIsInstance(received[0][1], ScriptVariable)
+
+
+class CompiledScriptCacheTest(PicardTestCase):
+
+    def test_hits_and_misses(self):
+        cache = CompiledScriptCache()
+        compile_func = MagicMock(side_effect=lambda script: script.upper())
+        self.assertEqual('A', cache.get('a', 1, compile_func))
+        self.assertEqual('A', cache.get('a', 1, compile_func))
+        self.assertEqual(1, compile_func.call_count)
+        self.assertEqual({'size': 1, 'hits': 1, 'misses': 1}, cache.stats())
+
+    def test_max_size(self):
+        cache = CompiledScriptCache(max_size=2)
+        compile_func = MagicMock(side_effect=lambda script: script.upper())
+        for script in ('a', 'b', 'a', 'c', 'a', 'b'):
+            cache.get(script, 1, compile_func)
+        self.assertEqual(4, compile_func.call_count)
+        self.assertEqual(2, cache.stats()['size'])
+
+    def test_version_change_clears_cache(self):
+        cache = CompiledScriptCache()
+        compile_func = MagicMock(side_effect=lambda script: script.upper())
+        cache.get('a', 1, compile_func)
+        cache.get('b', 1, compile_func)
+        cache.get('a', 2, compile_func)
+        self.assertEqual(3, compile_func.call_count)
+        self.assertEqual(1, cache.stats()['size'])
@@ -1,11 +1,21 @@
 # -*- coding: utf-8 -*-
+import unittest
 
 from test.picardtestcase import PicardTestCase
 
 from picard.similarity import (
     similarity,
     similarity2,
+    similarity2_many,
+    tokenize_words,
 )
+from picard.util.astrcmp import similarity2_words_py
+
+
+try:
+    from picard.util.astrcmp import similarity2_words_c
+except ImportError:
+    similarity2_words_c = None
 
 
 class SimilarityTest(PicardTestCase):
@@ -50,3 +60,29 @@ class Similarity2Test(PicardTestCase):
         a = "abc"
         b = "def"
         self.assertEqual(similarity2(a, b), 0.0)
+
+
+class Similarity2ManyTest(PicardTestCase):
+
+    candidates = ["a b c", "A,B•C", "c a b", "the great gig in the sky",
+                  "Great Gig In The sky", "", "abc", "a b c d e f"]
+
+    def test_matches_similarity2(self):
+        for query in self.candidates:
+            self.assertEqual([similarity2(query, b) for b in self.candidates],
+                             similarity2_many(query, self.candidates))
+
+    def test_empty_candidates(self):
+        self.assertEqual([], similarity2_many("a b c", []))
+
+    def test_tokenize_words(self):
+        self.assertEqual(('a', 'b', 'c'), tokenize_words(",A, B •C•"))
+        self.assertEqual((), tokenize_words(""))
+
+    @unittest.skipIf(similarity2_words_c is None, "The _astrcmp C extension module has not been compiled")
+    def test_c_implementation(self):
+        for a in self.candidates:
+            for b in self.candidates:
+                words_a, words_b = tokenize_words(a), tokenize_words(b)
+                self.assertEqual(similarity2_words_py(words_a, words_b),
+                                 similarity2_words_c(words_a, words_b))
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from test.picardtestcase import PicardTestCase
+
+from picard.album import Album
+from picard.track import Track
+
+
+class TrackFeaturesTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.album = Album('00000000-0000-0000-0000-000000000000')
+        self.track = Track('trackid', self.album)
+        self.track.metadata['title'] = 'Title'
+        self.album.tracks = [self.track]
+
+    def test_update_keeps_features(self):
+        features = self.album.get_track_features()
+        self.track.update()
+        self.assertIs(features[0], self.album.get_track_features()[0])
+
+    def test_edited_metadata_updates_features(self):
+        features = self.album.get_track_features()
+        # e.g. edited by a script or a plugin, without notifying the album
+        self.track.metadata['title'] = 'Edited'
+        edited_features = self.album.get_track_features()
+        self.assertIsNot(features[0], edited_features[0])
+        self.assertEqual('Edited', edited_features[0].values['title'])
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from functools import partial
 from unittest.mock import (
     MagicMock,
     patch,
@@ -21,6 +22,8 @@ PROXY_SETTINGS = {
     "proxy_server_port": 3128,
     "proxy_username": 'user',
     "proxy_password": 'password',
+    "network_concurrent_requests": False,
+    "rate_policies": [],
 }
 
 
@@ -28,7 +31,8 @@ class WebServiceTest(PicardTestCase):
 
     def setUp(self):
         super().setUp()
-        config.setting = {'use_proxy': False, 'server_host': ''}
+        config.setting = {'use_proxy': False, 'server_host': '',
+                          'network_concurrent_requests': False, 'rate_policies': []}
         self.ws = WebService()
 
     def tearDown(self):
@@ -66,7 +70,8 @@ class WebServiceTaskTest(PicardTestCase):
 
     def setUp(self):
         super().setUp()
-        config.setting = {'use_proxy': False}
+        config.setting = {'use_proxy': False, 'network_concurrent_requests': False,
+                          'rate_policies': []}
         self.ws = WebService()
 
         # Patching the QTimers since they can only be started in a QThread
@@ -130,7 +135,8 @@ class WebServiceTaskTest(PicardTestCase):
         non_existing_task = (1, "a", "b")
         self.ws.remove_task(non_existing_task)
 
-    def test_run_task(self):
+    @patch.object(ratecontrol, 'get_delay_to_next_request')
+    def test_run_task(self, delay_func):
         host = "abc.xyz"
         port = 80
         request = WSRequest("", host, port, "", None)
@@ -138,7 +144,6 @@ class WebServiceTaskTest(PicardTestCase):
 
         mock_task = MagicMock()
         mock_task2 = MagicMock()
-        delay_func = ratecontrol.get_delay_to_next_request = MagicMock()
 
         # Patching the get delay function to delay the 2nd task on queue to the next call
         delay_func.side_effect = [(False, 0), (True, 0), (False, 0), (False, 0), (False, 0), (False, 0)]
@@ -176,6 +181,99 @@ class WebServiceTaskTest(PicardTestCase):
         self.assertEqual(mock_task.call_count, 3)
         self.assertNotIn(key, self.ws._queues[0])
 
+    @patch.object(ratecontrol, 'available_slots', return_value=3)
+    @patch.object(ratecontrol, 'get_delay_to_next_request', return_value=(False, 0))
+    def test_run_task_concurrent(self, delay_func, available_slots):
+        request = WSRequest("", "abc.xyz", 80, "", None)
+        mock_task = MagicMock()
+        for _ in range(5):
+            self.ws.add_task(mock_task, request)
+
+        self.ws._run_next_task()
+        self.assertEqual(mock_task.call_count, 1)
+
+        self.ws.concurrent_requests = True
+        self.ws._run_next_task()
+        self.assertEqual(mock_task.call_count, 4)
+
+        # Hosts with a delay between requests are not affected
+        delay_func.return_value = (False, 1000)
+        self.ws._run_next_task()
+        self.assertEqual(mock_task.call_count, 5)
+
+
+class RateControlTest(PicardTestCase):
+
+    def test_available_slots(self):
+        hostkey = ('slots.example.org', 443)
+        self.assertEqual(1, ratecontrol.available_slots(hostkey))
+        ratecontrol.CONGESTION_WINDOW_SIZE[hostkey] = 3.5
+        ratecontrol.increment_requests(hostkey)
+        self.assertEqual(2, ratecontrol.available_slots(hostkey))
+
+    def test_copy_http2_allowed(self):
+        hostkey = ('http2.example.org', 443)
+        redirect_hostkey = ('redirect.example.org', 443)
+        self.assertFalse(ratecontrol.http2_allowed(hostkey))
+        ratecontrol.set_http2_allowed(hostkey)
+        ratecontrol.copy_http2_allowed(hostkey, redirect_hostkey)
+        self.assertTrue(ratecontrol.http2_allowed(redirect_hostkey))
+        ratecontrol.set_http2_allowed(hostkey, False)
+        self.assertFalse(ratecontrol.http2_allowed(hostkey))
+
+    @patch('time.time')
+    def test_token_bucket(self, mock_time):
+        hostkey = ('bucket.example.org', 443)
+        ratecontrol.set_rate_policy(hostkey, ratecontrol.RatePolicy(1000, None, 3))
+        ratecontrol.CONGESTION_WINDOW_SIZE[hostkey] = 10
+        mock_time.return_value = 100.0
+        # A burst of 3 requests, then one per second
+        for expected_delay in (0, 0, 1000):
+            self.assertEqual((False, expected_delay), ratecontrol.get_delay_to_next_request(hostkey))
+            ratecontrol.increment_requests(hostkey)
+        self.assertEqual((True, 1000), ratecontrol.get_delay_to_next_request(hostkey))
+        mock_time.return_value = 100.5
+        self.assertEqual((True, 500), ratecontrol.get_delay_to_next_request(hostkey))
+        mock_time.return_value = 101.0
+        self.assertEqual((False, 1000), ratecontrol.get_delay_to_next_request(hostkey))
+        # No bursts during backoff
+        ratecontrol.adjust(hostkey, True)
+        mock_time.return_value = 200.0
+        self.assertEqual(1, ratecontrol.get_stats(hostkey)['tokens'])
+
+    def test_max_in_flight(self):
+        hostkey = ('mirror.example.org', 80)
+        ratecontrol.set_rate_policy(hostkey, ratecontrol.RatePolicy(0, 4, 1))
+        self.assertEqual(4, ratecontrol.available_slots(hostkey))
+        for i in range(4):
+            self.assertEqual((False, 0), ratecontrol.get_delay_to_next_request(hostkey))
+            ratecontrol.increment_requests(hostkey)
+        self.assertTrue(ratecontrol.get_delay_to_next_request(hostkey)[0])
+        stats = ratecontrol.get_stats()[hostkey]
+        self.assertEqual(4, stats['in_flight'])
+        self.assertEqual(4, stats['requests'])
+        self.assertEqual(0, stats['delay'])
+
+    def test_parse_rate_policy(self):
+        self.assertEqual((('mirror.lan', 5000), ratecontrol.RatePolicy(0, 100, 50)),
+                         ratecontrol.parse_rate_policy('mirror.lan:5000=0,100,50'))
+        self.assertEqual((('mirror.lan', 80), ratecontrol.RatePolicy(10, None, ratecontrol.DEFAULT_BURST)),
+                         ratecontrol.parse_rate_policy('mirror.lan:80=10'))
+        for text in ('mirror.lan=0', 'mirror.lan:80', 'mirror.lan:80=a', 'mirror.lan:80=-1', ':80=0'):
+            with self.assertRaises(ValueError):
+                ratecontrol.parse_rate_policy(text)
+
+    def test_setup_rate_policies(self):
+        config.setting = {'use_proxy': False, 'network_concurrent_requests': False,
+                          'rate_policies': ['declared.example.org:80=0,8', 'invalid']}
+        with patch('picard.log.error') as log_error:
+            ws = WebService()
+        log_error.assert_called_once()
+        hostkey = ('declared.example.org', 80)
+        self.assertEqual({hostkey: ratecontrol.RatePolicy(0, 8, ratecontrol.DEFAULT_BURST)},
+                         ws.rate_policies)
+        self.assertEqual(8, ratecontrol.available_slots(hostkey))
+
 
 class WebServiceProxyTest(PicardTestCase):
 
@@ -207,8 +305,106 @@ class ParserHookTest(PicardTestCase):
         self.assertEqual(WebService.PARSERS['A'].mimetype, WebService.get_response_mimetype('A'))
         self.assertEqual(WebService.PARSERS['A'].parser, 'parser')
         self.assertEqual(WebService.PARSERS['A'].parser, WebService.get_response_parser('A'))
+        self.assertFalse(WebService.PARSERS['A'].threaded)
+        self.assertTrue(WebService.PARSERS['json'].threaded)
 
         with self.assertRaises(UnknownResponseParserError):
             WebService.get_response_parser('B')
         with self.assertRaises(UnknownResponseParserError):
             WebService.get_response_mimetype('B')
+
+
+class ResponseParsingTest(PicardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config.setting = {'use_proxy': False, 'server_host': '',
+                          'network_concurrent_requests': False, 'rate_policies': []}
+        self.ws = WebService()
+        self.ws.parse_in_thread_min_size = 10
+        self.tasks = []
+        patcher = patch('picard.util.thread.run_task', lambda func, next_func, **kwargs: self.tasks.append((func, next_func)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handled = []
+
+    def tearDown(self):
+        del self.ws
+        config.setting = {}
+
+    def handler(self, document, reply, error):
+        self.handled.append((document, reply, error))
+
+    def reply(self, data):
+        reply = MagicMock()
+        reply.bytesAvailable.return_value = len(data)
+        reply.readAll.return_value = data
+        return reply
+
+    def request(self):
+        request = MagicMock()
+        request.response_parser = WebService.get_response_parser('json')
+        request.response_parser_threaded = True
+        return request
+
+    def run_tasks(self):
+        for func, next_func in self.tasks:
+            next_func(result=func())
+        self.tasks = []
+
+    def test_small_reply_parsed_directly(self):
+        reply = self.reply(b'{"a": 1}')
+        self.ws._parse_reply(reply, self.request(), self.handler, 0)
+        self.assertEqual([], self.tasks)
+        self.assertEqual([({'a': 1}, reply, 0)], self.handled)
+        self.assertFalse(self.ws.parse_timings[-1].threaded)
+
+    def test_large_reply_parsed_in_thread(self):
+        reply = self.reply(b'{"a": [1, 2, 3]}')
+        self.ws._parse_reply(reply, self.request(), self.handler, 0)
+        self.assertEqual([], self.handled)
+        self.assertEqual(1, self.ws.count_pending_requests())
+        self.run_tasks()
+        self.assertEqual([({'a': [1, 2, 3]}, reply, 0)], self.handled)
+        self.assertEqual(0, self.ws.count_pending_requests())
+        timing = self.ws.parse_timings[-1]
+        self.assertTrue(timing.threaded)
+        self.assertEqual(16, timing.size)
+        reply.deleteLater.assert_called_once_with()
+
+    def test_handlers_in_completion_order(self):
+        large = self.reply(b'{"a": [1, 2, 3]}')
+        small = self.reply(b'{}')
+        self.ws._parse_reply(large, self.request(), self.handler, 0)
+        self.ws._parse_reply(small, self.request(), self.handler, 0)
+        self.assertEqual([], self.handled)
+        self.run_tasks()
+        self.assertEqual([large, small], [reply for document, reply, error in self.handled])
+        small.deleteLater.assert_called_once_with()
+
+    def test_other_handlers_not_held_back(self):
+        large = self.reply(b'{"a": [1, 2, 3]}')
+        small = self.reply(b'{}')
+        raw = self.reply(b'image')
+        other_handled = []
+
+        def other_handler(document, reply, error):
+            other_handled.append(reply)
+
+        self.ws._parse_reply(large, self.request(), self.handler, 0)
+        self.ws._parse_reply(small, self.request(), other_handler, 0)
+        self.ws._call_handler(raw, partial(other_handler), b'image', 0)
+        self.assertEqual([small, raw], other_handled)
+        self.assertEqual([], self.handled)
+        self.run_tasks()
+        self.assertEqual([large], [reply for document, reply, error in self.handled])
+        self.assertEqual(0, self.ws.count_pending_requests())
+
+    def test_parse_error_in_thread(self):
+        reply = self.reply(b'{"a": [1, 2, 3')
+        with patch('picard.log.error'):
+            self.ws._parse_reply(reply, self.request(), self.handler, 0)
+            self.run_tasks()
+        document, handled_reply, error = self.handled[0]
+        self.assertEqual(b'{"a": [1, 2, 3', document)
+        self.assertIsInstance(error, ValueError)